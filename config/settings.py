@@ -58,6 +58,7 @@ MIDDLEWARE = [
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'finanzas.middleware.ReplicaMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -81,6 +82,19 @@ TEMPLATES = [
     },
 ]
 
+if not DEBUG:
+    # En producción los templates se compilan una sola vez por proceso.
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        (
+            'django.template.loaders.cached.Loader',
+            [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ],
+        ),
+    ]
+
 WSGI_APPLICATION = 'config.wsgi.application'
 
 
@@ -93,6 +107,16 @@ PG_HOST = os.environ.get('POSTGRES_HOST', 'localhost')
 PG_PORT = os.environ.get('POSTGRES_PORT', '5432')
 DATABASE_URL = os.environ.get('DATABASE_URL')
 DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+# Verifica la conexión persistente antes de reusarla en cada request.
+DB_CONN_HEALTH_CHECKS = os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+# Pool de conexiones de psycopg 3 (Django >= 5.1). Con pool, CONN_MAX_AGE se
+# fuerza a 0: la conexión vuelve al pool al final de cada request.
+DB_POOL = os.environ.get('DB_POOL', 'False') == 'True'
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '2'))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '10'))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '10'))
+DB_POOL_MAX_IDLE = float(os.environ.get('DB_POOL_MAX_IDLE', '300'))
+DB_POOL_MAX_LIFETIME = float(os.environ.get('DB_POOL_MAX_LIFETIME', '3600'))
 
 db_config = None
 
@@ -111,18 +135,80 @@ elif PG_NAME and PG_USER:
         'CONN_MAX_AGE': DB_CONN_MAX_AGE,
     }
 
+# Perfil de rendimiento opcional para SQLite (un solo nodo): WAL para que
+# los lectores no esperen al escritor, fsync solo en checkpoints y caches
+# más grandes. Se aplica en cada conexión nueva. Con DB_SQLITE_TUNED=True
+# también se permite SQLite con DEBUG=False.
+DB_SQLITE_TUNED = os.environ.get('DB_SQLITE_TUNED', 'False') == 'True'
+DB_SQLITE_MMAP_SIZE = int(os.environ.get('DB_SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+DB_SQLITE_CACHE_KB = int(os.environ.get('DB_SQLITE_CACHE_KB', '65536'))
+DB_SQLITE_BUSY_TIMEOUT = float(os.environ.get('DB_SQLITE_BUSY_TIMEOUT', '5'))
+SQLITE_INIT_COMMAND = ';'.join([
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    f'PRAGMA mmap_size={DB_SQLITE_MMAP_SIZE}',
+    f'PRAGMA cache_size=-{DB_SQLITE_CACHE_KB}',
+    'PRAGMA temp_store=MEMORY',
+])
+
 if db_config:
+    db_config['CONN_HEALTH_CHECKS'] = DB_CONN_HEALTH_CHECKS
+    if DB_POOL:
+        pool = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+            'max_idle': DB_POOL_MAX_IDLE,
+            'max_lifetime': DB_POOL_MAX_LIFETIME,
+        }
+        if DB_CONN_HEALTH_CHECKS:
+            from psycopg_pool import ConnectionPool
+
+            pool['check'] = ConnectionPool.check_connection
+        db_config['CONN_MAX_AGE'] = 0
+        db_config.setdefault('OPTIONS', {})['pool'] = pool
     DATABASES = {'default': db_config}
-elif DEBUG:
-    # Solo permitido en desarrollo si no hay configuracion de Postgres.
+elif DEBUG or DB_SQLITE_TUNED:
+    # Solo permitido en desarrollo, o con el perfil optimizado, si no hay
+    # configuracion de Postgres.
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
+    if DB_SQLITE_TUNED:
+        DATABASES['default']['OPTIONS'] = {
+            'init_command': SQLITE_INIT_COMMAND,
+            'timeout': DB_SQLITE_BUSY_TIMEOUT,
+            # Las escrituras toman el lock al empezar la transacción: con WAL
+            # evita el "database is locked" al promover una lectura a escritura.
+            'transaction_mode': 'IMMEDIATE',
+        }
 else:
-    raise RuntimeError('DATABASE_URL o POSTGRES_* deben estar configurados en produccion')
+    raise RuntimeError(
+        'DATABASE_URL o POSTGRES_* deben estar configurados en produccion '
+        '(o DB_SQLITE_TUNED=True para SQLite en un solo nodo)'
+    )
+
+# Réplica de solo lectura opcional (ver finanzas.routers). Para probarla en
+# local con dos SQLite: DATABASE_REPLICA_URL=sqlite:///db_replica.sqlite3.
+DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+# Segundos que un navegador sigue leyendo de la primaria después de escribir.
+DB_REPLICA_STICKY = int(os.environ.get('DB_REPLICA_STICKY', '10'))
+
+if DATABASE_REPLICA_URL:
+    replica_config = dj_database_url.parse(
+        DATABASE_REPLICA_URL,
+        conn_max_age=DB_CONN_MAX_AGE,
+        ssl_require=DATABASE_REPLICA_URL.startswith('postgres'),
+    )
+    replica_config['CONN_HEALTH_CHECKS'] = DB_CONN_HEALTH_CHECKS
+    # En tests la réplica es la misma base que 'default'.
+    replica_config['TEST'] = {'MIRROR': 'default'}
+    DATABASES['replica'] = replica_config
+
+DATABASE_ROUTERS = ['finanzas.routers.RouterReplica']
 
 
 # Password validation
@@ -156,6 +242,61 @@ USE_I18N = True
 USE_TZ = False
 
 
+# Cache
+# Con REDIS_URL se usa el backend Redis de Django (compartido entre workers,
+# requiere el paquete `redis`); si no, memoria local de cada proceso.
+REDIS_URL = os.environ.get('REDIS_URL')
+
+# Los fragmentos de templates ({% cache %}) van en su propio alias para no
+# desalojar las versiones y deltas del cache por defecto.
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        'template_fragments': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'fragmentos',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'finanzas',
+        },
+        'template_fragments': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'finanzas-fragmentos',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+    }
+
+
+# Sesiones y mensajes
+# SESSION_STRATEGY elige dónde vive la sesión:
+#   'cached_db' (default): se lee del cache y solo va a la base si falta;
+#               las escrituras van a los dos.
+#   'cookies':  firmada en la cookie, sin base ni cache (no se puede
+#               invalidar del lado del servidor hasta que expira).
+#   'db':       comportamiento de Django por defecto, una consulta por request.
+SESSION_STRATEGY = os.environ.get('SESSION_STRATEGY', 'cached_db')
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+if SESSION_STRATEGY not in SESSION_ENGINES:
+    raise RuntimeError(f'SESSION_STRATEGY debe ser uno de: {", ".join(SESSION_ENGINES)}')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_STRATEGY]
+SESSION_CACHE_ALIAS = 'default'
+# Los mensajes viajan en su propia cookie: un messages.success() después de
+# un POST ya no obliga a reescribir la sesión.
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
@@ -163,6 +304,13 @@ STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Movimientos más viejos que este horizonte (en meses) se mueven al archivo
+# con `python manage.py archivar`.
+FINANZAS_ARCHIVO_MESES = int(os.environ.get('FINANZAS_ARCHIVO_MESES', '36'))
+
+# Procesos para simular las estrategias de pago de deudas (0 = uno por CPU).
+FINANZAS_PROCESOS_ESTRATEGIAS = int(os.environ.get('FINANZAS_PROCESOS_ESTRATEGIAS', '0'))
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'finanzas:dashboard'
 
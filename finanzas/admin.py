@@ -1,6 +1,76 @@
-from django.contrib import admin
+from datetime import timedelta
 
-from .models import Entidad, Deuda, Ingreso, Gasto, Vencimiento
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from . import cotizaciones, envivo, inflacion, saldos, versiones
+from .models import (
+    Entidad,
+    Deuda,
+    Ingreso,
+    IngresoArchivado,
+    Gasto,
+    GastoArchivado,
+    IndicePrecios,
+    Vencimiento,
+    Recurrencia,
+    ResumenMensual,
+    TipoCambio,
+)
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Paginador del admin que no cuenta la tabla entera en PostgreSQL.
+
+    Sin filtros ni búsqueda usa la estimación del planificador
+    (pg_class.reltuples) si la tabla es grande; en otro caso, COUNT exacto.
+    """
+
+    UMBRAL = 10000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        conexion = connections[qs.db]
+        if conexion.vendor == 'postgresql' and not qs.query.where:
+            with conexion.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [qs.model._meta.db_table],
+                )
+                fila = cursor.fetchone()
+            if fila and fila[0] >= self.UMBRAL:
+                return fila[0]
+        return super().count
+
+
+class AdminTablaGrande(admin.ModelAdmin):
+    """Base para tablas que crecen: sin COUNT total y con conteo estimado."""
+
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    list_per_page = 50
+
+
+def _marcar_movimientos(modeladmin, request, queryset, campo, valor):
+    """
+    Pone `campo` = `valor` en las filas seleccionadas con un solo UPDATE.
+
+    Como .update() no dispara señales, invalida los cortes de saldo y anota
+    el Cambio masivo igual que las listas de la app.
+    """
+    cambiados = queryset.exclude(**{campo: valor})
+    with transaction.atomic():
+        desde = cambiados.aggregate(desde=Min('fecha'))['desde']
+        saldos.invalidar_desde(desde)
+        envivo.registrar_masivo(queryset.model._meta.model_name, desde)
+        total = cambiados.update(**{campo: valor, 'actualizado': timezone.now()})
+    modeladmin.message_user(request, f'{total} filas actualizadas.', messages.SUCCESS)
 
 
 @admin.register(Entidad)
@@ -23,12 +93,17 @@ class DeudaAdmin(admin.ModelAdmin):
         'prioridad',
     )
     list_filter = ('tipo_deuda', 'estado', 'prioridad', 'entidad')
+    list_select_related = ('entidad',)
+    autocomplete_fields = ('entidad',)
     search_fields = ('descripcion', 'entidad__nombre')
     ordering = ('prioridad', 'entidad__nombre')
     list_editable = ('estado', 'prioridad')
     fieldsets = (
         ('Datos básicos', {'fields': ('entidad', 'tipo_deuda', 'descripcion')}),
-        ('Montos', {'fields': ('monto_total', 'pago_minimo', 'cuota_mensual_aprox', 'cuotas_restantes')}),
+        ('Montos', {'fields': (
+            'monto_total', 'pago_minimo', 'moneda', 'cuota_mensual_aprox', 'cuotas_restantes',
+            'tasa_interes_anual',
+        )}),
         ('Fechas', {'fields': ('fecha_vencimiento', 'proximo_pago')}),
         ('Estado', {'fields': ('estado', 'prioridad')}),
         ('Notas', {'fields': ('notas',)}),
@@ -36,38 +111,162 @@ class DeudaAdmin(admin.ModelAdmin):
 
 
 @admin.register(Ingreso)
-class IngresoAdmin(admin.ModelAdmin):
-    list_display = ('fecha', 'tipo', 'descripcion', 'monto', 'confirmado')
-    list_filter = ('tipo', 'confirmado', 'fecha')
+class IngresoAdmin(AdminTablaGrande):
+    list_display = ('fecha', 'tipo', 'descripcion', 'monto', 'moneda', 'confirmado')
+    list_filter = ('tipo', 'confirmado', 'moneda')
+    date_hierarchy = 'fecha'
     search_fields = ('descripcion',)
     ordering = ('-fecha', '-id')
     list_editable = ('confirmado',)
-    fields = ('fecha', 'tipo', 'descripcion', 'monto', 'confirmado')
+    fields = ('fecha', 'tipo', 'descripcion', 'monto', 'moneda', 'confirmado')
+    actions = ('marcar_confirmados', 'marcar_pendientes')
+
+    @admin.action(description='Marcar como cobrados')
+    def marcar_confirmados(self, request, queryset):
+        _marcar_movimientos(self, request, queryset, 'confirmado', True)
+
+    @admin.action(description='Marcar como pendientes')
+    def marcar_pendientes(self, request, queryset):
+        _marcar_movimientos(self, request, queryset, 'confirmado', False)
 
 
 @admin.register(Gasto)
-class GastoAdmin(admin.ModelAdmin):
-    list_display = ('fecha', 'tipo', 'categoria', 'descripcion', 'monto', 'pagado')
-    list_filter = ('tipo', 'categoria', 'pagado', 'fecha')
+class GastoAdmin(AdminTablaGrande):
+    list_display = ('fecha', 'tipo', 'categoria', 'descripcion', 'monto', 'moneda', 'pagado')
+    # categoria es texto libre: se busca, no se filtra (el filtro hace un
+    # DISTINCT sobre toda la tabla en cada página).
+    list_filter = ('tipo', 'pagado', 'medio_pago', 'moneda')
+    date_hierarchy = 'fecha'
     search_fields = ('descripcion', 'categoria')
     ordering = ('-fecha', '-id')
     list_editable = ('pagado',)
+    autocomplete_fields = ('deuda_relacionada',)
+    actions = ('marcar_pagados', 'marcar_pendientes')
     fields = (
         'fecha',
         'tipo',
         'categoria',
         'descripcion',
         'monto',
+        'moneda',
         'pagado',
         'deuda_relacionada',
     )
 
+    @admin.action(description='Marcar como pagados')
+    def marcar_pagados(self, request, queryset):
+        _marcar_movimientos(self, request, queryset, 'pagado', True)
+
+    @admin.action(description='Marcar como pendientes')
+    def marcar_pendientes(self, request, queryset):
+        _marcar_movimientos(self, request, queryset, 'pagado', False)
+
 
 @admin.register(Vencimiento)
-class VencimientoAdmin(admin.ModelAdmin):
-    list_display = ('fecha', 'concepto', 'monto', 'estado', 'deuda')
-    list_filter = ('estado', 'fecha')
+class VencimientoAdmin(AdminTablaGrande):
+    list_display = ('fecha', 'concepto', 'monto', 'moneda', 'estado', 'deuda')
+    list_filter = ('estado',)
+    date_hierarchy = 'fecha'
+    list_select_related = ('deuda__entidad',)
+    autocomplete_fields = ('deuda',)
     search_fields = ('concepto',)
     ordering = ('fecha', 'concepto')
     list_editable = ('estado',)
-    fields = ('fecha', 'concepto', 'monto', 'estado', 'deuda', 'notas')
+    fields = ('fecha', 'concepto', 'monto', 'moneda', 'estado', 'deuda', 'notas')
+    actions = ('marcar_pagados', 'marcar_pendientes')
+
+    def _marcar(self, request, queryset, estado):
+        with transaction.atomic():
+            total = queryset.exclude(estado=estado).update(estado=estado)
+            versiones.invalidar('vencimientos')
+            envivo.registrar_masivo('vencimiento', None)
+        self.message_user(request, f'{total} vencimientos actualizados.', messages.SUCCESS)
+
+    @admin.action(description='Marcar como pagados')
+    def marcar_pagados(self, request, queryset):
+        self._marcar(request, queryset, 'pagado')
+
+    @admin.action(description='Marcar como pendientes')
+    def marcar_pendientes(self, request, queryset):
+        self._marcar(request, queryset, 'pendiente')
+
+
+@admin.register(Recurrencia)
+class RecurrenciaAdmin(admin.ModelAdmin):
+    list_display = (
+        'concepto', 'destino', 'frecuencia', 'intervalo', 'monto',
+        'fecha_inicio', 'fecha_fin', 'activa',
+    )
+    list_filter = ('destino', 'frecuencia', 'activa')
+    autocomplete_fields = ('deuda',)
+    search_fields = ('concepto', 'categoria')
+    ordering = ('concepto',)
+    list_editable = ('activa',)
+    fieldsets = (
+        ('Regla', {'fields': (
+            'destino', 'frecuencia', 'intervalo', 'fecha_inicio', 'fecha_fin', 'activa',
+        )}),
+        ('Movimiento', {'fields': (
+            'concepto', 'monto', 'moneda', 'tipo_gasto', 'categoria', 'medio_pago', 'deuda',
+        )}),
+    )
+
+
+@admin.register(TipoCambio)
+class TipoCambioAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'moneda', 'valor')
+    list_filter = ('moneda',)
+    date_hierarchy = 'fecha'
+    ordering = ('-fecha', 'moneda')
+
+    def save_model(self, request, obj, form, change):
+        # Un valor corregido cambia los saldos convertidos desde esa fecha.
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            saldos.invalidar_desde(obj.fecha - timedelta(days=1))
+            versiones.invalidar(cotizaciones.GRUPO)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            saldos.invalidar_desde(obj.fecha - timedelta(days=1))
+            versiones.invalidar(cotizaciones.GRUPO)
+
+
+@admin.register(IndicePrecios)
+class IndicePreciosAdmin(admin.ModelAdmin):
+    list_display = ('mes', 'indice', 'variacion')
+    ordering = ('-mes',)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        versiones.invalidar(inflacion.GRUPO)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        versiones.invalidar(inflacion.GRUPO)
+
+
+@admin.register(GastoArchivado)
+class GastoArchivadoAdmin(AdminTablaGrande):
+    list_display = ('fecha', 'tipo', 'categoria', 'descripcion', 'monto', 'pagado', 'archivado_en')
+    date_hierarchy = 'fecha'
+    search_fields = ('descripcion', 'categoria')
+    ordering = ('-fecha', '-id')
+
+
+@admin.register(IngresoArchivado)
+class IngresoArchivadoAdmin(AdminTablaGrande):
+    list_display = ('fecha', 'tipo', 'descripcion', 'monto', 'confirmado', 'archivado_en')
+    date_hierarchy = 'fecha'
+    search_fields = ('descripcion',)
+    ordering = ('-fecha', '-id')
+
+
+@admin.register(ResumenMensual)
+class ResumenMensualAdmin(admin.ModelAdmin):
+    list_display = (
+        'mes', 'movimiento', 'tipo', 'categoria', 'medio_pago', 'liquidado', 'total', 'cantidad',
+    )
+    list_filter = ('movimiento', 'liquidado')
+    ordering = ('-mes', 'movimiento')
@@ -0,0 +1,107 @@
+"""
+Agenda de vencimientos agrupada por día.
+
+Trae una ventana de fechas con una sola consulta por rango sobre el índice
+(estado, fecha), con deuda y entidad unidas por select_related, y agrupa
+por día en el servidor. El resultado se cachea por ventana y se invalida al
+escribir Vencimientos, Recurrencias, Deudas o Entidades (ver
+finanzas.signals).
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, Value, When
+
+from . import versiones
+from .models import Vencimiento
+from .recurrencias import ocurrencias
+
+CACHE_TIMEOUT = 60 * 60
+MAX_DIAS_VENTANA = 366
+
+ESTADOS_FILTRO = {
+    'pendiente': ['pendiente'],
+    'pagado': ['pagado'],
+    'todos': [valor for valor, _ in Vencimiento.ESTADO_CHOICES],
+}
+
+
+def _item(fecha, concepto, monto, estado, vencido, deuda, recurrencia_id=None):
+    return {
+        'fecha': fecha.isoformat(),
+        'concepto': concepto,
+        'monto': str(monto),
+        'estado': estado,
+        'vencido': vencido,
+        'deuda': str(deuda) if deuda else '',
+        'entidad': deuda.entidad.nombre if deuda else '',
+        'recurrencia': recurrencia_id,
+    }
+
+
+def _calcular_agenda(desde, hasta, estados, hoy):
+    qs = (
+        Vencimiento.objects.filter(estado__in=estados, fecha__gte=desde, fecha__lte=hasta)
+        .select_related('deuda__entidad')
+        .annotate(
+            vencido=Case(
+                When(fecha__lt=hoy, estado='pendiente', then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            )
+        )
+        .order_by('fecha', 'concepto')
+    )
+    items = [
+        _item(v.fecha, v.concepto, v.monto, v.estado, v.vencido, v.deuda)
+        for v in qs
+    ]
+    if 'pendiente' in estados:
+        items += [
+            _item(o.fecha, o.concepto, o.monto, o.estado, o.fecha < hoy, o.deuda, o.recurrencia_id)
+            for o in ocurrencias(desde, hasta, destino='vencimiento')
+        ]
+        items.sort(key=lambda item: (item['fecha'], item['concepto']))
+
+    dias = []
+    for item in items:
+        if not dias or dias[-1]['fecha'] != item['fecha']:
+            dias.append({'fecha': item['fecha'], 'total': Decimal('0'), 'items': []})
+        dias[-1]['items'].append(item)
+        dias[-1]['total'] += Decimal(item['monto'])
+    for dia in dias:
+        dia['total'] = str(dia['total'])
+    return dias
+
+
+def agenda(desde, hasta, estado='pendiente'):
+    """
+    Devuelve los vencimientos de la ventana agrupados por día.
+
+    Params:
+        desde, hasta (date): ventana inclusiva (máximo MAX_DIAS_VENTANA días).
+        estado (str): 'pendiente', 'pagado' o 'todos'.
+
+    Retorna:
+        list[dict] con 'fecha' (ISO), 'total' y 'items' por día, serializable
+        a JSON tal cual.
+
+    Lanza:
+        ValueError si la ventana o el estado no son válidos.
+    """
+    if estado not in ESTADOS_FILTRO:
+        raise ValueError(f'Estado inválido: {estado}')
+    if hasta < desde or (hasta - desde).days > MAX_DIAS_VENTANA:
+        raise ValueError('Ventana de fechas inválida.')
+
+    hoy = date.today()
+    clave = (
+        f'finanzas:agenda:{versiones.version("vencimientos")}:'
+        f'{hoy.isoformat()}:{estado}:{desde.isoformat()}:{hasta.isoformat()}'
+    )
+    dias = cache.get(clave)
+    if dias is None:
+        dias = _calcular_agenda(desde, hasta, ESTADOS_FILTRO[estado], hoy)
+        cache.set(clave, dias, CACHE_TIMEOUT)
+    return dias
@@ -0,0 +1,159 @@
+"""
+Simulación de planes de pago de deudas.
+
+No importa Django: `evaluar_escenario` corre en procesos hijos (ver
+finanzas.estrategias) y tiene que poder importarse sin configurar la app.
+Los montos son float; es una proyección, no contabilidad.
+
+Cada mes la deuda suma su interés, se paga la cuota mínima de cada deuda
+abierta y lo que sobra del presupuesto va a la primera deuda abierta del
+orden. Al cancelar una deuda su cuota queda libre para la siguiente (por
+eso el presupuesto es fijo: cuotas + sobrante).
+"""
+from collections import namedtuple
+from itertools import permutations
+
+MAX_MESES = 600
+# Hasta esta cantidad de deudas se prueban todos los órdenes; con más, una
+# búsqueda local desde la mejor heurística.
+PERMUTAR_HASTA = 6
+MAX_VUELTAS_BUSQUEDA = 20
+ORDEN_PRIORIDAD = {'alta': 0, 'media': 1, 'baja': 2}
+
+DeudaPlan = namedtuple('DeudaPlan', 'id saldo tasa_mensual cuota prioridad')
+
+
+def simular(deudas, orden, presupuesto, max_meses=MAX_MESES):
+    """
+    Paga `deudas` mes a mes con `presupuesto`, priorizando según `orden`.
+
+    Params:
+        deudas (list[DeudaPlan]): deudas abiertas.
+        orden (tuple[int]): posiciones en `deudas`, de la primera a pagar
+            a la última.
+        presupuesto (float): monto mensual destinado a deudas.
+
+    Retorna:
+        tuple (meses, interés total, {id: mes de cancelación}); meses es
+        None si no se cancela todo en `max_meses`.
+    """
+    saldos = [d.saldo for d in deudas]
+    tasas = [d.tasa_mensual for d in deudas]
+    cuotas = [d.cuota for d in deudas]
+    abiertas = [i for i in orden if saldos[i] > 0]
+    interes_total = 0.0
+    cancelacion = {}
+    mes = 0
+    while abiertas:
+        if mes >= max_meses:
+            return None, interes_total, cancelacion
+        mes += 1
+        for i in abiertas:
+            interes = saldos[i] * tasas[i]
+            saldos[i] += interes
+            interes_total += interes
+        disponible = presupuesto
+        for i in abiertas:
+            pago = min(cuotas[i], saldos[i], disponible)
+            saldos[i] -= pago
+            disponible -= pago
+        for i in abiertas:
+            if disponible <= 0:
+                break
+            pago = min(saldos[i], disponible)
+            saldos[i] -= pago
+            disponible -= pago
+        # Menos de un centavo cuenta como cancelada.
+        siguen = []
+        for i in abiertas:
+            if saldos[i] < 0.005:
+                cancelacion[deudas[i].id] = mes
+            else:
+                siguen.append(i)
+        abiertas = siguen
+    return mes, interes_total, cancelacion
+
+
+def _costo(resultado):
+    meses, interes, _ = resultado
+    # Primero que se cancele; después el menor interés y el menor plazo.
+    return (meses is None, interes, meses or 0)
+
+
+def ordenes_heuristicos(deudas):
+    """Órdenes de las estrategias clásicas: {nombre: tuple de posiciones}."""
+    posiciones = range(len(deudas))
+    return {
+        'avalancha': tuple(
+            sorted(posiciones, key=lambda i: (-deudas[i].tasa_mensual, deudas[i].saldo))
+        ),
+        'bola_de_nieve': tuple(
+            sorted(posiciones, key=lambda i: (deudas[i].saldo, -deudas[i].tasa_mensual))
+        ),
+        'prioridad': tuple(
+            sorted(
+                posiciones,
+                key=lambda i: (
+                    ORDEN_PRIORIDAD.get(deudas[i].prioridad, 1), -deudas[i].tasa_mensual
+                ),
+            )
+        ),
+    }
+
+
+def buscar_orden(deudas, presupuesto, inicial):
+    """
+    Orden de pago con el menor costo (ver _costo).
+
+    Con pocas deudas prueba todas las permutaciones; con más, parte de
+    `inicial` y mueve una deuda por vez a cada posición mientras mejore.
+    """
+    if len(deudas) <= PERMUTAR_HASTA:
+        return min(
+            permutations(range(len(deudas))),
+            key=lambda o: _costo(simular(deudas, o, presupuesto)),
+        )
+    mejor = tuple(inicial)
+    mejor_costo = _costo(simular(deudas, mejor, presupuesto))
+    for _ in range(MAX_VUELTAS_BUSQUEDA):
+        mejoro = False
+        for origen in range(len(mejor)):
+            elegida, resto = mejor[origen], mejor[:origen] + mejor[origen + 1:]
+            for destino in range(len(mejor)):
+                if destino == origen:
+                    continue
+                candidato = resto[:destino] + (elegida,) + resto[destino:]
+                costo = _costo(simular(deudas, candidato, presupuesto))
+                if costo < mejor_costo:
+                    mejor, mejor_costo, mejoro = candidato, costo, True
+        if not mejoro:
+            break
+    return mejor
+
+
+def evaluar_escenario(deudas, presupuesto):
+    """
+    Resultado de cada estrategia para un presupuesto mensual.
+
+    Retorna:
+        dict con 'presupuesto' y 'estrategias': lista de dicts con
+        'nombre', 'meses', 'interes_total', 'orden' (ids) y 'cancelacion'.
+    """
+    ordenes = ordenes_heuristicos(deudas)
+    resultados = {nombre: simular(deudas, orden, presupuesto) for nombre, orden in ordenes.items()}
+    inicial = ordenes[min(resultados, key=lambda nombre: _costo(resultados[nombre]))]
+    ordenes['optimizada'] = buscar_orden(deudas, presupuesto, inicial)
+    resultados['optimizada'] = simular(deudas, ordenes['optimizada'], presupuesto)
+    return {
+        'presupuesto': presupuesto,
+        'estrategias': [
+            {
+                'nombre': nombre,
+                'meses': meses,
+                'interes_total': round(interes, 2),
+                'orden': [deudas[i].id for i in ordenes[nombre]],
+                'cancelacion': cancelacion,
+            }
+            for nombre, (meses, interes, cancelacion) in resultados.items()
+        ],
+    }
@@ -0,0 +1,124 @@
+"""
+Archivo frío de movimientos antiguos.
+
+`archivar` mueve los Gasto/Ingreso anteriores a un horizonte (en meses) a
+GastoArchivado/IngresoArchivado y acumula sus totales en ResumenMensual,
+para que las tablas calientes se mantengan chicas sin perder los totales
+históricos. El corte siempre cae en un límite de mes.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Min, Sum
+from django.db.models.functions import TruncMonth
+
+from . import cotizaciones, envivo
+from .models import (
+    Gasto,
+    GastoArchivado,
+    Ingreso,
+    IngresoArchivado,
+    ResumenMensual,
+)
+
+# El dashboard navega ±24 meses; archivar dentro de esa ventana vaciaría sus
+# series diarias, que solo leen las tablas calientes.
+HORIZONTE_MINIMO_MESES = 25
+
+CAMPOS_GASTO = (
+    'id', 'fecha', 'tipo', 'categoria', 'descripcion', 'monto', 'pagado',
+    'medio_pago', 'deuda_relacionada_id', 'recurrencia_id', 'fecha_recurrencia', 'moneda',
+)
+CAMPOS_INGRESO = ('id', 'fecha', 'tipo', 'descripcion', 'monto', 'moneda', 'confirmado')
+
+
+def horizonte_por_defecto():
+    return getattr(settings, 'FINANZAS_ARCHIVO_MESES', 36)
+
+
+def fecha_corte(meses, hoy=None):
+    """Primer día del mes ubicado `meses` meses antes del mes de `hoy`."""
+    hoy = hoy or date.today()
+    total = hoy.year * 12 + hoy.month - 1 - meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def _acumular_resumen(qs, movimiento, liquidado, dimensiones):
+    filas = (
+        qs.annotate(mes=TruncMonth('fecha'))
+        .order_by()
+        .values('mes', liquidado, *dimensiones)
+        .annotate(suma=Sum(cotizaciones.convertido()), n=Count('id'))
+    )
+    for fila in filas:
+        clave = {
+            'mes': fila['mes'],
+            'movimiento': movimiento,
+            'tipo': fila['tipo'],
+            'categoria': fila.get('categoria', ''),
+            'medio_pago': fila.get('medio_pago', ''),
+            'liquidado': fila[liquidado],
+        }
+        actualizados = ResumenMensual.objects.filter(**clave).update(
+            total=F('total') + fila['suma'], cantidad=F('cantidad') + fila['n']
+        )
+        if not actualizados:
+            ResumenMensual.objects.create(total=fila['suma'], cantidad=fila['n'], **clave)
+
+
+def _mover(qs, modelo_archivo, campos, lote):
+    """Copia las filas de qs al archivo por lotes y las borra de la tabla caliente."""
+    tabla = connection.ops.quote_name(qs.model._meta.db_table)
+    movidos = 0
+    while True:
+        filas = list(qs.order_by('pk').values(*campos)[:lote])
+        if not filas:
+            return movidos
+        modelo_archivo.objects.bulk_create([modelo_archivo(**fila) for fila in filas])
+        ids = [fila['id'] for fila in filas]
+        # DELETE directo: .delete() dispararía las señales que ajustan los
+        # cortes de saldo, y archivar no cambia ningún total.
+        with connection.cursor() as cursor:
+            marcadores = ', '.join(['%s'] * len(ids))
+            cursor.execute(f'DELETE FROM {tabla} WHERE id IN ({marcadores})', ids)
+        movidos += len(filas)
+
+
+def archivar(meses=None, lote=2000, simular=False):
+    """
+    Mueve al archivo los movimientos con fecha anterior al horizonte.
+
+    Params:
+        meses (int): horizonte en meses (por defecto FINANZAS_ARCHIVO_MESES).
+        lote (int): filas movidas por sentencia.
+        simular (bool): solo cuenta, sin mover nada.
+
+    Retorna:
+        dict con 'corte', 'gastos' e 'ingresos' (cantidad de filas).
+
+    Lanza:
+        ValueError si el horizonte es menor a HORIZONTE_MINIMO_MESES.
+    """
+    meses = horizonte_por_defecto() if meses is None else meses
+    if meses < HORIZONTE_MINIMO_MESES:
+        raise ValueError(f'El horizonte debe ser de al menos {HORIZONTE_MINIMO_MESES} meses.')
+
+    corte = fecha_corte(meses)
+    gastos = Gasto.objects.filter(fecha__lt=corte)
+    ingresos = Ingreso.objects.filter(fecha__lt=corte)
+    if simular:
+        return {'corte': corte, 'gastos': gastos.count(), 'ingresos': ingresos.count()}
+
+    with transaction.atomic():
+        # Los totales no cambian, pero las listas sí: el Cambio invalida
+        # sus fragmentos cacheados.
+        envivo.registrar_masivo('gasto', gastos.aggregate(desde=Min('fecha'))['desde'])
+        envivo.registrar_masivo('ingreso', ingresos.aggregate(desde=Min('fecha'))['desde'])
+        _acumular_resumen(gastos, 'gasto', 'pagado', ('tipo', 'categoria', 'medio_pago'))
+        _acumular_resumen(ingresos, 'ingreso', 'confirmado', ('tipo',))
+        return {
+            'corte': corte,
+            'gastos': _mover(gastos, GastoArchivado, CAMPOS_GASTO, lote),
+            'ingresos': _mover(ingresos, IngresoArchivado, CAMPOS_INGRESO, lote),
+        }
@@ -0,0 +1,92 @@
+"""
+Calentamiento de un proceso antes de recibir tráfico.
+
+Lo usan los hooks de gunicorn.conf.py: en el master (con preload_app) se
+importan las vistas y se compilan los templates, así los workers los
+heredan ya cargados al hacer fork; en cada worker se abren las conexiones a
+la base, que no pueden compartirse entre procesos.
+"""
+import time
+from pathlib import Path
+
+from django.db import connections
+from django.template import engines
+from django.urls import get_resolver
+
+APPS_CON_TEMPLATES = ('finanzas',)
+
+
+def _nombres_de_templates(engine):
+    """Nombres relativos de los .html de DIRS y de las apps propias."""
+    from django.apps import apps
+
+    directorios = [Path(d) for d in engine.dirs]
+    for etiqueta in APPS_CON_TEMPLATES:
+        directorios.append(Path(apps.get_app_config(etiqueta).path) / 'templates')
+    nombres = set()
+    for directorio in directorios:
+        if directorio.is_dir():
+            nombres.update(p.relative_to(directorio).as_posix() for p in directorio.rglob('*.html'))
+    return sorted(nombres)
+
+
+def compilar_templates():
+    """
+    Compila los templates del proyecto con el loader cacheado.
+
+    Retorna:
+        int: cantidad de templates compilados.
+    """
+    total = 0
+    for backend in engines.all():
+        engine = getattr(backend, 'engine', None)
+        if engine is None:
+            continue
+        for nombre in _nombres_de_templates(engine):
+            backend.get_template(nombre)
+            total += 1
+    return total
+
+
+def cargar_urls():
+    """Resuelve las URLs, lo que importa todos los módulos de vistas."""
+    return len(get_resolver().url_patterns)
+
+
+def abrir_conexiones():
+    """
+    Abre (y verifica) una conexión por alias de base.
+
+    Con conexiones persistentes queda lista para el primer request de este
+    hilo; con pool, vuelve al pool al cerrarla y la usa cualquier hilo.
+    """
+    for conexion in connections.all():
+        conexion.ensure_connection()
+        if conexion.settings_dict.get('OPTIONS', {}).get('pool'):
+            conexion.close()
+
+
+def cerrar_conexiones():
+    """Cierra las conexiones del proceso (antes de hacer fork)."""
+    connections.close_all()
+
+
+def calentar(conexiones=True):
+    """
+    Ejecuta todo el calentamiento y devuelve lo que tardó cada paso.
+
+    Params:
+        conexiones (bool): abrir conexiones a la base (no en el master).
+
+    Retorna:
+        dict: segundos por paso.
+    """
+    tiempos = {}
+    pasos = [('urls', cargar_urls), ('templates', compilar_templates)]
+    if conexiones:
+        pasos.append(('conexiones', abrir_conexiones))
+    for nombre, paso in pasos:
+        inicio = time.perf_counter()
+        paso()
+        tiempos[nombre] = time.perf_counter() - inicio
+    return tiempos
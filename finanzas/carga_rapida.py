@@ -0,0 +1,218 @@
+"""
+Carga rápida de movimientos por API JSON.
+
+Un POST trae listas de gastos y/o ingresos; cada ítem se valida con las
+mismas reglas que GastoForm/IngresoForm y, si todos son válidos, se
+insertan con bulk_create en una sola transacción. Si alguno falla no se
+crea nada y se devuelven los errores por ítem.
+
+Con el header Idempotency-Key la respuesta exitosa queda guardada
+(ClaveIdempotencia): un reintento con la misma clave y el mismo cuerpo la
+recibe de nuevo sin duplicar filas.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import duplicados, envivo, referencias, saldos
+from .forms import GastoForm, IngresoForm
+from .models import ClaveIdempotencia, Deuda
+
+MAX_ITEMS = 500
+MAX_CLAVE = 100
+RETENCION_DIAS = 7
+
+# lista del JSON -> (formulario, nombre del modelo para Cambio)
+TIPOS = {
+    'gastos': (GastoForm, 'gasto'),
+    'ingresos': (IngresoForm, 'ingreso'),
+}
+
+
+class CargaInvalida(Exception):
+    """Cuerpo que no se puede procesar; `estado` es el código HTTP."""
+
+    def __init__(self, datos, estado=400):
+        super().__init__(datos)
+        self.datos = datos
+        self.estado = estado
+
+
+def leer_cuerpo(cuerpo):
+    """
+    Parsea y acota el JSON de la carga.
+
+    Retorna:
+        dict: 'gastos' y 'ingresos' como listas de dicts.
+
+    Lanza:
+        CargaInvalida si no es JSON, falta todo o supera MAX_ITEMS.
+    """
+    try:
+        datos = json.loads(cuerpo)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise CargaInvalida({'error': 'El cuerpo no es JSON válido.'})
+    if not isinstance(datos, dict):
+        raise CargaInvalida({'error': 'Se espera un objeto con "gastos" y/o "ingresos".'})
+    lotes = {}
+    for nombre in TIPOS:
+        items = datos.get(nombre, [])
+        if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+            raise CargaInvalida({'error': f'"{nombre}" debe ser una lista de objetos.'})
+        lotes[nombre] = items
+    total = sum(len(items) for items in lotes.values())
+    if not total:
+        raise CargaInvalida({'error': 'No hay movimientos para cargar.'})
+    if total > MAX_ITEMS:
+        raise CargaInvalida({'error': f'Máximo {MAX_ITEMS} movimientos por carga.'})
+    return lotes
+
+
+def _deudas(items):
+    """Deudas pagables referenciadas por los gastos, con una sola consulta."""
+    ids = set()
+    for item in items:
+        try:
+            ids.add(int(item['deuda_relacionada']))
+        except (KeyError, TypeError, ValueError):
+            pass
+    if not ids:
+        return {}
+    return Deuda.objects.filter(tipo_deuda__in=referencias.TIPOS_PAGABLES).in_bulk(ids)
+
+
+def validar(lotes):
+    """
+    Valida cada ítem con su formulario.
+
+    Retorna:
+        tuple: (objetos por lista, errores). Los errores son dicts con
+        'lista', 'indice' y 'errores' (campo -> mensajes).
+    """
+    objetos = {}
+    errores = []
+    deudas = _deudas(lotes['gastos'])
+    for nombre, items in lotes.items():
+        formulario, _ = TIPOS[nombre]
+        objetos[nombre] = []
+        for indice, item in enumerate(items):
+            # La deuda se resuelve en bloque arriba; el formulario valida el resto.
+            datos = {k: v for k, v in item.items() if k != 'deuda_relacionada'}
+            form = formulario(data=datos)
+            problemas = {} if form.is_valid() else form.errors.get_json_data()
+            deuda = item.get('deuda_relacionada')
+            if deuda not in (None, ''):
+                try:
+                    deuda = deudas.get(int(deuda))
+                except (TypeError, ValueError):
+                    deuda = None
+                if deuda is None:
+                    problemas['deuda_relacionada'] = [
+                        {'message': 'Deuda inexistente o no pagable.', 'code': 'invalid_choice'}
+                    ]
+            if problemas:
+                errores.append({
+                    'lista': nombre,
+                    'indice': indice,
+                    'errores': {
+                        campo: [e['message'] for e in lista] for campo, lista in problemas.items()
+                    },
+                })
+                continue
+            objeto = form.save(commit=False)
+            if deuda:
+                objeto.deuda_relacionada = deuda
+            objetos[nombre].append(objeto)
+    return objetos, errores
+
+
+def crear(objetos):
+    """
+    Inserta los objetos validados y avisa a saldos y al dashboard en vivo.
+
+    Debe llamarse dentro de una transacción.
+
+    Retorna:
+        tuple: (dict lista -> ids creados en el orden recibido, cantidad de
+        posibles duplicados según finanzas.duplicados).
+    """
+    creados = {}
+    repetidos = 0
+    for nombre, lista in objetos.items():
+        if not lista:
+            creados[nombre] = []
+            continue
+        modelo = lista[0].__class__
+        repetidos += duplicados.marcar(lista)
+        lista = modelo.objects.bulk_create(lista)
+        desde = min(o.fecha for o in lista)
+        # bulk_create no dispara señales.
+        saldos.invalidar_desde(desde)
+        envivo.registrar_masivo(TIPOS[nombre][1], desde)
+        creados[nombre] = [o.pk for o in lista]
+    return creados, repetidos
+
+
+def huella(cuerpo):
+    return hashlib.sha256(cuerpo).hexdigest()
+
+
+def procesar(usuario, cuerpo, clave=None):
+    """
+    Procesa una carga completa.
+
+    Params:
+        usuario (User): dueño de la clave de idempotencia.
+        cuerpo (bytes): cuerpo del request.
+        clave (str): header Idempotency-Key (opcional).
+
+    Retorna:
+        tuple: (estado HTTP, datos JSON, True si es una respuesta repetida).
+    """
+    if clave is not None and not 0 < len(clave) <= MAX_CLAVE:
+        error = f'Idempotency-Key debe tener entre 1 y {MAX_CLAVE} caracteres.'
+        return 400, {'error': error}, False
+    firma = huella(cuerpo)
+    if clave:
+        previa = ClaveIdempotencia.objects.filter(usuario=usuario, clave=clave).first()
+        if previa is not None:
+            return _repetida(previa, firma)
+    try:
+        lotes = leer_cuerpo(cuerpo)
+    except CargaInvalida as exc:
+        return exc.estado, exc.datos, False
+    objetos, errores = validar(lotes)
+    if errores:
+        return 400, {'errores': errores}, False
+
+    try:
+        with transaction.atomic():
+            creados, repetidos = crear(objetos)
+            datos = {'creados': creados, 'posibles_duplicados': repetidos}
+            if clave:
+                # La restricción única frena a un reintento concurrente con la
+                # misma clave: espera este commit y después ve la respuesta.
+                ClaveIdempotencia.objects.create(
+                    usuario=usuario, clave=clave, huella=firma, estado=201, respuesta=datos
+                )
+    except IntegrityError:
+        if not clave:
+            raise
+        previa = ClaveIdempotencia.objects.get(usuario=usuario, clave=clave)
+        return _repetida(previa, firma)
+    return 201, datos, False
+
+
+def _repetida(previa, firma):
+    if previa.huella != firma:
+        return 422, {'error': 'Idempotency-Key ya usada con otro contenido.'}, False
+    return previa.estado, previa.respuesta, True
+
+
+def purgar(dias=RETENCION_DIAS):
+    """Borra las claves más viejas que `dias` días; devuelve cuántas borró."""
+    limite = timezone.now() - timedelta(days=dias)
+    return ClaveIdempotencia.objects.filter(creado__lt=limite).delete()[0]
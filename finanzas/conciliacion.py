@@ -0,0 +1,312 @@
+"""
+Conciliación de extractos bancarios y de tarjeta contra lo pendiente.
+
+Lee el extracto por streaming (CSV exportado por el banco u OFX), línea por
+línea, y busca cada débito entre los gastos no pagados y los vencimientos
+pendientes con un índice en memoria: {(monto en centavos, medio de pago):
+[(fecha, ...)] ordenado por fecha}. Cada movimiento resuelve su ventana de
+fechas con bisect, así que el costo no depende del largo del extracto ni de
+la cantidad de pendientes. Los vencimientos no tienen medio de pago y se
+buscan con cualquiera. Solo se cargan los pendientes en la moneda del
+extracto.
+
+Cada pendiente se usa una sola vez (el más cercano en fecha gana). Marcar
+como pagado lo hace `aplicar`, con dos UPDATE y las mismas invalidaciones
+que las listas de la app.
+"""
+import csv
+import io
+import re
+from bisect import bisect_left
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import envivo, saldos, versiones
+from .models import MONEDA_BASE, Gasto, Vencimiento
+
+VENTANA_DIAS = 3
+FORMATOS_FECHA = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y')
+
+# Nombres de columna aceptados en los CSV de bancos (en minúsculas).
+COLUMNAS_CSV = {
+    'fecha': ('fecha', 'fecha operacion', 'fecha movimiento', 'date'),
+    'monto': ('monto', 'importe', 'amount'),
+    'debito': ('debito', 'débito', 'debe'),
+    'credito': ('credito', 'crédito', 'haber'),
+    'descripcion': ('descripcion', 'descripción', 'concepto', 'detalle', 'description'),
+    'referencia': ('referencia', 'comprobante', 'id'),
+}
+
+Movimiento = namedtuple('Movimiento', 'linea fecha monto descripcion referencia')
+Propuesta = namedtuple('Propuesta', 'movimiento modelo pk fecha dias')
+
+
+class ExtractoInvalido(ValueError):
+    """El archivo no tiene un formato de extracto reconocible."""
+
+
+def parse_fecha(valor):
+    valor = valor.strip()
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            pass
+    raise ValueError(f'Fecha no reconocida: {valor!r}')
+
+
+def parse_monto(valor):
+    """
+    Monto de un extracto: acepta '1234.56', '-1.234,56', '1,234.56' y '$ 10'.
+    """
+    valor = re.sub(r'[^\d,.\-]', '', valor or '')
+    if not valor:
+        return None
+    if ',' in valor and '.' in valor:
+        miles = ',' if valor.rfind(',') < valor.rfind('.') else '.'
+        valor = valor.replace(miles, '')
+    valor = valor.replace(',', '.')
+    try:
+        return Decimal(valor)
+    except InvalidOperation:
+        raise ValueError(f'Monto no reconocido: {valor!r}')
+
+
+def _columnas(encabezado):
+    normalizado = [c.strip().lower() for c in encabezado]
+    indices = {}
+    for campo, alias in COLUMNAS_CSV.items():
+        for nombre in alias:
+            if nombre in normalizado:
+                indices[campo] = normalizado.index(nombre)
+                break
+    if 'fecha' not in indices or not ('monto' in indices or 'debito' in indices):
+        raise ExtractoInvalido(f'Columnas no reconocidas: {encabezado}')
+    return indices
+
+
+def leer_csv(archivo, encoding='utf-8-sig'):
+    """
+    Itera los movimientos de un CSV de banco (archivo binario abierto).
+
+    Detecta el separador (',' o ';') y las columnas por nombre: fecha, y
+    monto con signo o debito/credito separados. Los débitos salen con monto
+    negativo. Las líneas que no se pueden leer se saltean. Con 'utf-8-sig'
+    el BOM que agregan algunos bancos no ensucia el encabezado.
+    """
+    texto = io.TextIOWrapper(archivo, encoding=encoding, newline='')
+    try:
+        primera = texto.readline()
+        delimitador = ';' if primera.count(';') > primera.count(',') else ','
+        indices = _columnas(next(csv.reader([primera], delimiter=delimitador)))
+        reader = csv.reader(texto, delimiter=delimitador)
+        for linea, fila in enumerate(reader, start=2):
+            try:
+                fecha = parse_fecha(fila[indices['fecha']])
+                if 'monto' in indices:
+                    monto = parse_monto(fila[indices['monto']])
+                else:
+                    debito = parse_monto(fila[indices['debito']])
+                    credito = (
+                        parse_monto(fila[indices['credito']]) if 'credito' in indices else None
+                    )
+                    monto = -debito if debito else credito
+            except (IndexError, ValueError):
+                continue
+            if monto is None:
+                continue
+            yield Movimiento(
+                linea,
+                fecha,
+                monto,
+                fila[indices['descripcion']] if 'descripcion' in indices else '',
+                fila[indices['referencia']] if 'referencia' in indices else '',
+            )
+    finally:
+        texto.detach()
+
+
+_ETIQUETA_OFX = re.compile(r'<(/?)([A-Z0-9.]+)>([^<\r\n]*)')
+
+
+def leer_ofx(archivo, encoding='latin-1'):
+    """
+    Itera los movimientos (<STMTTRN>) de un OFX 1.x (SGML) o 2.x (XML).
+
+    Se lee línea por línea; los encabezados y saldos se ignoran.
+    """
+    texto = io.TextIOWrapper(archivo, encoding=encoding, newline='')
+    try:
+        actual = None
+        linea = 0
+        for linea, renglon in enumerate(texto, start=1):
+            for cierre, etiqueta, valor in _ETIQUETA_OFX.findall(renglon):
+                if etiqueta == 'STMTTRN':
+                    if not cierre:
+                        actual = {'linea': linea}
+                    elif actual is not None:
+                        movimiento = _movimiento_ofx(actual)
+                        if movimiento:
+                            yield movimiento
+                        actual = None
+                elif actual is not None and not cierre and valor.strip():
+                    actual[etiqueta] = valor.strip()
+    finally:
+        texto.detach()
+
+
+def _movimiento_ofx(datos):
+    try:
+        fecha = datetime.strptime(datos['DTPOSTED'][:8], '%Y%m%d').date()
+        monto = parse_monto(datos['TRNAMT'])
+    except (KeyError, ValueError):
+        return None
+    return Movimiento(
+        datos['linea'],
+        fecha,
+        monto,
+        datos.get('NAME') or datos.get('MEMO', ''),
+        datos.get('FITID', ''),
+    )
+
+
+def leer_extracto(nombre, archivo):
+    """Elige el lector por extensión (.ofx/.qfx o CSV)."""
+    if nombre.lower().endswith(('.ofx', '.qfx')):
+        return leer_ofx(archivo)
+    return leer_csv(archivo)
+
+
+def _centavos(monto):
+    return int(abs(monto).quantize(Decimal('0.01')) * 100)
+
+
+class Indice:
+    """
+    Pendientes por (centavos, medio de pago), cada lista ordenada por fecha.
+
+    Params:
+        desde, hasta (date): acota los pendientes cargados (None: todos).
+        moneda (str): moneda del extracto; los pendientes en otra moneda no
+            se cargan.
+    """
+
+    def __init__(self, desde=None, hasta=None, moneda=MONEDA_BASE):
+        self._pendientes = defaultdict(list)
+        rango = {'moneda': moneda}
+        if desde:
+            rango['fecha__gte'] = desde
+        if hasta:
+            rango['fecha__lte'] = hasta
+        gastos = Gasto.objects.filter(pagado=False, **rango).values_list(
+            'pk', 'fecha', 'monto', 'medio_pago'
+        )
+        for pk, fecha, monto, medio in gastos.iterator(chunk_size=2000):
+            self._pendientes[(_centavos(monto), medio)].append((fecha, 'gasto', pk))
+        vencimientos = Vencimiento.objects.filter(estado='pendiente', **rango).values_list(
+            'pk', 'fecha', 'monto'
+        )
+        for pk, fecha, monto in vencimientos.iterator(chunk_size=2000):
+            self._pendientes[(_centavos(monto), None)].append((fecha, 'vencimiento', pk))
+        for lista in self._pendientes.values():
+            lista.sort()
+
+    def __len__(self):
+        return sum(len(lista) for lista in self._pendientes.values())
+
+    def _mejor(self, lista, fecha, ventana):
+        """Posición del pendiente más cercano a `fecha` dentro de la ventana."""
+        inicio = bisect_left(lista, (fecha - ventana,))
+        mejor = None
+        for posicion in range(inicio, len(lista)):
+            fecha_pendiente = lista[posicion][0]
+            if fecha_pendiente > fecha + ventana:
+                break
+            dias = abs((fecha_pendiente - fecha).days)
+            if mejor is None or dias < mejor[0]:
+                mejor = (dias, posicion)
+        return mejor
+
+    def buscar(self, movimiento, medio, ventana):
+        """
+        Toma (y saca del índice) el pendiente que mejor coincide.
+
+        Retorna:
+            Propuesta o None.
+        """
+        centavos = _centavos(movimiento.monto)
+        candidatos = []
+        for clave in ((centavos, medio), (centavos, None)):
+            lista = self._pendientes.get(clave)
+            if lista:
+                mejor = self._mejor(lista, movimiento.fecha, ventana)
+                if mejor:
+                    candidatos.append((mejor, lista))
+        if not candidatos:
+            return None
+        (dias, posicion), lista = min(candidatos, key=lambda c: c[0][0])
+        fecha, modelo, pk = lista.pop(posicion)
+        return Propuesta(movimiento, modelo, pk, fecha, dias)
+
+
+def conciliar(movimientos, medio='debito', ventana_dias=VENTANA_DIAS, indice=None):
+    """
+    Propone un pendiente para cada débito del extracto.
+
+    Params:
+        movimientos (iterable[Movimiento]): salida de leer_csv/leer_ofx.
+        medio (str): medio de pago del extracto ('debito' para una cuenta,
+            'tarjeta' para un resumen de tarjeta).
+        ventana_dias (int): diferencia de fechas tolerada.
+        indice (Indice): índice ya armado (por defecto, todos los pendientes).
+
+    Retorna:
+        dict con 'propuestas' (list[Propuesta]), 'sin_coincidencia'
+        (list[Movimiento]) y 'movimientos' (débitos leídos).
+    """
+    indice = indice if indice is not None else Indice()
+    ventana = timedelta(days=ventana_dias)
+    resultado = {'propuestas': [], 'sin_coincidencia': [], 'movimientos': 0}
+    for movimiento in movimientos:
+        if movimiento.monto >= 0:
+            continue
+        resultado['movimientos'] += 1
+        propuesta = indice.buscar(movimiento, medio, ventana)
+        if propuesta:
+            resultado['propuestas'].append(propuesta)
+        else:
+            resultado['sin_coincidencia'].append(movimiento)
+    return resultado
+
+
+def aplicar(propuestas):
+    """
+    Marca como pagados los gastos y vencimientos propuestos.
+
+    Como .update() no dispara señales, invalida cortes de saldo, la agenda y
+    anota los Cambio masivos igual que las listas de la app.
+
+    Retorna:
+        tuple (gastos, vencimientos) actualizados.
+    """
+    gastos = [p.pk for p in propuestas if p.modelo == 'gasto']
+    vencimientos = [p.pk for p in propuestas if p.modelo == 'vencimiento']
+    total_gastos = total_vencimientos = 0
+    with transaction.atomic():
+        if gastos:
+            pendientes = Gasto.objects.filter(pk__in=gastos, pagado=False)
+            desde = min((p.fecha for p in propuestas if p.modelo == 'gasto'), default=None)
+            saldos.invalidar_desde(desde)
+            envivo.registrar_masivo('gasto', desde)
+            total_gastos = pendientes.update(pagado=True, actualizado=timezone.now())
+        if vencimientos:
+            total_vencimientos = Vencimiento.objects.filter(
+                pk__in=vencimientos, estado='pendiente'
+            ).update(estado='pagado')
+            versiones.invalidar('vencimientos')
+            envivo.registrar_masivo('vencimiento', None)
+    return total_gastos, total_vencimientos
@@ -0,0 +1,225 @@
+"""
+Tipos de cambio y conversión de montos entre monedas.
+
+Cada monto se guarda en su moneda (campo `moneda`). TipoCambio tiene una
+fila por día y moneda con lo que vale una unidad en MONEDA_BASE; al cargar
+se completan los días sin cotización con la anterior, así que convertir es
+buscar por (moneda, fecha) exacta en el índice único.
+
+`convertido` arma la expresión que convierte cada fila dentro de la base
+(una subconsulta correlacionada por fecha solo para las filas en otra
+moneda), para usarla en Sum(...) sin traer filas a Python. Lo que no tiene
+fecha (deudas) o no tiene cotización para su fecha (después de la última
+carga) usa la cotización vigente, que se guarda en memoria por día y por
+versión del grupo GRUPO (ver finanzas.versiones) durante MEMORIA_SEGUNDOS.
+Una carga desde la app invalida la versión y se ve enseguida; una carga
+desde otro proceso (cargar_cotizaciones) con el cache en memoria local no
+llega a los workers, que la ven cuando vence la memoria.
+"""
+import csv
+import io
+import time
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Func, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from . import saldos, versiones
+from .models import MONEDA_BASE, MONEDA_CHOICES, TipoCambio
+
+GRUPO = 'cotizaciones'
+MONEDAS = tuple(moneda for moneda, _ in MONEDA_CHOICES)
+EXTRANJERAS = tuple(moneda for moneda in MONEDAS if moneda != MONEDA_BASE)
+COLUMNAS = ['fecha', 'moneda', 'valor']
+SIMBOLOS = {'ARS': '$', 'USD': 'US$'}
+LOTE = 1000
+MEMORIA_SEGUNDOS = 60
+
+_DECIMAL = DecimalField(max_digits=21, decimal_places=6)
+_vigentes = {}
+
+
+class _Dividendo(Func):
+    """
+    Dividendo de una conversión. SQLite guarda (y castea a NUMERIC) como
+    INTEGER los decimales sin parte fraccionaria, y la división sería
+    entera; ahí se pasa a REAL. En las otras bases no cambia nada.
+    """
+
+    template = '%(expressions)s'
+    output_field = _DECIMAL
+
+    def as_sqlite(self, compiler, connection, **extra):
+        return self.as_sql(compiler, connection, template='CAST(%(expressions)s AS REAL)', **extra)
+
+
+def moneda_param(valor):
+    """Moneda de ?moneda= (MONEDA_BASE si falta o no existe)."""
+    valor = (valor or '').upper()
+    return valor if valor in MONEDAS else MONEDA_BASE
+
+
+def vigentes(hoy=None):
+    """
+    {moneda: valor} de la última cotización hasta `hoy` de cada moneda.
+
+    Se cachea en memoria por día y versión, hasta MEMORIA_SEGUNDOS; las
+    monedas sin ninguna cotización cargada no aparecen.
+    """
+    hoy = hoy or date.today()
+    clave = (hoy, versiones.version(GRUPO))
+    ahora = time.monotonic()
+    valores, vence = _vigentes.get(clave, (None, ahora))
+    if valores is None or vence <= ahora:
+        valores = {}
+        for moneda in EXTRANJERAS:
+            valor = (
+                TipoCambio.objects.filter(moneda=moneda, fecha__lte=hoy)
+                .order_by('-fecha')
+                .values_list('valor', flat=True)
+                .first()
+            )
+            if valor is not None:
+                valores[moneda] = valor
+        _vigentes.clear()
+        _vigentes[clave] = (valores, ahora + MEMORIA_SEGUNDOS)
+    return valores
+
+
+def cotizacion(moneda, fecha=None):
+    """
+    Valor de una unidad de `moneda` en MONEDA_BASE en `fecha` (o vigente).
+
+    Sin ninguna cotización cargada devuelve 1: los montos se suman sin
+    convertir.
+    """
+    if moneda == MONEDA_BASE:
+        return Decimal('1')
+    valor = None
+    if fecha is not None and fecha < date.today():
+        valor = (
+            TipoCambio.objects.filter(moneda=moneda, fecha=fecha)
+            .values_list('valor', flat=True)
+            .first()
+        )
+    if valor is None:
+        valor = vigentes().get(moneda, Decimal('1'))
+    return valor
+
+
+def convertir(monto, origen, destino, fecha=None):
+    """Convierte un monto suelto (en Python) con la cotización de `fecha`."""
+    if origen == destino or monto is None:
+        return monto
+    return monto * cotizacion(origen, fecha) / cotizacion(destino, fecha)
+
+
+def _valor(moneda, campo_fecha, actuales):
+    vigente = Value(actuales.get(moneda, Decimal('1')), output_field=_DECIMAL)
+    if campo_fecha is None:
+        return vigente
+    del_dia = TipoCambio.objects.filter(
+        moneda=moneda, fecha=OuterRef(campo_fecha)
+    ).values('valor')[:1]
+    return Coalesce(Subquery(del_dia, output_field=_DECIMAL), vigente)
+
+
+def convertido(destino=MONEDA_BASE, campo='monto', campo_fecha='fecha'):
+    """
+    Expresión con `campo` de cada fila convertido a `destino`.
+
+    Params:
+        destino (str): moneda del resultado.
+        campo (str): campo con el monto; la moneda sale del campo `moneda`.
+        campo_fecha (str): fecha de la cotización de cada fila (None: la
+            vigente, como para los saldos de deuda).
+    """
+    actuales = vigentes()
+    a_base = Case(
+        *(
+            When(moneda=moneda, then=F(campo) * _valor(moneda, campo_fecha, actuales))
+            for moneda in EXTRANJERAS
+        ),
+        default=F(campo),
+        output_field=_DECIMAL,
+    )
+    if destino == MONEDA_BASE:
+        return a_base
+    return Case(
+        When(moneda=destino, then=F(campo)),
+        default=_Dividendo(a_base) / _valor(destino, campo_fecha, actuales),
+        output_field=_DECIMAL,
+    )
+
+
+def _completar(cotizaciones):
+    """Agrega los días sin dato entre dos cotizaciones con el valor anterior."""
+    completas = {}
+    por_moneda = {}
+    for (moneda, fecha), valor in sorted(cotizaciones.items()):
+        anterior = por_moneda.get(moneda)
+        if anterior is not None:
+            dia = anterior[0] + timedelta(days=1)
+            while dia < fecha:
+                completas[(moneda, dia)] = anterior[1]
+                dia += timedelta(days=1)
+        completas[(moneda, fecha)] = valor
+        por_moneda[moneda] = (fecha, valor)
+    return completas
+
+
+def cargar_csv(archivo, moneda=None):
+    """
+    Carga cotizaciones desde un CSV binario (fecha,moneda,valor; o
+    fecha,valor con `moneda`), pisando las existentes.
+
+    Retorna:
+        dict con 'filas' (leídas), 'guardadas' (incluye días completados),
+        'errores' y 'desde' (fecha mínima).
+
+    Lanza:
+        ValueError si el encabezado no coincide.
+    """
+    texto = io.TextIOWrapper(archivo, encoding='utf-8', newline='')
+    try:
+        reader = csv.DictReader(texto)
+        esperadas = COLUMNAS if moneda is None else ['fecha', 'valor']
+        if reader.fieldnames != esperadas:
+            raise ValueError(f'Columnas inválidas: {reader.fieldnames} (se esperaba {esperadas})')
+        cotizaciones = {}
+        resultado = {'filas': 0, 'guardadas': 0, 'errores': 0, 'desde': None}
+        for fila in reader:
+            resultado['filas'] += 1
+            try:
+                codigo = (moneda or fila['moneda']).strip().upper()
+                fecha = date.fromisoformat(fila['fecha'].strip())
+                valor = Decimal(fila['valor'].strip())
+                if codigo not in EXTRANJERAS or valor <= 0:
+                    raise ValueError
+            except (ValueError, InvalidOperation):
+                resultado['errores'] += 1
+                continue
+            cotizaciones[(codigo, fecha)] = valor
+    finally:
+        texto.detach()
+
+    completas = _completar(cotizaciones)
+    objetos = [TipoCambio(moneda=m, fecha=f, valor=v) for (m, f), v in completas.items()]
+    with transaction.atomic():
+        for inicio in range(0, len(objetos), LOTE):
+            TipoCambio.objects.bulk_create(
+                objetos[inicio:inicio + LOTE],
+                update_conflicts=True,
+                unique_fields=['moneda', 'fecha'],
+                update_fields=['valor'],
+            )
+        if objetos:
+            resultado['desde'] = min(o.fecha for o in objetos)
+            # Los cortes de saldo convierten cada movimiento con la
+            # cotización de su fecha (o la vigente si es posterior).
+            saldos.invalidar_desde(resultado['desde'] - timedelta(days=1))
+            versiones.invalidar(GRUPO)
+    resultado['guardadas'] = len(objetos)
+    return resultado
@@ -0,0 +1,165 @@
+"""
+Detección y fusión de movimientos duplicados.
+
+Cada Ingreso/Gasto guarda una huella normalizada (fecha, monto y
+tipo/categoría, ver models.huella_movimiento) con índice propio. Para saber
+si un movimiento nuevo repite otro alcanza una búsqueda por índice en esa
+columna; un lote de importación resuelve todas sus huellas con una sola
+consulta. Nunca se recorre la tabla completa para chequear un movimiento.
+
+La pantalla de revisión lista los grupos con la misma huella para elegir
+cuál conservar o marcarlos como no duplicados (HuellaRevisada).
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+
+from .models import Gasto, HuellaRevisada, Ingreso
+
+MODELOS = {'gasto': Gasto, 'ingreso': Ingreso}
+LOTE = 2000
+GRUPOS_POR_PAGINA = 50
+
+
+def existentes(modelo, huellas, excluir=()):
+    """
+    {huella: [pk, ...]} de las filas con alguna de esas huellas.
+
+    Params:
+        modelo: Gasto o Ingreso.
+        huellas (iterable[str]): huellas a buscar.
+        excluir (iterable[int]): pks que no cuentan (el propio movimiento).
+    """
+    encontrados = defaultdict(list)
+    huellas = set(huellas) - {''}
+    if not huellas:
+        return encontrados
+    filas = modelo.objects.filter(huella__in=huellas).exclude(pk__in=list(excluir))
+    for huella, pk in filas.values_list('huella', 'pk'):
+        encontrados[huella].append(pk)
+    return encontrados
+
+
+def iguales(obj):
+    """pks de los otros movimientos con la misma huella que `obj`."""
+    return existentes(type(obj), [obj.huella], excluir=[obj.pk]).get(obj.huella, [])
+
+
+def marcar(objetos):
+    """
+    Calcula la huella de objetos que se van a guardar con bulk_create o
+    bulk_update y cuenta los que repiten una fila existente u otro del lote.
+
+    Retorna:
+        int: cantidad de posibles duplicados.
+    """
+    if not objetos:
+        return 0
+    for obj in objetos:
+        obj.huella = obj.calcular_huella()
+    previos = existentes(
+        type(objetos[0]), [o.huella for o in objetos], excluir=[o.pk for o in objetos if o.pk]
+    )
+    vistos = set(previos)
+    repetidos = 0
+    for obj in objetos:
+        if obj.huella in vistos:
+            repetidos += 1
+        vistos.add(obj.huella)
+    return repetidos
+
+
+def rellenar(modelo):
+    """
+    Completa las huellas vacías (filas escritas por SQL, como el COPY de
+    importar_csv). Retorna cuántas calculó.
+    """
+    campo = modelo.CAMPO_HUELLA
+    total = 0
+    while True:
+        pendientes = modelo.objects.filter(huella='').only('fecha', 'monto', campo)
+        lote = list(pendientes.order_by('pk')[:LOTE])
+        if not lote:
+            return total
+        for obj in lote:
+            obj.huella = obj.calcular_huella()
+        modelo.objects.bulk_update(lote, ['huella'])
+        total += len(lote)
+
+
+def grupos(nombre, pagina=1):
+    """
+    Grupos de posibles duplicados sin revisar, los más recientes primero.
+
+    Params:
+        nombre (str): 'gasto' o 'ingreso'.
+        pagina (int): página de GRUPOS_POR_PAGINA grupos.
+
+    Retorna:
+        tuple (list[dict] con 'huella' y 'filas', bool hay más páginas).
+    """
+    modelo = MODELOS[nombre]
+    revisada = HuellaRevisada.objects.filter(modelo=nombre, huella=OuterRef('huella'))
+    repetidas = (
+        modelo.objects.exclude(huella='')
+        .values('huella')
+        .annotate(n=Count('id'), revisadas=Subquery(revisada.values('cantidad')[:1]))
+        .filter(n__gt=1)
+        .filter(Q(revisadas__isnull=True) | Q(n__gt=F('revisadas')))
+        .order_by('-huella')
+    )
+    inicio = (pagina - 1) * GRUPOS_POR_PAGINA
+    huellas = [fila['huella'] for fila in repetidas[inicio:inicio + GRUPOS_POR_PAGINA + 1]]
+    hay_mas = len(huellas) > GRUPOS_POR_PAGINA
+    huellas = huellas[:GRUPOS_POR_PAGINA]
+    por_huella = defaultdict(list)
+    for obj in modelo.objects.filter(huella__in=huellas).order_by('pk'):
+        por_huella[obj.huella].append(obj)
+    return [{'huella': h, 'filas': por_huella[h]} for h in huellas], hay_mas
+
+
+def fusionar(nombre, huella, conservar):
+    """
+    Conserva el movimiento `conservar` y borra los demás de su grupo.
+
+    Si alguno de los borrados estaba pagado/confirmado, o tenía la deuda o
+    la ocurrencia de recurrencia que le falta al conservado, se le pasan.
+    Los borrados pasan por las señales (saldos, dashboard en vivo).
+
+    Retorna:
+        int: movimientos borrados.
+
+    Lanza:
+        Model.DoesNotExist si `conservar` no es del grupo.
+    """
+    modelo = MODELOS[nombre]
+    with transaction.atomic():
+        grupo = modelo.objects.select_for_update().filter(huella=huella)
+        obj = grupo.get(pk=conservar)
+        otros = list(grupo.exclude(pk=conservar))
+        if not otros:
+            return 0
+        if nombre == 'gasto':
+            obj.pagado = obj.pagado or any(o.pagado for o in otros)
+            for campo in ('deuda_relacionada', 'recurrencia'):
+                if getattr(obj, f'{campo}_id') is None:
+                    origen = next((o for o in otros if getattr(o, f'{campo}_id')), None)
+                    if origen is not None:
+                        setattr(obj, f'{campo}_id', getattr(origen, f'{campo}_id'))
+                        if campo == 'recurrencia':
+                            obj.fecha_recurrencia = origen.fecha_recurrencia
+        else:
+            obj.confirmado = obj.confirmado or any(o.confirmado for o in otros)
+        # Primero se borran: la ocurrencia de recurrencia es única.
+        modelo.objects.filter(pk__in=[o.pk for o in otros]).delete()
+        obj.save()
+    return len(otros)
+
+
+def descartar(nombre, huella):
+    """Marca el grupo como revisado (no son duplicados)."""
+    cantidad = MODELOS[nombre].objects.filter(huella=huella).count()
+    HuellaRevisada.objects.update_or_create(
+        modelo=nombre, huella=huella, defaults={'cantidad': cantidad}
+    )
@@ -0,0 +1,238 @@
+"""
+Dashboard en vivo por Server-Sent Events.
+
+Cada escritura sobre Ingreso/Gasto deja una fila en Cambio (ver
+finanzas.signals; también las de entidades, deudas y vencimientos, que usa
+finanzas.sincronizacion). El endpoint SSE guarda el id del último cambio enviado
+como cursor y, cuando hay cambios nuevos, manda un delta del mes que
+muestra el cliente: los valores de los días afectados, el sobrante desde
+el primer día afectado y los KPIs.
+
+La base es la fuente de verdad. El difusor en proceso solo despierta a los
+clientes conectados al mismo proceso apenas se confirma una escritura; los
+demás (otros workers, o escrituras hechas por WSGI) las ven en el próximo
+sondeo, cada INTERVALO_SONDEO segundos. No hace falta un broker externo.
+"""
+import asyncio
+import json
+import threading
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import tablero
+from .models import MONEDA_BASE, Cambio
+
+INTERVALO_SONDEO = 2
+LATIDO = 15
+DURACION_MAXIMA = 300
+REINTENTO_MS = 3000
+MAX_CAMBIOS_POR_LOTE = 500
+CACHE_TIMEOUT = 60
+RETENCION_DIAS = 30
+MOVIMIENTOS = ('ingreso', 'gasto')
+
+SERIES = (
+    'ingresos_confirmados_por_dia',
+    'ingresos_pendientes_por_dia',
+    'gastos_pagados_por_dia',
+    'gastos_pendientes_por_dia',
+)
+KPIS = (
+    'deuda_total',
+    'cuota_fija_total',
+    'ingresos_mes',
+    'gastos_mes',
+    'saldo_inicial',
+    'saldo_mes',
+    'relacion_cuotas_ingresos',
+)
+
+
+class Difusor:
+    """Despierta a los suscriptores de este proceso (uno por conexión SSE)."""
+
+    def __init__(self):
+        self._suscriptores = set()
+        self._lock = threading.Lock()
+
+    def suscribir(self):
+        evento = asyncio.Event()
+        with self._lock:
+            self._suscriptores.add((asyncio.get_running_loop(), evento))
+        return evento
+
+    def desuscribir(self, evento):
+        with self._lock:
+            self._suscriptores = {s for s in self._suscriptores if s[1] is not evento}
+
+    def publicar(self):
+        """Puede llamarse desde cualquier hilo."""
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        for loop, evento in suscriptores:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(evento.set)
+
+
+difusor = Difusor()
+
+
+def registrar(modelo, accion, objeto_id=None, fecha=None, fecha_anterior=None):
+    """
+    Anota un cambio y avisa a los clientes cuando se confirma la transacción.
+
+    Params:
+        modelo (str): 'ingreso', 'gasto', 'entidad', 'deuda' o 'vencimiento'.
+        accion (str): 'alta', 'cambio', 'baja' o 'masivo'.
+        fecha (date): fecha del movimiento (para 'masivo', la mínima afectada).
+    """
+    if fecha_anterior == fecha:
+        fecha_anterior = None
+    Cambio.objects.create(
+        modelo=modelo,
+        accion=accion,
+        objeto_id=objeto_id,
+        fecha=fecha,
+        fecha_anterior=fecha_anterior,
+    )
+    transaction.on_commit(difusor.publicar)
+
+
+def registrar_masivo(modelo, fecha):
+    """
+    Anota una escritura masiva (bulk/update) que afectó desde `fecha`.
+
+    Para ingresos/gastos, sin fecha no hubo filas afectadas y no se anota
+    nada; para entidades, deudas y vencimientos la fecha no aplica y el
+    cambio cubre toda la tabla.
+    """
+    if fecha is not None or modelo not in MOVIMIENTOS:
+        registrar(modelo, 'masivo', fecha=fecha)
+
+
+def cursor_actual():
+    return Cambio.objects.aggregate(ultimo=Max('id'))['ultimo'] or 0
+
+
+def cambios_desde(cursor):
+    return list(Cambio.objects.filter(id__gt=cursor).order_by('id')[:MAX_CAMBIOS_POR_LOTE])
+
+
+def _afectados(mes, cambios):
+    """
+    Días del mes con valores cambiados y primer día desde el que cambia el
+    sobrante acumulado (None si los cambios no tocan este mes).
+    """
+    fin = tablero.fin_de_mes(mes)
+    dias = set()
+    primero = None
+    for cambio in cambios:
+        # Entidades, deudas y vencimientos solo mueven los KPIs.
+        if cambio.modelo not in MOVIMIENTOS:
+            continue
+        for fecha in (cambio.fecha, cambio.fecha_anterior):
+            if fecha is None or fecha > fin:
+                continue
+            desde = 1 if fecha < mes else fecha.day
+            primero = desde if primero is None else min(primero, desde)
+            if cambio.accion == 'masivo':
+                dias.update(range(desde, fin.day + 1))
+            elif fecha >= mes:
+                dias.add(fecha.day)
+    return sorted(dias), primero
+
+
+def delta(mes, cambios, cursor, moneda=MONEDA_BASE, base=None):
+    """
+    Delta serializable para un cliente que muestra `mes` en `moneda` (en
+    pesos del mes `base`, si hay).
+
+    Se cachea por mes, moneda, base y rango de cambios: todos los clientes
+    del mismo mes que reciben el mismo lote comparten el cálculo.
+    """
+    clave = f'finanzas:envivo:{mes:%Y-%m}:{moneda}:{base or ""}:{cambios[0].id}:{cursor}'
+    datos = cache.get(clave)
+    if datos is not None:
+        return datos
+    dias, primero = _afectados(mes, cambios)
+    ctx = tablero.series_y_kpis(mes, moneda=moneda, base=base)
+    datos = {
+        'cursor': cursor,
+        'mes': f'{mes:%Y-%m}',
+        'dias': {
+            dia: {serie: ctx[serie][dia - 1] for serie in SERIES}
+            for dia in dias
+        },
+        'sobrante_desde': primero,
+        'sobrante': ctx['sobrante_por_dia'][primero - 1:] if primero else [],
+        'kpis': {kpi: float(ctx[kpi]) for kpi in KPIS},
+    }
+    cache.set(clave, datos, CACHE_TIMEOUT)
+    return datos
+
+
+def _lote(mes, cursor, moneda, base):
+    """Cambios posteriores a `cursor` y su delta (sin delta si no hay)."""
+    cambios = cambios_desde(cursor)
+    if not cambios:
+        return cursor, None
+    cursor = cambios[-1].id
+    return cursor, delta(mes, cambios, cursor, moneda, base)
+
+
+def evento_sse(datos):
+    return f"id: {datos['cursor']}\nevent: delta\ndata: {json.dumps(datos)}\n\n"
+
+
+def respuesta_unica(mes, cursor, moneda=MONEDA_BASE, base=None):
+    """Un solo lote para servidores WSGI: el navegador reconecta con Last-Event-ID."""
+    cursor, datos = _lote(mes, cursor, moneda, base)
+    texto = f'retry: {REINTENTO_MS}\n\n'
+    if datos:
+        texto += evento_sse(datos)
+    return texto
+
+
+async def flujo(mes, cursor, moneda=MONEDA_BASE, base=None):
+    """
+    Generador SSE para ASGI: envía un delta por cada lote de cambios.
+
+    Se corta a los DURACION_MAXIMA segundos para no retener la conexión
+    indefinidamente; el navegador reconecta solo y sigue desde su cursor.
+    """
+    lote = tablero.con_conexion_propia(_lote)
+    evento = difusor.suscribir()
+    loop = asyncio.get_running_loop()
+    inicio = ultimo_envio = loop.time()
+    try:
+        yield f'retry: {REINTENTO_MS}\n\n'
+        while loop.time() - inicio < DURACION_MAXIMA:
+            evento.clear()
+            cursor, datos = await lote(mes, cursor, moneda, base)
+            if datos:
+                ultimo_envio = loop.time()
+                yield evento_sse(datos)
+            try:
+                await asyncio.wait_for(evento.wait(), INTERVALO_SONDEO)
+            except asyncio.TimeoutError:
+                if loop.time() - ultimo_envio >= LATIDO:
+                    ultimo_envio = loop.time()
+                    yield ': latido\n\n'
+    finally:
+        difusor.desuscribir(evento)
+
+
+def mes_param(valor):
+    """Primer día del mes de ?month=YYYY-MM (mes actual si falta o es inválido)."""
+    hoy = date.today()
+    return tablero.mes_seleccionado(valor, hoy)[0]
+
+
+def purgar(dias=RETENCION_DIAS):
+    """Borra los cambios más viejos que `dias` días; devuelve cuántos borró."""
+    limite = timezone.now() - timedelta(days=dias)
+    return Cambio.objects.filter(creado__lt=limite).delete()[0]
@@ -0,0 +1,203 @@
+"""
+Estrategias para cancelar las deudas: avalancha (mayor tasa primero), bola
+de nieve (menor saldo primero), por prioridad y un orden optimizado.
+
+El presupuesto mensual es la suma de las cuotas de las deudas abiertas más
+el sobrante del mes del dashboard (ingresos - gastos). Cada presupuesto es
+un escenario; con ?barrido se evalúan varios múltiplos del sobrante. Los
+escenarios se reparten en un ProcessPoolExecutor (la simulación es CPU
+pura, el GIL no deja paralelizarla con hilos; ver finanzas.amortizacion).
+
+Los resultados se cachean por versión de los datos: la clave es un hash de
+las entradas ya leídas (deudas convertidas, presupuestos y fecha), así que
+cualquier cambio que altere la simulación usa otra clave y los que no la
+alteran (un gasto de otro mes) siguen aprovechando el cache. Leer las
+entradas son dos consultas chicas; simular es lo caro. Los barridos
+grandes se calculan en un hilo de fondo: el primer request responde
+"calculando" y los siguientes encuentran el resultado en el cache.
+"""
+import calendar
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import amortizacion, cotizaciones, tablero
+from .models import MONEDA_BASE, Deuda
+
+ESTADOS_ABIERTA = ('al_dia', 'en_curso', 'en_mora')
+FACTORES_BARRIDO = (0.25, 0.5, 0.75, 1, 1.25, 1.5, 2, 2.5, 3, 4)
+# Hasta esta cantidad de escenarios no vale la pena levantar procesos.
+ESCENARIOS_EN_PROCESO = 2
+CACHE_TIMEOUT = 3600
+
+_en_curso = set()
+_lock = threading.Lock()
+
+
+def procesos():
+    return getattr(settings, 'FINANZAS_PROCESOS_ESTRATEGIAS', 0) or os.cpu_count() or 1
+
+
+def deudas_abiertas():
+    """
+    Deudas con saldo, como DeudaPlan en MONEDA_BASE.
+
+    Retorna:
+        tuple (list[DeudaPlan], {id: nombre}).
+    """
+    planes, nombres = [], {}
+    qs = Deuda.objects.filter(
+        estado__in=ESTADOS_ABIERTA, monto_total__gt=0
+    ).select_related('entidad')
+    for deuda in qs.order_by('pk'):
+        cuota = deuda.cuota_mensual_aprox or deuda.pago_minimo or 0
+        planes.append(
+            amortizacion.DeudaPlan(
+                id=deuda.pk,
+                saldo=float(cotizaciones.convertir(deuda.monto_total, deuda.moneda, MONEDA_BASE)),
+                tasa_mensual=float(deuda.tasa_interes_anual) / 1200,
+                cuota=float(cotizaciones.convertir(cuota, deuda.moneda, MONEDA_BASE)),
+                prioridad=deuda.prioridad,
+            )
+        )
+        nombres[deuda.pk] = str(deuda)
+    return planes, nombres
+
+
+def sobrante_mensual(hoy=None):
+    """Ingresos menos gastos del mes actual, como en el dashboard."""
+    totales = tablero.totales_mes_actual(hoy or date.today())
+    return float(totales['ingresos_mes'] - totales['gastos_mes'])
+
+
+def presupuestos(cuotas, sobrante, presupuesto=None, barrido=False):
+    """
+    Presupuestos mensuales a evaluar.
+
+    Sin `presupuesto` se usa cuotas + sobrante (nunca menos que las
+    cuotas). El barrido reemplaza el sobrante por múltiplos de sí mismo
+    (o de las cuotas, si no hay sobrante).
+    """
+    if presupuesto is None:
+        presupuesto = cuotas + max(sobrante, 0)
+    if not barrido:
+        return [round(presupuesto, 2)]
+    extra = max(presupuesto - cuotas, 0) or cuotas
+    return sorted({round(cuotas + extra * factor, 2) for factor in FACTORES_BARRIDO})
+
+
+def calcular(deudas, montos, max_workers=None):
+    """
+    Evalúa cada presupuesto de `montos` (en paralelo si son varios).
+
+    Retorna:
+        list[dict]: un resultado de amortizacion.evaluar_escenario por monto.
+    """
+    evaluar = partial(amortizacion.evaluar_escenario, deudas)
+    if len(montos) <= ESCENARIOS_EN_PROCESO:
+        return [evaluar(monto) for monto in montos]
+    # spawn en todas las plataformas: hacer fork de un proceso con hilos (el
+    # servidor, el cálculo de fondo) puede heredar locks tomados.
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers or procesos(), len(montos)),
+        mp_context=multiprocessing.get_context('spawn'),
+    ) as pool:
+        return list(pool.map(evaluar, montos))
+
+
+def _clave(deudas, nombres, montos, hoy):
+    datos = json.dumps([deudas, nombres, montos, hoy], default=str)
+    return f'finanzas:estrategias:{hashlib.sha1(datos.encode()).hexdigest()}'
+
+
+def _sumar_meses(fecha, meses):
+    total = fecha.month - 1 + meses
+    anio, mes = fecha.year + total // 12, total % 12 + 1
+    return date(anio, mes, min(fecha.day, calendar.monthrange(anio, mes)[1]))
+
+
+def _presentar(escenarios, nombres, hoy):
+    """Agrega nombres de deuda y fechas de cancelación a los resultados."""
+    for escenario in escenarios:
+        for estrategia in escenario['estrategias']:
+            meses = estrategia['meses']
+            estrategia['fecha_fin'] = _sumar_meses(hoy, meses).isoformat() if meses else None
+            estrategia['orden'] = [
+                {
+                    'id': pk,
+                    'deuda': nombres[pk],
+                    'cancelada_en': (
+                        _sumar_meses(hoy, estrategia['cancelacion'][pk]).isoformat()
+                        if pk in estrategia['cancelacion'] else None
+                    ),
+                }
+                for pk in estrategia['orden']
+            ]
+            del estrategia['cancelacion']
+        escenario['mejor'] = min(
+            escenario['estrategias'],
+            key=lambda e: (e['meses'] is None, e['interes_total'], e['meses'] or 0),
+        )['nombre']
+    return escenarios
+
+
+def _calcular_y_guardar(clave, deudas, nombres, montos, hoy, datos):
+    try:
+        datos['escenarios'] = _presentar(calcular(deudas, montos), nombres, hoy)
+        cache.set(clave, datos, CACHE_TIMEOUT)
+    finally:
+        with _lock:
+            _en_curso.discard(clave)
+
+
+def resultado(presupuesto=None, barrido=False, hoy=None, en_fondo=None):
+    """
+    Estrategias de pago para los datos actuales.
+
+    Params:
+        presupuesto (float): presupuesto mensual (por defecto cuotas +
+            sobrante del mes).
+        barrido (bool): evaluar varios presupuestos alrededor del base.
+        en_fondo (bool): calcular en un hilo y devolver None mientras
+            tanto (por defecto, solo si hay más escenarios que
+            ESCENARIOS_EN_PROCESO).
+
+    Retorna:
+        dict con 'cuotas', 'sobrante' y 'escenarios', o None si el cálculo
+        sigue en curso en el fondo.
+    """
+    hoy = hoy or date.today()
+    deudas, nombres = deudas_abiertas()
+    cuotas = round(sum(d.cuota for d in deudas), 2)
+    sobrante = round(sobrante_mensual(hoy), 2)
+    montos = presupuestos(cuotas, sobrante, presupuesto, barrido)
+    clave = _clave(deudas, nombres, montos, hoy)
+    datos = cache.get(clave)
+    if datos is not None:
+        return datos
+    datos = {'cuotas': cuotas, 'sobrante': sobrante, 'moneda': MONEDA_BASE}
+    if en_fondo is None:
+        en_fondo = len(montos) > ESCENARIOS_EN_PROCESO
+    if not en_fondo:
+        datos['escenarios'] = _presentar(calcular(deudas, montos), nombres, hoy)
+        cache.set(clave, datos, CACHE_TIMEOUT)
+        return datos
+    with _lock:
+        if clave in _en_curso:
+            return None
+        _en_curso.add(clave)
+    # El hilo no toca la base: recibe las deudas ya leídas.
+    threading.Thread(
+        target=_calcular_y_guardar,
+        args=(clave, deudas, nombres, montos, hoy, datos),
+        daemon=True,
+    ).start()
+    return None
@@ -1,8 +1,10 @@
 from datetime import date, timedelta
 
 from django import forms
+from django.urls import reverse_lazy
 
-from .models import Ingreso, Gasto
+from . import referencias
+from .models import MONEDA_BASE, MONEDA_CHOICES, Deuda, Ingreso, Gasto
 
 PAST_LIMIT_YEARS = 50
 FUTURE_LIMIT_YEARS = 5
@@ -16,6 +18,36 @@ class DateInput(forms.DateInput):
         super().__init__(*args, **kwargs)
 
 
+class DeudaAutocompletarWidget(forms.Select):
+    """
+    Select que solo renderiza la opción elegida; las demás las trae el JS
+    del formulario desde el endpoint de búsqueda (data-autocompletar).
+    """
+
+    def __init__(self, attrs=None):
+        attrs = {'data-autocompletar': reverse_lazy('finanzas:buscar_deudas'), **(attrs or {})}
+        super().__init__(attrs)
+
+    def optgroups(self, name, value, attrs=None):
+        opciones = [self.create_option(name, '', '---------', not any(value), 0)]
+        for indice, pk in enumerate(v for v in value if v):
+            etiqueta = referencias.etiqueta_deuda(pk)
+            if etiqueta is not None:
+                opciones.append(self.create_option(name, pk, etiqueta, True, indice + 1))
+        return [(None, opciones, 0)]
+
+
+class DeudaField(forms.ModelChoiceField):
+    """FK a una deuda pagable; valida con una consulta por pk, sin listar todas."""
+
+    widget = DeudaAutocompletarWidget
+
+    def __init__(self, queryset=None, **kwargs):
+        queryset = Deuda.objects.all() if queryset is None else queryset
+        queryset = queryset.filter(tipo_deuda__in=referencias.TIPOS_PAGABLES)
+        super().__init__(queryset=queryset, **kwargs)
+
+
 def _validate_fecha(value):
     today = date.today()
     min_date = today - timedelta(days=365 * PAST_LIMIT_YEARS)
@@ -29,34 +61,24 @@ def _validate_monto(value):
         raise forms.ValidationError('El monto debe ser mayor a 0.')
 
 
-class IngresoForm(forms.ModelForm):
+class MonedaForm(forms.ModelForm):
+    """Base de los formularios con `moneda`: si no viene, MONEDA_BASE."""
+
+    moneda = forms.ChoiceField(choices=MONEDA_CHOICES, required=False, initial=MONEDA_BASE)
+
+    def clean_moneda(self):
+        return self.cleaned_data.get('moneda') or MONEDA_BASE
+
+
+class IngresoForm(MonedaForm):
     class Meta:
         model = Ingreso
-        fields = ['fecha', 'tipo', 'descripcion', 'monto', 'confirmado']
+        fields = ['fecha', 'tipo', 'descripcion', 'monto', 'moneda', 'confirmado']
         widgets = {
             'fecha': DateInput(),
             'monto': forms.NumberInput(attrs={'step': '0.01'}),
         }
 
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.fields['deuda_relacionada'].queryset = (
-            self.fields['deuda_relacionada']
-            .queryset
-            .filter(tipo_deuda__in=['tarjeta', 'prestamo', 'otro'])
-            .order_by('entidad__nombre', 'tipo_deuda')
-        )
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        if 'deuda_relacionada' in self.fields:
-            self.fields['deuda_relacionada'].queryset = (
-                self.fields['deuda_relacionada']
-                .queryset
-                .filter(tipo_deuda__in=['tarjeta', 'prestamo', 'otro'])
-                .order_by('entidad__nombre', 'tipo_deuda')
-            )
-
     def clean_fecha(self):
         value = self.cleaned_data['fecha']
         _validate_fecha(value)
@@ -68,7 +90,7 @@ class IngresoForm(forms.ModelForm):
         return value
 
 
-class GastoForm(forms.ModelForm):
+class GastoForm(MonedaForm):
     class Meta:
         model = Gasto
         fields = [
@@ -78,6 +100,7 @@ class GastoForm(forms.ModelForm):
             'categoria',
             'descripcion',
             'monto',
+            'moneda',
             'pagado',
             'deuda_relacionada',
         ]
@@ -85,21 +108,14 @@ class GastoForm(forms.ModelForm):
             'fecha': DateInput(),
             'monto': forms.NumberInput(attrs={'step': '0.01'}),
         }
+        field_classes = {
+            'deuda_relacionada': DeudaField,
+        }
         help_texts = {
             'deuda_relacionada': 'Si es un pago de deuda, vincula el movimiento.',
             'medio_pago': 'Efectivo/debito descuenta ahora; tarjeta descuenta al pagarla.',
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        if 'deuda_relacionada' in self.fields:
-            self.fields['deuda_relacionada'].queryset = (
-                self.fields['deuda_relacionada']
-                .queryset
-                .filter(tipo_deuda__in=['tarjeta', 'prestamo', 'otro'])
-                .order_by('entidad__nombre', 'tipo_deuda')
-            )
-
     def clean_fecha(self):
         value = self.cleaned_data['fecha']
         _validate_fecha(value)
@@ -0,0 +1,430 @@
+"""
+Motor de importación CSV por streaming.
+
+Recibe archivos binarios abiertos (subidas, miembros de un ZIP o archivos
+en disco) y los procesa en lotes de tamaño fijo: cada lote resuelve sus
+claves naturales con una consulta, crea con bulk_create y actualiza con
+bulk_update. La memoria depende del tamaño del lote, no del archivo, y no
+se escribe nada en imports/, así que dos importaciones simultáneas no se
+pisan.
+
+Como bulk_create/bulk_update no disparan señales, al terminar se invalidan
+los cortes de saldo y la agenda afectados y se anota un Cambio masivo.
+"""
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from zipfile import BadZipFile, ZipFile
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import duplicados, envivo, saldos, versiones
+from .models import ConHuella, Deuda, Entidad, Gasto, Ingreso, Vencimiento
+
+LOTE = 500
+MAX_ERRORES = 20
+
+COLUMNAS = {
+    'entidades.csv': ['nombre', 'tipo'],
+    'deudas.csv': [
+        'entidad',
+        'tipo_deuda',
+        'descripcion',
+        'monto_total',
+        'pago_minimo',
+        'fecha_vencimiento',
+        'proximo_pago',
+        'estado',
+        'prioridad',
+        'cuota_mensual_aprox',
+        'cuotas_restantes',
+        'notas',
+    ],
+    'ingresos.csv': ['fecha', 'tipo', 'descripcion', 'monto', 'confirmado'],
+    'gastos.csv': [
+        'fecha',
+        'tipo',
+        'categoria',
+        'descripcion',
+        'monto',
+        'pagado',
+        'deuda_relacionada',
+    ],
+    'vencimientos.csv': ['fecha', 'concepto', 'monto', 'deuda', 'estado', 'notas'],
+}
+
+# Orden de carga: cada archivo referencia por nombre a los anteriores.
+ORDEN = tuple(COLUMNAS)
+
+# Archivos cuyas escrituras se anotan en Cambio (dashboard en vivo).
+MODELOS_CAMBIO = {
+    'entidades.csv': 'entidad',
+    'deudas.csv': 'deuda',
+    'ingresos.csv': 'ingreso',
+    'gastos.csv': 'gasto',
+    'vencimientos.csv': 'vencimiento',
+}
+# Grupo de versiones (finanzas.versiones) que invalida cada archivo.
+GRUPOS_CACHE = {
+    'entidades.csv': 'referencias',
+    'deudas.csv': 'referencias',
+    'vencimientos.csv': 'vencimientos',
+}
+
+
+def parse_fecha(valor):
+    if not valor:
+        return None
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+
+def parse_decimal(valor):
+    if valor in (None, ''):
+        return None
+    try:
+        return Decimal(valor)
+    except InvalidOperation:
+        raise ValueError(f'No se pudo parsear decimal: {valor}')
+
+
+def parse_bool(valor):
+    if isinstance(valor, bool):
+        return valor
+    return str(valor).strip().lower() in ('true', '1', 'sí', 'si')
+
+
+def leer_filas(nombre, archivo):
+    """
+    Itera las filas de un CSV binario validando el encabezado.
+
+    Params:
+        nombre (str): nombre del CSV (define las columnas esperadas).
+        archivo: archivo binario abierto, leído de a una línea.
+
+    Lanza:
+        ValueError si el encabezado no coincide con COLUMNAS[nombre].
+    """
+    texto = io.TextIOWrapper(archivo, encoding='utf-8', newline='')
+    try:
+        reader = csv.DictReader(texto)
+        if reader.fieldnames != COLUMNAS[nombre]:
+            raise ValueError(f'Columnas inválidas en {nombre}: {reader.fieldnames}')
+        yield from reader
+    finally:
+        # No cerrar el archivo del llamador al descartar el wrapper.
+        texto.detach()
+
+
+def _lotes(filas, tamano):
+    filas = iter(filas)
+    while lote := list(islice(filas, tamano)):
+        yield lote
+
+
+def _primeros(modelo, campo, valores):
+    """{valor: pk} del primer objeto (por pk) con campo=valor."""
+    encontrados = {}
+    qs = modelo.objects.filter(**{f'{campo}__in': set(valores)}).order_by('pk')
+    for pk, valor in qs.values_list('pk', campo):
+        encontrados.setdefault(valor, pk)
+    return encontrados
+
+
+def _deudas_por_descripcion(descripciones):
+    return _primeros(Deuda, 'descripcion', [d for d in descripciones if d])
+
+
+class _Lote:
+    """Acumula altas y cambios de un lote por clave natural (gana la última fila)."""
+
+    def __init__(self, modelo, existentes, campos):
+        self.modelo = modelo
+        self.existentes = existentes
+        self.campos = campos
+        self.nuevos = {}
+        self.cambiados = {}
+
+    def guardar(self, clave, valores):
+        obj = self.nuevos.get(clave) or self.existentes.get(clave)
+        if obj is None:
+            self.nuevos[clave] = self.modelo(**valores)
+            return
+        for campo, valor in valores.items():
+            setattr(obj, campo, valor)
+        if obj.pk is not None:
+            self.cambiados[clave] = obj
+
+    def aplicar(self, resultado):
+        campos = self.campos
+        if issubclass(self.modelo, ConHuella):
+            resultado['duplicados'] += duplicados.marcar(
+                [*self.nuevos.values(), *self.cambiados.values()]
+            )
+            campos = [*campos, 'huella']
+        if self.nuevos:
+            self.modelo.objects.bulk_create(self.nuevos.values())
+        if self.cambiados:
+            # bulk_update no aplica auto_now: la versión de fila se pone acá.
+            if any(f.name == 'actualizado' for f in self.modelo._meta.concrete_fields):
+                ahora = timezone.now()
+                for obj in self.cambiados.values():
+                    obj.actualizado = ahora
+                campos = [*campos, 'actualizado']
+            self.modelo.objects.bulk_update(self.cambiados.values(), campos)
+        resultado['creados'] += len(self.nuevos)
+        resultado['actualizados'] += len(self.cambiados)
+
+
+def _lote_entidades(filas, resultado):
+    claves = [fila['nombre'].strip() for fila in filas]
+    existentes = {e.nombre: e for e in Entidad.objects.filter(nombre__in=claves).order_by('-pk')}
+    lote = _Lote(Entidad, existentes, ['tipo'])
+    for clave, fila in zip(claves, filas):
+        lote.guardar(clave, {'nombre': clave, 'tipo': fila['tipo'].strip()})
+    lote.aplicar(resultado)
+
+
+def _lote_deudas(filas, resultado):
+    entidades = _primeros(Entidad, 'nombre', [fila['entidad'].strip() for fila in filas])
+    claves = [fila['descripcion'].strip() for fila in filas]
+    existentes = {
+        d.descripcion: d for d in Deuda.objects.filter(descripcion__in=claves).order_by('-pk')
+    }
+    campos = [
+        'entidad', 'tipo_deuda', 'monto_total', 'pago_minimo', 'fecha_vencimiento',
+        'proximo_pago', 'estado', 'prioridad', 'cuota_mensual_aprox', 'cuotas_restantes', 'notas',
+    ]
+    lote = _Lote(Deuda, existentes, campos)
+    for clave, fila in zip(claves, filas):
+        entidad_id = entidades.get(fila['entidad'].strip())
+        if entidad_id is None:
+            _error(resultado, f"deuda {clave}: no existe la entidad {fila['entidad']!r}")
+            continue
+        try:
+            valores = {
+                'descripcion': clave,
+                'entidad_id': entidad_id,
+                'tipo_deuda': fila['tipo_deuda'].strip(),
+                'monto_total': parse_decimal(fila['monto_total']) or 0,
+                'pago_minimo': parse_decimal(fila['pago_minimo']) or 0,
+                'fecha_vencimiento': parse_fecha(fila['fecha_vencimiento']),
+                'proximo_pago': parse_fecha(fila['proximo_pago']),
+                'estado': fila['estado'].strip(),
+                'prioridad': fila['prioridad'].strip(),
+                'cuota_mensual_aprox': parse_decimal(fila['cuota_mensual_aprox']),
+                'cuotas_restantes': (
+                    int(fila['cuotas_restantes']) if fila['cuotas_restantes'] else None
+                ),
+                'notas': fila['notas'],
+            }
+        except ValueError as exc:
+            _error(resultado, f'deuda {clave}: {exc}')
+            continue
+        lote.guardar(clave, valores)
+    lote.aplicar(resultado)
+
+
+def _existentes_por_fecha(modelo, campo, claves):
+    """{(fecha, valor): obj} para las claves (fecha, valor) del lote."""
+    fechas = {fecha for fecha, _ in claves}
+    valores = {valor for _, valor in claves}
+    qs = modelo.objects.filter(fecha__in=fechas, **{f'{campo}__in': valores}).order_by('-pk')
+    return {(obj.fecha, getattr(obj, campo)): obj for obj in qs}
+
+
+def _filas_con_fecha(filas, resultado, etiqueta, campo):
+    """Parsea la fecha de cada fila y descarta las inválidas."""
+    validas = []
+    for fila in filas:
+        try:
+            fecha = parse_fecha(fila['fecha'])
+            if fecha is None:
+                raise ValueError('falta la fecha')
+        except ValueError as exc:
+            _error(resultado, f'{etiqueta} {fila[campo]}: {exc}')
+            continue
+        validas.append(((fecha, fila[campo]), fila))
+    return validas
+
+
+def _lote_ingresos(filas, resultado):
+    validas = _filas_con_fecha(filas, resultado, 'ingreso', 'descripcion')
+    existentes = _existentes_por_fecha(Ingreso, 'descripcion', [c for c, _ in validas])
+    lote = _Lote(Ingreso, existentes, ['tipo', 'monto', 'confirmado'])
+    for (fecha, descripcion), fila in validas:
+        try:
+            valores = {
+                'fecha': fecha,
+                'descripcion': descripcion,
+                'tipo': fila['tipo'].strip(),
+                'monto': parse_decimal(fila['monto']) or 0,
+                'confirmado': parse_bool(fila['confirmado']),
+            }
+        except ValueError as exc:
+            _error(resultado, f'ingreso {descripcion}: {exc}')
+            continue
+        lote.guardar((fecha, descripcion), valores)
+        _fecha_minima(resultado, fecha)
+    lote.aplicar(resultado)
+
+
+def _lote_gastos(filas, resultado):
+    validas = _filas_con_fecha(filas, resultado, 'gasto', 'descripcion')
+    existentes = _existentes_por_fecha(Gasto, 'descripcion', [c for c, _ in validas])
+    deudas = _deudas_por_descripcion(fila['deuda_relacionada'].strip() for _, fila in validas)
+    campos = ['tipo', 'categoria', 'monto', 'pagado', 'deuda_relacionada']
+    lote = _Lote(Gasto, existentes, campos)
+    for (fecha, descripcion), fila in validas:
+        try:
+            valores = {
+                'fecha': fecha,
+                'descripcion': descripcion,
+                'tipo': fila['tipo'].strip(),
+                'categoria': fila['categoria'].strip(),
+                'monto': parse_decimal(fila['monto']) or 0,
+                'pagado': parse_bool(fila['pagado']),
+                'deuda_relacionada_id': deudas.get(fila['deuda_relacionada'].strip()),
+            }
+        except ValueError as exc:
+            _error(resultado, f'gasto {descripcion}: {exc}')
+            continue
+        lote.guardar((fecha, descripcion), valores)
+        _fecha_minima(resultado, fecha)
+    lote.aplicar(resultado)
+
+
+def _lote_vencimientos(filas, resultado):
+    validas = _filas_con_fecha(filas, resultado, 'vencimiento', 'concepto')
+    existentes = _existentes_por_fecha(Vencimiento, 'concepto', [c for c, _ in validas])
+    deudas = _deudas_por_descripcion(fila['deuda'].strip() for _, fila in validas)
+    lote = _Lote(Vencimiento, existentes, ['monto', 'deuda', 'estado', 'notas'])
+    for (fecha, concepto), fila in validas:
+        try:
+            valores = {
+                'fecha': fecha,
+                'concepto': concepto,
+                'monto': parse_decimal(fila['monto']) or 0,
+                'deuda_id': deudas.get(fila['deuda'].strip()),
+                'estado': fila['estado'].strip(),
+                'notas': fila['notas'],
+            }
+        except ValueError as exc:
+            _error(resultado, f'vencimiento {concepto}: {exc}')
+            continue
+        lote.guardar((fecha, concepto), valores)
+    lote.aplicar(resultado)
+
+
+PROCESADORES = {
+    'entidades.csv': _lote_entidades,
+    'deudas.csv': _lote_deudas,
+    'ingresos.csv': _lote_ingresos,
+    'gastos.csv': _lote_gastos,
+    'vencimientos.csv': _lote_vencimientos,
+}
+
+
+def _error(resultado, mensaje):
+    resultado['errores'] += 1
+    if len(resultado['mensajes']) < MAX_ERRORES:
+        resultado['mensajes'].append(mensaje)
+
+
+def _fecha_minima(resultado, fecha):
+    if fecha and (resultado['fecha_minima'] is None or fecha < resultado['fecha_minima']):
+        resultado['fecha_minima'] = fecha
+
+
+def importar_archivo(nombre, archivo, lote=LOTE):
+    """
+    Importa un CSV desde un archivo binario abierto, por lotes.
+
+    Cada lote se aplica en su propia transacción; un archivo con el
+    encabezado equivocado no importa nada.
+
+    Params:
+        nombre (str): uno de COLUMNAS (entidades.csv, deudas.csv, ...).
+        archivo: archivo binario abierto (subida, miembro de ZIP, disco).
+        lote (int): filas por lote.
+
+    Retorna:
+        dict con 'filas', 'creados', 'actualizados', 'duplicados' (posibles,
+        ver finanzas.duplicados), 'errores', 'mensajes' (hasta MAX_ERRORES)
+        y 'fecha_minima'.
+    """
+    resultado = {
+        'filas': 0, 'creados': 0, 'actualizados': 0, 'duplicados': 0,
+        'errores': 0, 'mensajes': [], 'fecha_minima': None,
+    }
+    procesar = PROCESADORES[nombre]
+    try:
+        for filas in _lotes(leer_filas(nombre, archivo), lote):
+            with transaction.atomic():
+                procesar(filas, resultado)
+            resultado['filas'] += len(filas)
+    except (ValueError, csv.Error) as exc:
+        _error(resultado, str(exc))
+
+    if resultado['creados'] or resultado['actualizados']:
+        registrar_importacion(nombre, resultado['fecha_minima'])
+    return resultado
+
+
+def registrar_importacion(nombre, fecha_minima):
+    """
+    Lo que las señales harían por fila, una vez por archivo importado:
+    cortes de saldo, versiones de cache y Cambio masivo.
+
+    Params:
+        nombre (str): CSV importado (clave de COLUMNAS).
+        fecha_minima (date): fecha más vieja tocada (ingresos/gastos).
+    """
+    if nombre in ('ingresos.csv', 'gastos.csv'):
+        saldos.invalidar_desde(fecha_minima)
+    if nombre in GRUPOS_CACHE:
+        versiones.invalidar(GRUPOS_CACHE[nombre])
+    envivo.registrar_masivo(MODELOS_CAMBIO[nombre], fecha_minima)
+
+
+def importar(archivos, lote=LOTE):
+    """
+    Importa varios CSV en orden de dependencias.
+
+    Params:
+        archivos (dict): nombre del CSV -> archivo binario abierto. Los
+            nombres que no están en COLUMNAS se ignoran.
+
+    Retorna:
+        dict nombre -> resultado de importar_archivo.
+    """
+    return {
+        nombre: importar_archivo(nombre, archivos[nombre], lote)
+        for nombre in ORDEN
+        if nombre in archivos
+    }
+
+
+def miembros_zip(archivo):
+    """
+    Abre los CSV conocidos de un ZIP (como el que genera la exportación).
+
+    Retorna:
+        tuple (ZipFile, dict nombre -> miembro abierto). Cerrar el ZipFile
+        al terminar.
+
+    Lanza:
+        ValueError si el archivo no es un ZIP válido.
+    """
+    try:
+        zipf = ZipFile(archivo)
+    except BadZipFile:
+        raise ValueError('El archivo no es un ZIP válido.')
+    miembros = {}
+    for info in zipf.infolist():
+        nombre = info.filename.rsplit('/', 1)[-1]
+        if nombre in COLUMNAS:
+            miembros[nombre] = zipf.open(info)
+    return zipf, miembros
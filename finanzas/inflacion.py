@@ -0,0 +1,233 @@
+"""
+Montos en pesos constantes con el índice de precios (IndicePrecios).
+
+Expresar un monto del mes M en pesos del mes base B es multiplicarlo por
+indice(B) / indice(M). El índice completo (un valor por mes) se guarda en
+memoria por versión del grupo GRUPO (ver finanzas.versiones) durante
+MEMORIA_SEGUNDOS, así que el factor de cada mes sale de un diccionario: los
+reportes agrupan primero (por día, mes o categoría) y multiplican cada grupo
+una vez, nunca fila por fila. Una carga desde otro proceso
+(cargar_indice_precios) con el cache en memoria local no cambia la versión
+de los workers, que la ven cuando vence la memoria.
+
+Los meses sin índice usan el más cercano cargado: los posteriores al
+último se expresan como si no hubiera habido inflación desde entonces.
+Sin índices cargados el factor es 1 (montos nominales).
+"""
+import bisect
+import csv
+import io
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+from . import cotizaciones, versiones
+from .models import Gasto, IndicePrecios, ResumenMensual
+
+GRUPO = 'inflacion'
+COLUMNAS_INDICE = ['mes', 'indice']
+COLUMNAS_VARIACION = ['mes', 'variacion']
+INDICE_INICIAL = Decimal('100')
+MESES_ANALITICA = 12
+MEMORIA_SEGUNDOS = 60
+
+_cache = {}
+
+
+def parse_mes(valor):
+    """Primer día del mes de 'YYYY-MM' (o 'YYYY-MM-DD'); None si es inválido."""
+    try:
+        anio, mes = (valor or '').strip().split('-')[:2]
+        return date(int(anio), int(mes), 1)
+    except ValueError:
+        return None
+
+
+def _mes_siguiente(mes):
+    return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+
+def base_param(valor):
+    """Mes base de ?base=YYYY-MM, o None para montos nominales."""
+    return parse_mes(valor)
+
+
+def indices():
+    """
+    (meses ordenados, {mes: indice}) de todos los índices cargados.
+
+    Se cachea en memoria por versión, hasta MEMORIA_SEGUNDOS: una carga
+    desde la app invalida el grupo y se relee la tabla (unas pocas centenas
+    de filas); una carga desde otro proceso se ve al vencer la memoria.
+    """
+    clave = versiones.version(GRUPO)
+    ahora = time.monotonic()
+    datos, vence = _cache.get(clave, (None, ahora))
+    if datos is None or vence <= ahora:
+        tabla = dict(IndicePrecios.objects.order_by('mes').values_list('mes', 'indice'))
+        datos = (list(tabla), tabla)
+        _cache.clear()
+        _cache[clave] = (datos, ahora + MEMORIA_SEGUNDOS)
+    return datos
+
+
+def _indice(meses, tabla, fecha):
+    mes = fecha.replace(day=1)
+    valor = tabla.get(mes)
+    if valor is None:
+        posicion = min(max(bisect.bisect_left(meses, mes) - 1, 0), len(meses) - 1)
+        valor = tabla[meses[posicion]]
+    return valor
+
+
+def factor(fecha, base):
+    """
+    Multiplicador que lleva montos del mes de `fecha` a pesos de `base`.
+
+    Retorna:
+        Decimal: 1 sin base o sin índices cargados.
+    """
+    if base is None:
+        return Decimal('1')
+    meses, tabla = indices()
+    if not meses:
+        return Decimal('1')
+    return _indice(meses, tabla, base) / _indice(meses, tabla, fecha)
+
+
+def por_categoria(desde, hasta, base=None):
+    """
+    Gastos por mes y categoría, en pesos (constantes de `base` si hay).
+
+    Suma las tablas calientes (convertidas a MONEDA_BASE) y los totales de
+    ResumenMensual de los meses archivados; el factor se aplica una vez por
+    mes y categoría.
+
+    Params:
+        desde, hasta (date): primer día del primer y del último mes.
+
+    Retorna:
+        dict con 'meses' (YYYY-MM), 'categorias' ({categoría: montos por
+        mes}), 'totales' (por mes) y 'base' (YYYY-MM o None).
+    """
+    meses = []
+    mes = desde
+    while mes <= hasta:
+        meses.append(mes)
+        mes = _mes_siguiente(mes)
+    grupos = {}
+    vivos = (
+        Gasto.objects.filter(fecha__gte=desde, fecha__lt=_mes_siguiente(hasta))
+        .annotate(mes=TruncMonth('fecha'))
+        .values_list('mes', 'categoria')
+        .annotate(total=Sum(cotizaciones.convertido()))
+        .order_by()
+    )
+    archivados = (
+        ResumenMensual.objects.filter(movimiento='gasto', mes__range=(desde, hasta))
+        .values_list('mes', 'categoria')
+        .annotate(total=Sum('total'))
+        .order_by()
+    )
+    for filas in (vivos, archivados):
+        for mes, categoria, total in filas:
+            clave = (mes, categoria or 'Sin categoría')
+            grupos[clave] = grupos.get(clave, 0) + total
+
+    posicion = {mes: i for i, mes in enumerate(meses)}
+    factores = {mes: factor(mes, base) for mes in meses}
+    categorias = {}
+    totales = [0.0] * len(meses)
+    for (mes, categoria), total in sorted(grupos.items(), key=lambda item: item[0][1]):
+        valor = float(total * factores[mes])
+        categorias.setdefault(categoria, [0.0] * len(meses))[posicion[mes]] = round(valor, 2)
+        totales[posicion[mes]] += valor
+    return {
+        'meses': [f'{mes:%Y-%m}' for mes in meses],
+        'categorias': categorias,
+        'totales': [round(total, 2) for total in totales],
+        'base': f'{base:%Y-%m}' if base else None,
+    }
+
+
+def cargar_csv(archivo):
+    """
+    Carga índices mensuales desde un CSV binario, pisando los existentes.
+
+    Acepta `mes,indice` (nivel del índice) o `mes,variacion` (variación
+    mensual en %); con variaciones, el nivel se encadena desde el índice
+    del mes anterior al primero cargado (o INDICE_INICIAL si no hay).
+
+    Retorna:
+        dict con 'filas', 'guardadas' y 'errores'.
+
+    Lanza:
+        ValueError si el encabezado no coincide o faltan meses en una
+        carga por variación.
+    """
+    texto = io.TextIOWrapper(archivo, encoding='utf-8', newline='')
+    try:
+        reader = csv.DictReader(texto)
+        if reader.fieldnames not in (COLUMNAS_INDICE, COLUMNAS_VARIACION):
+            raise ValueError(
+                f'Columnas inválidas: {reader.fieldnames} '
+                f'(se esperaba {COLUMNAS_INDICE} o {COLUMNAS_VARIACION})'
+            )
+        columna = reader.fieldnames[1]
+        valores = {}
+        resultado = {'filas': 0, 'guardadas': 0, 'errores': 0}
+        for fila in reader:
+            resultado['filas'] += 1
+            mes = parse_mes(fila['mes'])
+            try:
+                valor = Decimal(fila[columna].strip().replace(',', '.'))
+            except (InvalidOperation, AttributeError):
+                valor = None
+            if mes is None or valor is None or (columna == 'indice' and valor <= 0):
+                resultado['errores'] += 1
+                continue
+            valores[mes] = valor
+    finally:
+        texto.detach()
+
+    if columna == 'indice':
+        objetos = [IndicePrecios(mes=mes, indice=valor) for mes, valor in valores.items()]
+    else:
+        objetos = _encadenar(valores)
+    with transaction.atomic():
+        IndicePrecios.objects.bulk_create(
+            objetos,
+            update_conflicts=True,
+            unique_fields=['mes'],
+            update_fields=['indice', 'variacion'],
+        )
+        versiones.invalidar(GRUPO)
+    resultado['guardadas'] = len(objetos)
+    return resultado
+
+
+def _encadenar(variaciones):
+    """Niveles acumulados a partir de variaciones mensuales consecutivas."""
+    objetos = []
+    if not variaciones:
+        return objetos
+    meses = sorted(variaciones)
+    anterior = (
+        IndicePrecios.objects.filter(mes__lt=meses[0])
+        .order_by('-mes')
+        .values_list('indice', flat=True)
+        .first()
+    )
+    nivel = anterior if anterior is not None else INDICE_INICIAL
+    esperado = meses[0]
+    for mes in meses:
+        if mes != esperado:
+            raise ValueError(f'Falta la variación de {esperado:%Y-%m}.')
+        nivel = (nivel * (1 + variaciones[mes] / 100)).quantize(Decimal('0.000001'))
+        objetos.append(IndicePrecios(mes=mes, indice=nivel, variacion=variaciones[mes]))
+        esperado = _mes_siguiente(mes)
+    return objetos
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finanzas.archivo import archivar, horizonte_por_defecto
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve gastos e ingresos más viejos que el horizonte a las tablas de archivo, '
+        'dejando resúmenes mensuales para los totales históricos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses',
+            type=int,
+            default=None,
+            help=(
+                f'Horizonte en meses (por defecto {horizonte_por_defecto()}, '
+                'FINANZAS_ARCHIVO_MESES).'
+            ),
+        )
+        parser.add_argument(
+            '--lote', type=int, default=2000, help='Filas movidas por sentencia.'
+        )
+        parser.add_argument(
+            '--simular', action='store_true', help='Solo informa cuántas filas movería.'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        try:
+            resultado = archivar(options['meses'], options['lote'], options['simular'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        duracion = time.perf_counter() - inicio
+        accion = 'a archivar' if options['simular'] else 'archivados'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Corte {resultado['corte']}: {resultado['gastos']} gastos y "
+                f"{resultado['ingresos']} ingresos {accion} en {duracion:.2f}s."
+            )
+        )
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from finanzas.respaldo import (
+    RespaldoError,
+    crear_respaldo,
+    escribir_sha256,
+    nombre_por_defecto,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera un respaldo comprimido y con checksum de la base (API de backup online '
+        'en SQLite, COPY en PostgreSQL).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--salida',
+            default=None,
+            help='Ruta del archivo .tar.gz (por defecto backups/respaldo-<motor>-<fecha>.tar.gz).',
+        )
+
+    def handle(self, *args, **options):
+        destino = options['salida'] or nombre_por_defecto()
+        try:
+            resultado = crear_respaldo(destino)
+        except RespaldoError as exc:
+            raise CommandError(str(exc))
+        digest = escribir_sha256(resultado['ruta'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Respaldo {resultado['motor']} en {resultado['ruta']}: "
+                f"{resultado['miembros']} archivo(s), {resultado['bytes'] / 1024:.1f} KiB, "
+                f"{resultado['segundos']:.2f}s (sha256 {digest[:12]}...)."
+            )
+        )
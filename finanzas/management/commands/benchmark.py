@@ -0,0 +1,357 @@
+import asyncio
+import copy
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.utils import load_backend
+from django.contrib.auth import get_user_model
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from finanzas import envivo, tablero
+from finanzas.models import Gasto, Ingreso
+
+
+def _resumen(tiempos):
+    tiempos = sorted(tiempos)
+    p95 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+    return f'p50 {statistics.median(tiempos) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms'
+
+
+class Command(BaseCommand):
+    help = 'Mide la latencia de caminos críticos de la app (por ejemplo, el dashboard).'
+
+    ESCENARIOS = ('tablero', 'conexiones', 'sqlite', 'sesiones', 'plantillas')
+
+    def add_arguments(self, parser):
+        parser.add_argument('escenario', choices=self.ESCENARIOS)
+        parser.add_argument('--iteraciones', type=int, default=20)
+        parser.add_argument('--mes', default=None, help='Mes del dashboard (YYYY-MM).')
+        parser.add_argument(
+            '--latencia',
+            type=float,
+            default=0,
+            help='Milisegundos agregados a cada consulta, para simular una base remota.',
+        )
+        parser.add_argument(
+            '--segundos', type=float, default=3, help='Duración de cada corrida (sqlite).'
+        )
+        parser.add_argument('--lectores', type=int, default=4, help='Hilos que leen (sqlite).')
+        parser.add_argument(
+            '--escritores', type=int, default=2, help='Hilos que escriben (sqlite).'
+        )
+
+    def handle(self, *args, **options):
+        if options['latencia']:
+            self.simular_latencia(options['latencia'] / 1000)
+        getattr(self, f"escenario_{options['escenario']}")(options)
+
+    def simular_latencia(self, segundos):
+        def demorar(execute, sql, params, many, context):
+            time.sleep(segundos)
+            return execute(sql, params, many, context)
+
+        def al_conectar(sender, connection, **kwargs):
+            if demorar not in connection.execute_wrappers:
+                connection.execute_wrappers.append(demorar)
+
+        # Se guarda la referencia: el receiver es débil por defecto.
+        self._al_conectar = al_conectar
+        connection_created.connect(al_conectar)
+        for conexion in connections.all():
+            if conexion.connection is not None:
+                al_conectar(None, conexion)
+
+    def conexion_de_prueba(self, alias, pool):
+        """DatabaseWrapper aparte con la config de 'default', con o sin pool."""
+        config = copy.deepcopy(connections['default'].settings_dict)
+        config['CONN_MAX_AGE'] = 0
+        opciones = config.setdefault('OPTIONS', {})
+        opciones.pop('pool', None)
+        if pool:
+            opciones['pool'] = {'min_size': 1, 'max_size': 2}
+        return load_backend(config['ENGINE']).DatabaseWrapper(config, alias)
+
+    def medir(self, nombre, funcion, iteraciones):
+        funcion()  # calentamiento: conexiones, cachés y cortes de saldo
+        tiempos = []
+        for _ in range(iteraciones):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append(time.perf_counter() - inicio)
+        self.stdout.write(f'{nombre:<10} {_resumen(tiempos)}')
+        return statistics.median(tiempos)
+
+    def escenario_tablero(self, options):
+        mes, iteraciones = options['mes'], options['iteraciones']
+        with CaptureQueriesContext(connection) as consultas:
+            tablero.contexto(mes)
+        self.stdout.write(
+            f'Dashboard en {connection.vendor}: {len(consultas)} consultas por request (sync).'
+        )
+        sync = self.medir('sync', lambda: tablero.contexto(mes), iteraciones)
+        asincronico = self.medir(
+            'async', lambda: asyncio.run(tablero.acontexto(mes)), iteraciones
+        )
+        self.stdout.write(self.style.SUCCESS(f'async/sync: {asincronico / sync:.2f}x'))
+
+    def escenario_conexiones(self, options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('El escenario conexiones requiere PostgreSQL.')
+        iteraciones = options['iteraciones']
+        self.stdout.write('Conexión + SELECT 1 + cierre, como en cada request con CONN_MAX_AGE=0:')
+        resultados = {}
+        for nombre, pool in (('sin pool', False), ('con pool', True)):
+            conexion = self.conexion_de_prueba(f'benchmark_{nombre.replace(" ", "_")}', pool)
+
+            def request():
+                with conexion.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                conexion.close()
+
+            try:
+                resultados[nombre] = self.medir(nombre, request, iteraciones)
+            finally:
+                if pool:
+                    conexion.close_pool()
+        mejora = resultados['con pool'] / resultados['sin pool']
+        self.stdout.write(self.style.SUCCESS(f'con pool/sin pool: {mejora:.2f}x'))
+
+    def escenario_sqlite(self, options):
+        """
+        Lecturas y escrituras concurrentes sobre un archivo SQLite temporal,
+        con la configuración por defecto de Django y con el perfil
+        DB_SQLITE_TUNED. Cada escritura lee y después inserta dentro de la
+        misma transacción, como asegurar_corte.
+        """
+        perfiles = (
+            ('por defecto', {}),
+            (
+                'optimizado',
+                {
+                    'init_command': settings.SQLITE_INIT_COMMAND,
+                    'timeout': settings.DB_SQLITE_BUSY_TIMEOUT,
+                    'transaction_mode': 'IMMEDIATE',
+                },
+            ),
+        )
+        self.stdout.write(
+            f"{options['lectores']} lectores, {options['escritores']} escritores, "
+            f"{options['segundos']:g} s por perfil:"
+        )
+        resultados = {}
+        with tempfile.TemporaryDirectory() as directorio:
+            for nombre, opciones in perfiles:
+                ruta = Path(directorio) / f"{nombre.replace(' ', '_')}.sqlite3"
+                resultados[nombre] = self.concurrencia_sqlite(ruta, opciones, options)
+                lecturas, escrituras, errores = resultados[nombre]
+                self.stdout.write(
+                    f'{nombre:<12} {lecturas:>8.0f} lecturas/s {escrituras:>7.0f} escrituras/s '
+                    f'{errores:>4} errores "database is locked"'
+                )
+        base, optimizado = resultados['por defecto'], resultados['optimizado']
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'optimizado/por defecto: lecturas {optimizado[0] / max(base[0], 1):.2f}x, '
+                f'escrituras {optimizado[1] / max(base[1], 1):.2f}x'
+            )
+        )
+
+    def concurrencia_sqlite(self, ruta, opciones, options):
+        """Devuelve (lecturas/s, escrituras/s, errores) de una corrida."""
+        config = copy.deepcopy(connections['default'].settings_dict)
+        config.update(
+            ENGINE='django.db.backends.sqlite3', NAME=str(ruta), CONN_MAX_AGE=0, OPTIONS=opciones
+        )
+        backend = load_backend(config['ENGINE'])
+        inicio_datos = date(2024, 1, 1)
+
+        def conexion(alias):
+            return backend.DatabaseWrapper(copy.deepcopy(config), alias)
+
+        preparacion = conexion('benchmark_sqlite')
+        with preparacion.cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE movimiento '
+                '(id INTEGER PRIMARY KEY, fecha DATE NOT NULL, monto DECIMAL NOT NULL)'
+            )
+            cursor.execute('CREATE INDEX movimiento_fecha ON movimiento (fecha)')
+            cursor.executemany(
+                'INSERT INTO movimiento (fecha, monto) VALUES (%s, %s)',
+                [(inicio_datos + timedelta(days=i % 730), i % 500) for i in range(20000)],
+            )
+        preparacion.close()
+
+        contadores = {'lecturas': 0, 'escrituras': 0, 'errores': 0}
+        lock = threading.Lock()
+        fin = time.perf_counter() + options['segundos']
+
+        def leer(cursor, azar):
+            desde = inicio_datos + timedelta(days=azar.randrange(700))
+            cursor.execute(
+                'SELECT fecha, SUM(monto) FROM movimiento '
+                'WHERE fecha BETWEEN %s AND %s GROUP BY fecha',
+                [desde, desde + timedelta(days=30)],
+            )
+            cursor.fetchall()
+
+        def trabajar(numero, escribe):
+            alias = f'benchmark_sqlite_{numero}'
+            db = conexion(alias)
+            # Registrada solo en este hilo, para que transaction.atomic(using=...)
+            # la encuentre sin tocar settings.DATABASES.
+            connections[alias] = db
+            azar = random.Random(numero)
+            hechas = errores = 0
+            try:
+                while time.perf_counter() < fin:
+                    try:
+                        if escribe:
+                            with transaction.atomic(using=alias), db.cursor() as cursor:
+                                leer(cursor, azar)
+                                cursor.execute(
+                                    'INSERT INTO movimiento (fecha, monto) VALUES (%s, %s)',
+                                    [inicio_datos + timedelta(days=azar.randrange(730)), 1],
+                                )
+                        else:
+                            with db.cursor() as cursor:
+                                leer(cursor, azar)
+                        hechas += 1
+                    except DatabaseError:
+                        errores += 1
+            finally:
+                db.close()
+                del connections[alias]
+            with lock:
+                contadores['escrituras' if escribe else 'lecturas'] += hechas
+                contadores['errores'] += errores
+
+        hilos = [
+            threading.Thread(target=trabajar, args=(numero, numero >= options['lectores']))
+            for numero in range(options['lectores'] + options['escritores'])
+        ]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+        return (
+            contadores['lecturas'] / duracion,
+            contadores['escrituras'] / duracion,
+            contadores['errores'],
+        )
+
+    def escenario_sesiones(self, options):
+        """
+        Consultas por request con cada SESSION_STRATEGY: un GET del dashboard
+        ya logueado y un POST que deja un mensaje + el GET de la redirección.
+        Corre dentro de una transacción que se descarta al final.
+        """
+        iteraciones = options['iteraciones']
+        estrategias = ('db', 'cached_db', 'cookies')
+        self.stdout.write(
+            f'Promedio en {iteraciones} requests (consultas totales / a django_session):'
+        )
+        resultados = {}
+        with transaction.atomic():
+            usuario = get_user_model().objects.create_user('benchmark-sesiones')
+            for estrategia in estrategias:
+                for mensajes in ('session', 'cookie'):
+                    with override_settings(
+                        SESSION_ENGINE=settings.SESSION_ENGINES[estrategia],
+                        MESSAGE_STORAGE=f'django.contrib.messages.storage.{mensajes}.'
+                        f'{mensajes.capitalize()}Storage',
+                    ):
+                        nombre = f'{estrategia} + mensajes en {mensajes}'
+                        resultados[nombre] = self.consultas_por_request(usuario, iteraciones)
+                        lectura, escritura = resultados[nombre]
+                        self.stdout.write(
+                            f'{nombre:<32} GET {lectura[0]:>5.1f} / {lectura[1]:.1f}   '
+                            f'POST+GET {escritura[0]:>5.1f} / {escritura[1]:.1f}'
+                        )
+            transaction.set_rollback(True)
+        base = resultados['db + mensajes en session']
+        configurado = resultados[f'{settings.SESSION_STRATEGY} + mensajes en cookie']
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Configuración actual ({settings.SESSION_STRATEGY} + mensajes en cookie): '
+                f'{base[0][1] - configurado[0][1]:.1f} consultas de sesión menos por GET, '
+                f'{base[1][1] - configurado[1][1]:.1f} menos por POST+GET.'
+            )
+        )
+
+    def consultas_por_request(self, usuario, iteraciones):
+        """((total, sesión) por GET, (total, sesión) por POST+GET), en promedio."""
+        cliente = Client(HTTP_HOST='localhost')
+        cliente.force_login(usuario)
+        dashboard = reverse('finanzas:dashboard')
+        lista = reverse('finanzas:lista_ingresos')
+        marcados = list(Ingreso.objects.filter(confirmado=True).values_list('pk', flat=True))
+
+        def contar(hacer):
+            total = sesion = 0
+            hacer()  # calentamiento: carga la sesión en el cache
+            for _ in range(iteraciones):
+                with CaptureQueriesContext(connection) as consultas:
+                    hacer()
+                total += len(consultas)
+                sesion += sum('django_session' in c['sql'] for c in consultas)
+            return total / iteraciones, sesion / iteraciones
+
+        lectura = contar(lambda: cliente.get(dashboard))
+        escritura = contar(lambda: cliente.post(lista, {'confirmado': marcados}, follow=True))
+        return lectura, escritura
+
+    def escenario_plantillas(self, options):
+        """
+        Tiempo de respuesta del dashboard y de las listas completas con el
+        cache de fragmentos vacío, caliente y después de editar una sola
+        fila. Corre dentro de una transacción que se descarta al final.
+        """
+        iteraciones = options['iteraciones']
+        fragmentos = caches['template_fragments']
+        paginas = (
+            ('dashboard', reverse('finanzas:dashboard')),
+            ('gastos', reverse('finanzas:lista_gastos') + '?ver_todos=1'),
+            ('ingresos', reverse('finanzas:lista_ingresos') + '?ver_todos=1'),
+        )
+        with transaction.atomic():
+            cliente = Client(HTTP_HOST='localhost')
+            cliente.force_login(get_user_model().objects.create_user('benchmark-plantillas'))
+            for nombre, url in paginas:
+                modelo = Ingreso if nombre == 'ingresos' else Gasto
+                fila = modelo.objects.order_by('-fecha', '-id').first()
+                self.stdout.write(f'{nombre} ({modelo.objects.count()} filas):')
+
+                def editar_una_fila():
+                    if fila is not None:
+                        modelo.objects.filter(pk=fila.pk).update(actualizado=timezone.now())
+                        envivo.registrar(modelo._meta.model_name, 'cambio', fila.pk, fila.fecha)
+
+                frio = self.medir(
+                    '  sin cache', lambda: (fragmentos.clear(), cliente.get(url)), iteraciones
+                )
+                caliente = self.medir('  caliente', lambda: cliente.get(url), iteraciones)
+                cambio = self.medir(
+                    '  una fila', lambda: (editar_una_fila(), cliente.get(url)), iteraciones
+                )
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f'  caliente/sin cache: {caliente / frio:.2f}x, '
+                        f'una fila/sin cache: {cambio / frio:.2f}x'
+                    )
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finanzas import cotizaciones
+
+
+class Command(BaseCommand):
+    help = (
+        'Carga tipos de cambio desde un CSV (fecha,moneda,valor; o fecha,valor con --moneda). '
+        'El valor es cuanto vale una unidad de la moneda en la moneda base.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='CSV con las cotizaciones.')
+        parser.add_argument(
+            '--moneda',
+            choices=cotizaciones.EXTRANJERAS,
+            help='Moneda de todas las filas (el CSV no trae la columna moneda).',
+        )
+
+    def handle(self, *args, **options):
+        ruta = Path(options['archivo'])
+        if not ruta.exists():
+            raise CommandError(f'No existe {ruta}.')
+        try:
+            with ruta.open('rb') as archivo:
+                resultado = cotizaciones.cargar_csv(archivo, options['moneda'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(
+            f"{resultado['filas']} filas, {resultado['guardadas']} cotizaciones guardadas "
+            f"(con los dias completados), {resultado['errores']} con errores."
+        )
+        if resultado['desde']:
+            self.stdout.write(f"Saldos recalculados desde {resultado['desde']:%Y-%m-%d}.")
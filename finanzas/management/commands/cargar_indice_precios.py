@@ -0,0 +1,29 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finanzas import inflacion
+
+
+class Command(BaseCommand):
+    help = (
+        'Carga el indice de precios mensual desde un CSV: mes,indice (nivel del indice) '
+        'o mes,variacion (variacion mensual en %, se encadena al cargar).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='CSV con un mes (YYYY-MM) por fila.')
+
+    def handle(self, *args, **options):
+        ruta = Path(options['archivo'])
+        if not ruta.exists():
+            raise CommandError(f'No existe {ruta}.')
+        try:
+            with ruta.open('rb') as archivo:
+                resultado = inflacion.cargar_csv(archivo)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(
+            f"{resultado['filas']} filas, {resultado['guardadas']} meses guardados, "
+            f"{resultado['errores']} con errores."
+        )
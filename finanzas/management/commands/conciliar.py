@@ -0,0 +1,81 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finanzas import conciliacion
+from finanzas.models import MONEDA_BASE, MONEDA_CHOICES, Gasto
+
+
+class Command(BaseCommand):
+    help = (
+        'Concilia un extracto bancario o de tarjeta (CSV u OFX) contra los gastos '
+        'no pagados y los vencimientos pendientes. Sin --aplicar solo muestra las propuestas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Extracto .csv, .ofx o .qfx.')
+        parser.add_argument(
+            '--medio',
+            choices=[valor for valor, _ in Gasto.MEDIO_PAGO_CHOICES],
+            default='debito',
+            help='Medio de pago de los gastos que cubre el extracto (tarjeta para un resumen).',
+        )
+        parser.add_argument(
+            '--moneda',
+            choices=[valor for valor, _ in MONEDA_CHOICES],
+            default=MONEDA_BASE,
+            help='Moneda del extracto; solo se buscan pendientes en esa moneda.',
+        )
+        parser.add_argument(
+            '--ventana',
+            type=int,
+            default=conciliacion.VENTANA_DIAS,
+            help='Días de diferencia tolerados entre el extracto y el pendiente.',
+        )
+        parser.add_argument(
+            '--aplicar',
+            action='store_true',
+            help='Marca como pagados los gastos y vencimientos encontrados.',
+        )
+        parser.add_argument('--mostrar', type=int, default=20, help='Propuestas a listar.')
+
+    def handle(self, *args, **options):
+        ruta = Path(options['archivo'])
+        if not ruta.exists():
+            raise CommandError(f'No existe {ruta}.')
+        inicio = time.perf_counter()
+        indice = conciliacion.Indice(moneda=options['moneda'])
+        try:
+            with ruta.open('rb') as archivo:
+                resultado = conciliacion.conciliar(
+                    conciliacion.leer_extracto(ruta.name, archivo),
+                    medio=options['medio'],
+                    ventana_dias=options['ventana'],
+                    indice=indice,
+                )
+        except conciliacion.ExtractoInvalido as exc:
+            raise CommandError(str(exc))
+        duracion = time.perf_counter() - inicio
+
+        propuestas = resultado['propuestas']
+        for propuesta in propuestas[:options['mostrar']]:
+            movimiento = propuesta.movimiento
+            self.stdout.write(
+                f'línea {movimiento.linea}: {movimiento.fecha} {movimiento.monto} '
+                f'{movimiento.descripcion[:40]!r} -> {propuesta.modelo} #{propuesta.pk} '
+                f'({propuesta.fecha}, {propuesta.dias} días)'
+            )
+        if len(propuestas) > options['mostrar']:
+            self.stdout.write(f'... y {len(propuestas) - options["mostrar"]} más.')
+        self.stdout.write(
+            f"{resultado['movimientos']} débitos, {len(propuestas)} coincidencias, "
+            f"{len(resultado['sin_coincidencia'])} sin coincidencia "
+            f'({duracion:.2f} s).'
+        )
+
+        if options['aplicar']:
+            gastos, vencimientos = conciliacion.aplicar(propuestas)
+            self.stdout.write(self.style.SUCCESS(
+                f'{gastos} gastos y {vencimientos} vencimientos marcados como pagados.'
+            ))
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from finanzas import estrategias
+
+NOMBRES = {
+    'avalancha': 'Avalancha (mayor tasa)',
+    'bola_de_nieve': 'Bola de nieve (menor saldo)',
+    'prioridad': 'Por prioridad',
+    'optimizada': 'Orden optimizado',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara estrategias para cancelar las deudas abiertas: meses, fecha de fin e '
+        'interes total de cada una.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--presupuesto',
+            type=float,
+            help='Monto mensual para deudas (por defecto, cuotas + sobrante del mes).',
+        )
+        parser.add_argument(
+            '--barrido',
+            action='store_true',
+            help='Evalua varios presupuestos alrededor del base, en paralelo.',
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        datos = estrategias.resultado(options['presupuesto'], options['barrido'], en_fondo=False)
+        self.stdout.write(
+            f"Cuotas: {datos['cuotas']:.2f}  Sobrante del mes: {datos['sobrante']:.2f}"
+        )
+        for escenario in datos['escenarios']:
+            self.stdout.write(f"\nPresupuesto mensual {escenario['presupuesto']:.2f}:")
+            for estrategia in escenario['estrategias']:
+                marca = '*' if estrategia['nombre'] == escenario['mejor'] else ' '
+                fin = estrategia['fecha_fin'] or 'no se cancela'
+                self.stdout.write(
+                    f"{marca} {NOMBRES[estrategia['nombre']]:<28} {fin:>14}  "
+                    f"interes {estrategia['interes_total']:>14.2f}"
+                )
+            mejor = next(e for e in escenario['estrategias'] if e['nombre'] == escenario['mejor'])
+            self.stdout.write('  Orden: ' + ', '.join(d['deuda'] for d in mejor['orden']))
+        self.stdout.write(f'\n{time.perf_counter() - inicio:.2f} s')
@@ -1,18 +1,30 @@
 import csv
+from itertools import chain
 from pathlib import Path
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
-from finanzas.models import Entidad, Deuda, Ingreso, Gasto, Vencimiento
+from finanzas import copia_masiva
+from finanzas.importacion import COLUMNAS
+from finanzas.routers import usar_replica
+from finanzas.models import (
+    Entidad,
+    Deuda,
+    Ingreso,
+    IngresoArchivado,
+    Gasto,
+    GastoArchivado,
+    Vencimiento,
+)
 
 
 EXPORT_DIR = Path('exports')
 
 
-def escribir_csv(nombre, columnas, rows):
+def escribir_csv(nombre, columnas, rows, directorio=EXPORT_DIR):
     """Escribe un CSV en UTF-8 con las columnas y filas dadas."""
-    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
-    ruta = EXPORT_DIR / nombre
+    directorio.mkdir(parents=True, exist_ok=True)
+    ruta = directorio / nombre
     with ruta.open('w', newline='', encoding='utf-8') as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow(columnas)
@@ -24,38 +36,69 @@ def escribir_csv(nombre, columnas, rows):
 class Command(BaseCommand):
     help = 'Exporta datos de finanzas a archivos CSV en la carpeta exports/'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incluir-archivados',
+            action='store_true',
+            help='Agrega a ingresos.csv y gastos.csv los movimientos archivados.',
+        )
+        parser.add_argument(
+            '--primaria',
+            action='store_true',
+            help='Lee de la base primaria aunque haya réplica configurada.',
+        )
+        parser.add_argument(
+            '--directorio',
+            default=str(EXPORT_DIR),
+            help='Carpeta destino de los CSV (por defecto exports/).',
+        )
+        parser.add_argument(
+            '--modo',
+            choices=['auto', 'orm', 'copy'],
+            default='auto',
+            help='copy usa COPY de PostgreSQL; auto lo elige si la base es PostgreSQL.',
+        )
+
     def handle(self, *args, **options):
+        self.incluir_archivados = options['incluir_archivados']
+        self.directorio = Path(options['directorio'])
+        modo = options['modo']
+        if modo == 'copy' and not copia_masiva.disponible():
+            raise CommandError('El modo copy requiere PostgreSQL.')
+        # La exportación es solo lectura: con réplica configurada, lee de ella.
+        with usar_replica(not options['primaria']):
+            if modo == 'copy' or (modo == 'auto' and copia_masiva.disponible()):
+                self.exportar_con_copy()
+            else:
+                self.exportar_con_orm()
+
+    def exportar_con_orm(self):
         self.exportar_entidades()
         self.exportar_deudas()
         self.exportar_ingresos()
         self.exportar_gastos()
         self.exportar_vencimientos()
 
+    def exportar_con_copy(self):
+        consultas = copia_masiva.consultas_exportacion(self.incluir_archivados)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        for nombre, querysets in consultas.items():
+            self.stdout.write(f'Exportando {nombre} con COPY...')
+            ruta = copia_masiva.exportar(querysets, COLUMNAS[nombre], self.directorio / nombre)
+            self.stdout.write(f'Archivo {ruta} generado correctamente.')
+
     def exportar_entidades(self):
         self.stdout.write('Exportando entidades...')
-        columnas = ['nombre', 'tipo']
-        rows = Entidad.objects.all().values_list('nombre', 'tipo')
-        ruta = escribir_csv('entidades.csv', columnas, rows)
+        rows = Entidad.objects.order_by('nombre', 'pk').values_list('nombre', 'tipo')
+        ruta = escribir_csv('entidades.csv', COLUMNAS['entidades.csv'], rows, self.directorio)
         self.stdout.write(f'Archivo {ruta} generado correctamente.')
 
     def exportar_deudas(self):
         self.stdout.write('Exportando deudas...')
-        columnas = [
-            'entidad',
-            'tipo_deuda',
-            'descripcion',
-            'monto_total',
-            'pago_minimo',
-            'fecha_vencimiento',
-            'proximo_pago',
-            'estado',
-            'prioridad',
-            'cuota_mensual_aprox',
-            'cuotas_restantes',
-            'notas',
-        ]
         rows = []
-        for deuda in Deuda.objects.select_related('entidad'):
+        for deuda in Deuda.objects.select_related('entidad').order_by(
+            'prioridad', 'entidad__nombre', 'pk'
+        ):
             rows.append([
                 deuda.entidad.nombre if deuda.entidad else '',
                 deuda.tipo_deuda,
@@ -70,14 +113,16 @@ class Command(BaseCommand):
                 deuda.cuotas_restantes or '',
                 deuda.notas or '',
             ])
-        ruta = escribir_csv('deudas.csv', columnas, rows)
+        ruta = escribir_csv('deudas.csv', COLUMNAS['deudas.csv'], rows, self.directorio)
         self.stdout.write(f'Archivo {ruta} generado correctamente.')
 
     def exportar_ingresos(self):
         self.stdout.write('Exportando ingresos...')
-        columnas = ['fecha', 'tipo', 'descripcion', 'monto', 'confirmado']
         rows = []
-        for ing in Ingreso.objects.all():
+        ingresos = Ingreso.objects.order_by('-fecha', 'id')
+        if self.incluir_archivados:
+            ingresos = chain(ingresos, IngresoArchivado.objects.order_by('-fecha', 'id'))
+        for ing in ingresos:
             rows.append([
                 ing.fecha,
                 ing.tipo,
@@ -85,22 +130,19 @@ class Command(BaseCommand):
                 ing.monto,
                 ing.confirmado,
             ])
-        ruta = escribir_csv('ingresos.csv', columnas, rows)
+        ruta = escribir_csv('ingresos.csv', COLUMNAS['ingresos.csv'], rows, self.directorio)
         self.stdout.write(f'Archivo {ruta} generado correctamente.')
 
     def exportar_gastos(self):
         self.stdout.write('Exportando gastos...')
-        columnas = [
-            'fecha',
-            'tipo',
-            'categoria',
-            'descripcion',
-            'monto',
-            'pagado',
-            'deuda_relacionada',
-        ]
         rows = []
-        for gasto in Gasto.objects.select_related('deuda_relacionada'):
+        gastos = Gasto.objects.select_related('deuda_relacionada').order_by('-fecha', 'id')
+        if self.incluir_archivados:
+            gastos = chain(
+                gastos,
+                GastoArchivado.objects.select_related('deuda_relacionada').order_by('-fecha', 'id'),
+            )
+        for gasto in gastos:
             rows.append([
                 gasto.fecha,
                 gasto.tipo,
@@ -110,14 +152,13 @@ class Command(BaseCommand):
                 gasto.pagado,
                 gasto.deuda_relacionada.descripcion if gasto.deuda_relacionada else '',
             ])
-        ruta = escribir_csv('gastos.csv', columnas, rows)
+        ruta = escribir_csv('gastos.csv', COLUMNAS['gastos.csv'], rows, self.directorio)
         self.stdout.write(f'Archivo {ruta} generado correctamente.')
 
     def exportar_vencimientos(self):
         self.stdout.write('Exportando vencimientos...')
-        columnas = ['fecha', 'concepto', 'monto', 'deuda', 'estado', 'notas']
         rows = []
-        for venc in Vencimiento.objects.select_related('deuda'):
+        for venc in Vencimiento.objects.select_related('deuda').order_by('fecha', 'concepto', 'pk'):
             rows.append([
                 venc.fecha,
                 venc.concepto,
@@ -126,5 +167,5 @@ class Command(BaseCommand):
                 venc.estado,
                 venc.notas or '',
             ])
-        ruta = escribir_csv('vencimientos.csv', columnas, rows)
+        ruta = escribir_csv('vencimientos.csv', COLUMNAS['vencimientos.csv'], rows, self.directorio)
         self.stdout.write(f'Archivo {ruta} generado correctamente.')
@@ -1,174 +1,94 @@
 import csv
-from datetime import datetime
-from decimal import Decimal, InvalidOperation
 from pathlib import Path
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
 
-from finanzas.models import Entidad, Deuda, Ingreso, Gasto, Vencimiento
+from finanzas import copia_masiva, importacion
+from finanzas.importacion import COLUMNAS
 
 
 IMPORT_DIR = Path('imports')
 
 
-def leer_csv(nombre, columnas):
-    """Lee un CSV desde imports/ con encabezados exactos."""
-    ruta = IMPORT_DIR / nombre
-    try:
-        with ruta.open('r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            if reader.fieldnames != columnas:
-                raise ValueError(f'Columnas inválidas en {nombre}: {reader.fieldnames}')
-            for row in reader:
-                yield row
-    except FileNotFoundError:
-        yield from ()
-    except ValueError as exc:
-        print(f'Advertencia: {exc}')
-        yield from ()
-
-
-def parse_fecha(valor):
-    if not valor:
-        return None
-    return datetime.strptime(valor, '%Y-%m-%d').date()
-
-
-def parse_decimal(valor):
-    if valor in (None, ''):
-        return None
-    try:
-        return Decimal(valor)
-    except InvalidOperation:
-        raise ValueError(f'No se pudo parsear decimal: {valor}')
-
-
-def parse_bool(valor):
-    if isinstance(valor, bool):
-        return valor
-    return str(valor).strip().lower() in ('true', '1', 'sí', 'si')
+def imprimir_resultado(nombre, resultado, escribir=print):
+    """Muestra el resumen de importacion.importar_archivo para un CSV."""
+    escribir(
+        f"{nombre}: {resultado['filas']} filas, {resultado['creados']} creados, "
+        f"{resultado['actualizados']} actualizados, {resultado['errores']} con errores."
+    )
+    if resultado['duplicados']:
+        escribir(
+            f"Advertencia: {resultado['duplicados']} posibles duplicados "
+            '(revisarlos en /duplicados/).'
+        )
+    for mensaje in resultado['mensajes']:
+        escribir(f'Advertencia: {mensaje}')
 
 
 class Command(BaseCommand):
     help = 'Importa datos desde archivos CSV en la carpeta imports/'
 
-    def handle(self, *args, **options):
-        self.importar_entidades()
-        self.importar_deudas()
-        self.importar_ingresos()
-        self.importar_gastos()
-        self.importar_vencimientos()
-
-    def importar_entidades(self):
-        print('Importando entidades...')
-        columnas = ['nombre', 'tipo']
-        for row in leer_csv('entidades.csv', columnas):
-            nombre = row['nombre'].strip()
-            tipo = row['tipo'].strip()
-            obj, created = Entidad.objects.update_or_create(
-                nombre=nombre,
-                defaults={'tipo': tipo},
-            )
-            print(f"Entidad {'creada' if created else 'actualizada'}: {obj.nombre}")
-
-    def importar_deudas(self):
-        print('Importando deudas...')
-        columnas = [
-            'entidad',
-            'tipo_deuda',
-            'descripcion',
-            'monto_total',
-            'pago_minimo',
-            'fecha_vencimiento',
-            'proximo_pago',
-            'estado',
-            'prioridad',
-            'cuota_mensual_aprox',
-            'cuotas_restantes',
-            'notas',
-        ]
-        for row in leer_csv('deudas.csv', columnas):
-            try:
-                entidad_nombre = row['entidad'].strip()
-                entidad = Entidad.objects.filter(nombre=entidad_nombre).first()
-                descripcion = row['descripcion'].strip()
-                obj, created = Deuda.objects.update_or_create(
-                    descripcion=descripcion,
-                    defaults={
-                        'entidad': entidad,
-                        'tipo_deuda': row['tipo_deuda'].strip(),
-                        'monto_total': parse_decimal(row['monto_total']) or 0,
-                        'pago_minimo': parse_decimal(row['pago_minimo']) or 0,
-                        'fecha_vencimiento': parse_fecha(row['fecha_vencimiento']),
-                        'proximo_pago': parse_fecha(row['proximo_pago']),
-                        'estado': row['estado'].strip(),
-                        'prioridad': row['prioridad'].strip(),
-                        'cuota_mensual_aprox': parse_decimal(row['cuota_mensual_aprox']),
-                        'cuotas_restantes': int(row['cuotas_restantes']) if row['cuotas_restantes'] else None,
-                        'notas': row['notas'],
-                    },
-                )
-                print(f"Deuda {'creada' if created else 'actualizada'}: {obj.descripcion}")
-            except (ValueError, InvalidOperation) as exc:
-                print(f'Advertencia: no se pudo importar deuda ({row}): {exc}')
-
-    def importar_ingresos(self):
-        print('Importando ingresos...')
-        columnas = ['fecha', 'tipo', 'descripcion', 'monto', 'confirmado']
-        for row in leer_csv('ingresos.csv', columnas):
-            try:
-                obj, created = Ingreso.objects.update_or_create(
-                    descripcion=row['descripcion'],
-                    fecha=parse_fecha(row['fecha']),
-                    defaults={
-                        'tipo': row['tipo'].strip(),
-                        'monto': parse_decimal(row['monto']) or 0,
-                        'confirmado': parse_bool(row['confirmado']),
-                    },
-                )
-                print(f"Ingreso {'creado' if created else 'actualizado'}: {obj.descripcion}")
-            except (ValueError, InvalidOperation) as exc:
-                print(f'Advertencia: no se pudo importar ingreso ({row}): {exc}')
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--directorio',
+            default=str(IMPORT_DIR),
+            help='Carpeta con los CSV a importar (por defecto imports/).',
+        )
+        parser.add_argument(
+            '--modo',
+            choices=['auto', 'orm', 'copy'],
+            default='auto',
+            help='copy usa COPY de PostgreSQL; auto lo elige si la base es PostgreSQL.',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=importacion.LOTE,
+            help='Filas por lote en el camino ORM.',
+        )
 
-    def importar_gastos(self):
-        print('Importando gastos...')
-        columnas = ['fecha', 'tipo', 'categoria', 'descripcion', 'monto', 'pagado', 'deuda_relacionada']
-        for row in leer_csv('gastos.csv', columnas):
-            try:
-                deuda_desc = row['deuda_relacionada'].strip()
-                deuda = Deuda.objects.filter(descripcion=deuda_desc).first() if deuda_desc else None
-                obj, created = Gasto.objects.update_or_create(
-                    descripcion=row['descripcion'],
-                    fecha=parse_fecha(row['fecha']),
-                    defaults={
-                        'tipo': row['tipo'].strip(),
-                        'categoria': row['categoria'].strip(),
-                        'monto': parse_decimal(row['monto']) or 0,
-                        'pagado': parse_bool(row['pagado']),
-                        'deuda_relacionada': deuda,
-                    },
-                )
-                print(f"Gasto {'creado' if created else 'actualizado'}: {obj.descripcion}")
-            except (ValueError, InvalidOperation) as exc:
-                print(f'Advertencia: no se pudo importar gasto ({row}): {exc}')
-
-    def importar_vencimientos(self):
-        print('Importando vencimientos...')
-        columnas = ['fecha', 'concepto', 'monto', 'deuda', 'estado', 'notas']
-        for row in leer_csv('vencimientos.csv', columnas):
-            try:
-                deuda_desc = row['deuda'].strip()
-                deuda = Deuda.objects.filter(descripcion=deuda_desc).first() if deuda_desc else None
-                obj, created = Vencimiento.objects.update_or_create(
-                    fecha=parse_fecha(row['fecha']),
-                    concepto=row['concepto'],
-                    defaults={
-                        'monto': parse_decimal(row['monto']) or 0,
-                        'deuda': deuda,
-                        'estado': row['estado'].strip(),
-                        'notas': row['notas'],
-                    },
-                )
-                print(f"Vencimiento {'creado' if created else 'actualizado'}: {obj.concepto}")
-            except (ValueError, InvalidOperation) as exc:
-                print(f'Advertencia: no se pudo importar vencimiento ({row}): {exc}')
+    def handle(self, *args, **options):
+        self.directorio = Path(options['directorio'])
+        modo = options['modo']
+        if modo == 'copy' and not copia_masiva.disponible():
+            raise CommandError('El modo copy requiere PostgreSQL.')
+        usar_copy = modo == 'copy' or (modo == 'auto' and copia_masiva.disponible())
+        for nombre in importacion.ORDEN:
+            ruta = self.directorio / nombre
+            if not ruta.exists():
+                continue
+            if usar_copy and self.importar_con_copy(nombre, ruta):
+                continue
+            print(f'Importando {nombre}...')
+            with ruta.open('rb') as archivo:
+                resultado = importacion.importar_archivo(nombre, archivo, options['lote'])
+            imprimir_resultado(nombre, resultado)
+
+    def importar_con_copy(self, nombre, ruta):
+        """
+        Importa un CSV con COPY y upsert por conjuntos.
+
+        Retorna:
+            bool: False si hay que usar el camino ORM para este archivo
+            (archivo con valores que Postgres no pudo convertir).
+        """
+        columnas = COLUMNAS[nombre]
+        with ruta.open('r', newline='', encoding='utf-8') as csvfile:
+            encabezado = next(csv.reader(csvfile), None)
+        if encabezado != columnas:
+            print(f'Advertencia: Columnas inválidas en {nombre}: {encabezado}')
+            return True
+        print(f'Importando {nombre} con COPY...')
+        try:
+            with ruta.open('rb') as archivo:
+                filas, fecha_minima = copia_masiva.importar(nombre, columnas, archivo)
+        except DatabaseError as exc:
+            print(f'Advertencia: COPY falló para {nombre} ({exc}); se usa el ORM.')
+            return False
+        # El upsert por SQL no dispara señales: se invalidan a mano los
+        # cortes de saldo y los caches, y se anota el Cambio masivo.
+        if filas:
+            importacion.registrar_importacion(nombre, fecha_minima)
+        print(f'{nombre}: {filas} filas procesadas.')
+        return True
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+MODOS_CHECKPOINT = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+
+
+class Command(BaseCommand):
+    help = (
+        'Mantenimiento periódico de SQLite: PRAGMA optimize (estadísticas del '
+        'planificador) y checkpoint del WAL. Pensado para correr por cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--checkpoint',
+            choices=MODOS_CHECKPOINT,
+            default='TRUNCATE',
+            help='Modo de wal_checkpoint; TRUNCATE deja el archivo -wal en cero.',
+        )
+        parser.add_argument(
+            '--vacuum',
+            action='store_true',
+            help='También compacta el archivo (bloquea escrituras mientras dura).',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('optimizar_sqlite solo aplica a SQLite.')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            modo = cursor.fetchone()[0]
+            cursor.execute('PRAGMA optimize')
+            self.stdout.write('PRAGMA optimize: ok')
+            if options['vacuum']:
+                cursor.execute('VACUUM')
+                self.stdout.write('VACUUM: ok')
+            if modo.lower() != 'wal':
+                self.stdout.write(f'journal_mode={modo}: sin WAL, no hay checkpoint que hacer.')
+                return
+            cursor.execute(f"PRAGMA wal_checkpoint({options['checkpoint']})")
+            ocupado, paginas_wal, paginas_copiadas = cursor.fetchone()
+        if ocupado:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'Checkpoint incompleto: {paginas_copiadas}/{paginas_wal} páginas '
+                    '(hay lectores o escritores activos; se reintenta en la próxima corrida).'
+                )
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Checkpoint {options['checkpoint']}: "
+                    f'{paginas_copiadas}/{paginas_wal} páginas copiadas.'
+                )
+            )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from finanzas import envivo
+
+
+class Command(BaseCommand):
+    help = 'Borra el registro de cambios del dashboard en vivo más viejo que N días.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=envivo.RETENCION_DIAS)
+
+    def handle(self, *args, **options):
+        borrados = envivo.purgar(options['dias'])
+        self.stdout.write(self.style.SUCCESS(f'{borrados} cambios borrados.'))
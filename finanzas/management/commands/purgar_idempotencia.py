@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from finanzas import carga_rapida
+
+
+class Command(BaseCommand):
+    help = 'Borra las claves de idempotencia de la API de carga más viejas que N días.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=carga_rapida.RETENCION_DIAS)
+
+    def handle(self, *args, **options):
+        borradas = carga_rapida.purgar(options['dias'])
+        self.stdout.write(self.style.SUCCESS(f'{borradas} claves borradas.'))
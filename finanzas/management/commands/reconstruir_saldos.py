@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from finanzas import saldos
+
+
+class Command(BaseCommand):
+    help = 'Recalcula desde cero los cortes mensuales de saldo (CorteSaldo).'
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        cantidad = saldos.reconstruir()
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(
+            self.style.SUCCESS(f'{cantidad} cortes de saldo generados en {duracion:.2f}s.')
+        )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from finanzas.respaldo import RespaldoError, restaurar_respaldo
+
+
+class Command(BaseCommand):
+    help = 'Restaura un respaldo generado con `backup`, reemplazando todos los datos actuales.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Archivo .tar.gz generado por `backup`.')
+        parser.add_argument(
+            '--noinput',
+            '--no-input',
+            action='store_false',
+            dest='interactive',
+            help='No pedir confirmación.',
+        )
+
+    def handle(self, *args, **options):
+        if options['interactive']:
+            respuesta = input(
+                'Se reemplazarán TODOS los datos de la base actual. Escribí "si" para continuar: '
+            )
+            if respuesta.strip().lower() not in ('si', 'sí'):
+                raise CommandError('Restauración cancelada.')
+        try:
+            resultado = restaurar_respaldo(options['archivo'])
+        except (RespaldoError, OSError) as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Respaldo {resultado['motor']} restaurado: {resultado['miembros']} archivo(s), "
+                f"{resultado['bytes'] / 1024:.1f} KiB en {resultado['segundos']:.2f}s."
+            )
+        )
@@ -0,0 +1,105 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Lo que hace un worker desde que arranca hasta poder atender: cada fase se
+# mide en un proceso nuevo para no contar módulos ya importados por manage.py.
+SCRIPT = """
+import json, time
+fases = {}
+inicio = time.perf_counter()
+import django
+django.setup()
+fases['django.setup'] = time.perf_counter() - inicio
+paso = time.perf_counter()
+from config.wsgi import application
+fases['wsgi'] = time.perf_counter() - paso
+from finanzas import arranque
+fases.update(arranque.calentar(conexiones=%(conexiones)r))
+fases['total'] = time.perf_counter() - inicio
+print(json.dumps(fases))
+"""
+
+
+def _leer_importtime(salida):
+    """
+    Parsea la salida de `python -X importtime`.
+
+    Retorna:
+        list: tuplas (módulo, propio_us, acumulado_us, profundidad).
+    """
+    filas = []
+    for linea in salida.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        propio, acumulado, nombre = linea[len('import time:'):].split('|', 2)
+        profundidad = (len(nombre) - len(nombre.lstrip())) // 2
+        filas.append((nombre.strip(), int(propio), int(acumulado), profundidad))
+    return filas
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el arranque de un worker en un proceso nuevo: fases (setup, '
+        'URLs, templates, conexiones) y tiempo de import por módulo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help='Módulos a listar.')
+        parser.add_argument(
+            '--sin-conexiones',
+            action='store_true',
+            help='No abre conexiones a la base (como el master de gunicorn).',
+        )
+        parser.add_argument(
+            '--paquete',
+            default=None,
+            help='Lista solo módulos de este paquete (ej. finanzas, django).',
+        )
+
+    def handle(self, *args, **options):
+        entorno = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        proceso = subprocess.run(
+            [
+                sys.executable, '-X', 'importtime', '-c',
+                SCRIPT % {'conexiones': not options['sin_conexiones']},
+            ],
+            capture_output=True,
+            text=True,
+            env=entorno,
+            cwd=settings.BASE_DIR,
+        )
+        if proceso.returncode:
+            raise CommandError(f'El arranque falló:\n{proceso.stderr[-2000:]}')
+        fases = json.loads(proceso.stdout.strip().splitlines()[-1])
+        filas = _leer_importtime(proceso.stderr)
+
+        self.stdout.write('Fases del arranque:')
+        for fase, segundos in fases.items():
+            self.stdout.write(f'  {fase:<14} {segundos * 1000:>8.1f} ms')
+
+        por_paquete = defaultdict(int)
+        for nombre, propio, _, _ in filas:
+            por_paquete[nombre.split('.')[0]] += propio
+        total_imports = sum(por_paquete.values())
+        self.stdout.write(
+            f'\nImports: {len(filas)} módulos, {total_imports / 1000:.1f} ms (tiempo propio).'
+        )
+        self.stdout.write('Por paquete:')
+        for paquete, propio in sorted(por_paquete.items(), key=lambda p: -p[1])[: options['top']]:
+            self.stdout.write(f'  {paquete:<30} {propio / 1000:>8.1f} ms')
+
+        paquete = options['paquete']
+        if paquete:
+            filas = [f for f in filas if f[0] == paquete or f[0].startswith(paquete + '.')]
+        de_paquete = f' de {paquete}' if paquete else ''
+        self.stdout.write(f'\nMódulos más lentos{de_paquete} (acumulado incluye sus imports):')
+        for nombre, propio, acumulado, _ in sorted(filas, key=lambda f: -f[2])[: options['top']]:
+            self.stdout.write(
+                f'  {nombre:<45} {acumulado / 1000:>8.1f} ms  (propio {propio / 1000:.1f})'
+            )
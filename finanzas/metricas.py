@@ -0,0 +1,37 @@
+"""
+Métricas operativas expuestas en /metricas/ (solo staff).
+
+Cada función devuelve un dict serializable; la vista los junta en un solo
+JSON para que un monitor externo lo consulte.
+"""
+from django.db import connections
+
+
+def base_de_datos():
+    """
+    Configuración y estado de las conexiones de cada alias de base.
+
+    Con pool de psycopg incluye sus estadísticas (conexiones abiertas,
+    libres, esperas, errores). Sin pool, 'pool' es None.
+    """
+    datos = {}
+    for alias in connections:
+        conexion = connections[alias]
+        pool = getattr(conexion, 'pool', None)
+        datos[alias] = {
+            'motor': conexion.vendor,
+            'conn_max_age': conexion.settings_dict.get('CONN_MAX_AGE'),
+            'health_checks': conexion.settings_dict.get('CONN_HEALTH_CHECKS'),
+            'pool': _estadisticas_pool(pool) if pool is not None else None,
+        }
+    return datos
+
+
+def _estadisticas_pool(pool):
+    estadisticas = dict(pool.get_stats())
+    estadisticas.update(min_size=pool.min_size, max_size=pool.max_size, nombre=pool.name)
+    return estadisticas
+
+
+def todas():
+    return {'base_de_datos': base_de_datos()}
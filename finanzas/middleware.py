@@ -0,0 +1,53 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .routers import replica_configurada, usar_replica
+
+COOKIE_PRIMARIA = 'finanzas_primaria'
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaMiddleware:
+    """
+    Habilita la réplica para los requests de solo lectura.
+
+    Después de un request que escribe (POST, etc.) deja una cookie que
+    mantiene a ese navegador en la primaria durante DB_REPLICA_STICKY
+    segundos, para que vea sus propios cambios aunque la réplica esté
+    atrasada (lectura después de escritura).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.ventana = getattr(settings, 'DB_REPLICA_STICKY', 10)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _puede_leer_replica(self, request):
+        return (
+            replica_configurada()
+            and request.method in METODOS_SEGUROS
+            and COOKIE_PRIMARIA not in request.COOKIES
+        )
+
+    def _marcar_escritura(self, request, response):
+        if request.method not in METODOS_SEGUROS and replica_configurada():
+            response.set_cookie(
+                COOKIE_PRIMARIA, '1', max_age=self.ventana, httponly=True, samesite='Lax'
+            )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with usar_replica(self._puede_leer_replica(request)):
+            response = self.get_response(request)
+        return self._marcar_escritura(request, response)
+
+    async def __acall__(self, request):
+        with usar_replica(self._puede_leer_replica(request)):
+            response = await self.get_response(request)
+        return self._marcar_escritura(request, response)
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0006_gasto_medio_pago'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gasto',
+            name='fecha_recurrencia',
+            field=models.DateField(blank=True, help_text='Fecha de la ocurrencia materializada (puede diferir de fecha).', null=True),
+        ),
+        migrations.AddField(
+            model_name='vencimiento',
+            name='fecha_recurrencia',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='Recurrencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('destino', models.CharField(choices=[('gasto', 'Gasto'), ('vencimiento', 'Vencimiento')], default='gasto', max_length=20)),
+                ('frecuencia', models.CharField(choices=[('semanal', 'Semanal'), ('mensual', 'Mensual'), ('anual', 'Anual')], default='mensual', max_length=10)),
+                ('intervalo', models.PositiveSmallIntegerField(default=1, help_text='Cada cuántas semanas/meses/años se repite.')),
+                ('fecha_inicio', models.DateField(help_text='Primera ocurrencia; define el día de repetición.')),
+                ('fecha_fin', models.DateField(blank=True, help_text='Última fecha posible (opcional).', null=True)),
+                ('concepto', models.CharField(max_length=255)),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('tipo_gasto', models.CharField(choices=[('fijo', 'Fijo'), ('variable', 'Variable'), ('deuda', 'Deuda / cuota'), ('otro', 'Otro')], default='fijo', max_length=20)),
+                ('categoria', models.CharField(blank=True, max_length=50)),
+                ('medio_pago', models.CharField(choices=[('efectivo', 'Efectivo'), ('debito', 'Debito'), ('tarjeta', 'Tarjeta')], default='efectivo', max_length=20)),
+                ('activa', models.BooleanField(default=True)),
+                ('deuda', models.ForeignKey(blank=True, help_text='Deuda asociada (se copia a cada ocurrencia).', null=True, on_delete=django.db.models.deletion.SET_NULL, to='finanzas.deuda')),
+            ],
+            options={
+                'verbose_name': 'Recurrencia',
+                'verbose_name_plural': 'Recurrencias',
+                'ordering': ['concepto'],
+            },
+        ),
+        migrations.AddField(
+            model_name='gasto',
+            name='recurrencia',
+            field=models.ForeignKey(blank=True, help_text='Regla que generó este gasto al pagarlo o editarlo.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='gastos', to='finanzas.recurrencia'),
+        ),
+        migrations.AddField(
+            model_name='vencimiento',
+            name='recurrencia',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='vencimientos', to='finanzas.recurrencia'),
+        ),
+        migrations.AddConstraint(
+            model_name='gasto',
+            constraint=models.UniqueConstraint(fields=('recurrencia', 'fecha_recurrencia'), name='gasto_ocurrencia_unica'),
+        ),
+        migrations.AddConstraint(
+            model_name='vencimiento',
+            constraint=models.UniqueConstraint(fields=('recurrencia', 'fecha_recurrencia'), name='vencimiento_ocurrencia_unica'),
+        ),
+    ]
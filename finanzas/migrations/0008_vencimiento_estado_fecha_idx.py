@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0007_recurrencia'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vencimiento',
+            index=models.Index(fields=['estado', 'fecha'], name='venc_estado_fecha_idx'),
+        ),
+    ]
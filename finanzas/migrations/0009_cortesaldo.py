@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0008_vencimiento_estado_fecha_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorteSaldo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primer día del mes (excluido del acumulado).', unique=True)),
+                ('ingresos_confirmados', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('ingresos_pendientes', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('gastos_pagados', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('gastos_pendientes', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('gastos_efectivo', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('gastos_debito', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('gastos_tarjeta', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+            ],
+            options={
+                'verbose_name': 'Corte de saldo',
+                'verbose_name_plural': 'Cortes de saldo',
+                'ordering': ['mes'],
+            },
+        ),
+    ]
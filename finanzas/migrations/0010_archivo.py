@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0009_cortesaldo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngresoArchivado',
+            fields=[
+                ('id', models.BigIntegerField(help_text='Mismo id que tenía como Ingreso.', primary_key=True, serialize=False)),
+                ('fecha', models.DateField(db_index=True)),
+                ('tipo', models.CharField(choices=[('sueldo', 'Sueldo'), ('aguinaldo', 'Aguinaldo'), ('alquiler', 'Alquiler'), ('extra', 'Extraordinario')], max_length=20)),
+                ('descripcion', models.CharField(blank=True, max_length=255)),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('confirmado', models.BooleanField(default=False)),
+                ('archivado_en', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Ingreso archivado',
+                'verbose_name_plural': 'Ingresos archivados',
+                'ordering': ['-fecha', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='GastoArchivado',
+            fields=[
+                ('id', models.BigIntegerField(help_text='Mismo id que tenía como Gasto.', primary_key=True, serialize=False)),
+                ('fecha', models.DateField(db_index=True)),
+                ('tipo', models.CharField(choices=[('fijo', 'Fijo'), ('variable', 'Variable'), ('deuda', 'Deuda / cuota'), ('otro', 'Otro')], max_length=20)),
+                ('categoria', models.CharField(max_length=50)),
+                ('descripcion', models.CharField(blank=True, max_length=255)),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('pagado', models.BooleanField(default=False)),
+                ('medio_pago', models.CharField(choices=[('efectivo', 'Efectivo'), ('debito', 'Debito'), ('tarjeta', 'Tarjeta')], default='efectivo', max_length=20)),
+                ('fecha_recurrencia', models.DateField(blank=True, null=True)),
+                ('archivado_en', models.DateTimeField(auto_now_add=True)),
+                ('deuda_relacionada', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='finanzas.deuda')),
+                ('recurrencia', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='finanzas.recurrencia')),
+            ],
+            options={
+                'verbose_name': 'Gasto archivado',
+                'verbose_name_plural': 'Gastos archivados',
+                'ordering': ['-fecha', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primer día del mes.')),
+                ('movimiento', models.CharField(choices=[('ingreso', 'Ingreso'), ('gasto', 'Gasto')], max_length=10)),
+                ('tipo', models.CharField(max_length=20)),
+                ('categoria', models.CharField(blank=True, max_length=50)),
+                ('medio_pago', models.CharField(blank=True, max_length=20)),
+                ('liquidado', models.BooleanField(default=False, help_text='Cobrado (ingreso) o pagado (gasto).')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Resumen mensual',
+                'verbose_name_plural': 'Resúmenes mensuales',
+                'ordering': ['mes', 'movimiento'],
+                'constraints': [models.UniqueConstraint(fields=('mes', 'movimiento', 'tipo', 'categoria', 'medio_pago', 'liquidado'), name='resumen_mensual_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0010_archivo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cambio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(choices=[('ingreso', 'Ingreso'), ('gasto', 'Gasto')], max_length=20)),
+                ('objeto_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('accion', models.CharField(choices=[('alta', 'Alta'), ('cambio', 'Cambio'), ('baja', 'Baja'), ('masivo', 'Cambio masivo')], max_length=10)),
+                ('fecha', models.DateField(blank=True, help_text='Fecha del movimiento.', null=True)),
+                ('fecha_anterior', models.DateField(blank=True, help_text='Fecha previa si el cambio la movió.', null=True)),
+                ('creado', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Cambio',
+                'verbose_name_plural': 'Cambios',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:17
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0011_cambio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gasto',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True, db_default=django.db.models.functions.datetime.Now()),
+        ),
+        migrations.AddField(
+            model_name='ingreso',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True, db_default=django.db.models.functions.datetime.Now()),
+        ),
+    ]
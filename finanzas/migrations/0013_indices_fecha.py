@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0012_actualizado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gasto',
+            index=models.Index(fields=['fecha'], name='gasto_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ingreso',
+            index=models.Index(fields=['fecha'], name='ingreso_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vencimiento',
+            index=models.Index(fields=['fecha'], name='venc_fecha_idx'),
+        ),
+    ]
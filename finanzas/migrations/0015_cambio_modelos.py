@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0014_clave_idempotencia'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cambio',
+            name='modelo',
+            field=models.CharField(choices=[('ingreso', 'Ingreso'), ('gasto', 'Gasto'), ('entidad', 'Entidad'), ('deuda', 'Deuda'), ('vencimiento', 'Vencimiento')], max_length=20),
+        ),
+    ]
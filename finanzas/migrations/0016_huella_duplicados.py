@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:29
+
+from django.db import migrations, models
+
+from finanzas.models import huella_movimiento
+
+
+def calcular_huellas(apps, schema_editor):
+    for nombre, campo in (('Gasto', 'categoria'), ('Ingreso', 'tipo')):
+        modelo = apps.get_model('finanzas', nombre)
+        filas = modelo.objects.only('fecha', 'monto', campo).order_by('pk')
+        lote = []
+        for obj in filas.iterator(chunk_size=2000):
+            obj.huella = huella_movimiento(obj.fecha, obj.monto, getattr(obj, campo))
+            lote.append(obj)
+            if len(lote) == 2000:
+                modelo.objects.bulk_update(lote, ['huella'])
+                lote = []
+        modelo.objects.bulk_update(lote, ['huella'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0015_cambio_modelos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HuellaRevisada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(choices=[('ingreso', 'Ingreso'), ('gasto', 'Gasto')], max_length=20)),
+                ('huella', models.CharField(max_length=80)),
+                ('cantidad', models.PositiveIntegerField(help_text='Filas con esta huella al revisarla.')),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Huella revisada',
+                'verbose_name_plural': 'Huellas revisadas',
+            },
+        ),
+        migrations.AddField(
+            model_name='gasto',
+            name='huella',
+            field=models.CharField(db_default='', default='', editable=False, max_length=80),
+        ),
+        migrations.AddField(
+            model_name='ingreso',
+            name='huella',
+            field=models.CharField(db_default='', default='', editable=False, max_length=80),
+        ),
+        migrations.AddIndex(
+            model_name='gasto',
+            index=models.Index(fields=['huella'], name='gasto_huella_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ingreso',
+            index=models.Index(fields=['huella'], name='ingreso_huella_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='huellarevisada',
+            constraint=models.UniqueConstraint(fields=('modelo', 'huella'), name='huella_revisada_unica'),
+        ),
+        migrations.RunPython(calcular_huellas, migrations.RunPython.noop),
+    ]
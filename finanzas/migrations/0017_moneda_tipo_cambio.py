@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0016_huella_duplicados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deuda',
+            name='moneda',
+            field=models.CharField(choices=[('ARS', 'Pesos'), ('USD', 'Dólares')], db_default='ARS', default='ARS', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='gasto',
+            name='moneda',
+            field=models.CharField(choices=[('ARS', 'Pesos'), ('USD', 'Dólares')], db_default='ARS', default='ARS', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='gastoarchivado',
+            name='moneda',
+            field=models.CharField(choices=[('ARS', 'Pesos'), ('USD', 'Dólares')], db_default='ARS', default='ARS', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='ingreso',
+            name='moneda',
+            field=models.CharField(choices=[('ARS', 'Pesos'), ('USD', 'Dólares')], db_default='ARS', default='ARS', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='ingresoarchivado',
+            name='moneda',
+            field=models.CharField(choices=[('ARS', 'Pesos'), ('USD', 'Dólares')], db_default='ARS', default='ARS', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='recurrencia',
+            name='moneda',
+            field=models.CharField(choices=[('ARS', 'Pesos'), ('USD', 'Dólares')], db_default='ARS', default='ARS', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='vencimiento',
+            name='moneda',
+            field=models.CharField(choices=[('ARS', 'Pesos'), ('USD', 'Dólares')], db_default='ARS', default='ARS', max_length=3),
+        ),
+        migrations.CreateModel(
+            name='TipoCambio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('moneda', models.CharField(choices=[('ARS', 'Pesos'), ('USD', 'Dólares')], max_length=3)),
+                ('valor', models.DecimalField(decimal_places=4, max_digits=15)),
+            ],
+            options={
+                'verbose_name': 'Tipo de cambio',
+                'verbose_name_plural': 'Tipos de cambio',
+                'ordering': ['-fecha', 'moneda'],
+                'constraints': [models.UniqueConstraint(fields=('moneda', 'fecha'), name='tipo_cambio_moneda_fecha')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0017_moneda_tipo_cambio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndicePrecios',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primer día del mes.', unique=True)),
+                ('indice', models.DecimalField(decimal_places=6, max_digits=18)),
+                ('variacion', models.DecimalField(blank=True, decimal_places=4, help_text='Variación mensual en %.', max_digits=8, null=True)),
+            ],
+            options={
+                'verbose_name': 'Índice de precios',
+                'verbose_name_plural': 'Índices de precios',
+                'ordering': ['-mes'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0018_indice_precios'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deuda',
+            name='tasa_interes_anual',
+            field=models.DecimalField(db_default=0, decimal_places=3, default=0, help_text='Tasa nominal anual en % (para las estrategias de pago).', max_digits=7),
+        ),
+    ]
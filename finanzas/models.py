@@ -1,6 +1,58 @@
+import re
+import unicodedata
 from datetime import date
+from decimal import Decimal
 
+from django.conf import settings
 from django.db import models
+from django.db.models.functions import Now
+
+
+# Moneda en la que se guarda cada monto. Los saldos acumulados se llevan en
+# MONEDA_BASE; la conversión está en finanzas.cotizaciones.
+MONEDA_BASE = 'ARS'
+MONEDA_CHOICES = [
+    ('ARS', 'Pesos'),
+    ('USD', 'Dólares'),
+]
+
+
+def campo_moneda():
+    return models.CharField(
+        max_length=3, choices=MONEDA_CHOICES, default=MONEDA_BASE, db_default=MONEDA_BASE
+    )
+
+
+def huella_movimiento(fecha, monto, texto):
+    """
+    Huella para detectar movimientos duplicados: fecha, monto en centavos y
+    `texto` (categoría o tipo) en minúsculas, sin acentos ni signos.
+
+    La descripción queda afuera a propósito: es lo que suele cambiar entre
+    dos importaciones del mismo movimiento.
+    """
+    normal = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode()
+    normal = ' '.join(re.findall(r'[a-z0-9]+', normal.lower()))
+    centavos = int((Decimal(monto) * 100).to_integral_value())
+    return f"{str(fecha).replace('-', '')}:{centavos}:{normal}"
+
+
+class ConHuella:
+    """
+    Mantiene `huella` al guardar. bulk_create/bulk_update y .update() no
+    pasan por save(): ahí hay que asignar `calcular_huella()` a mano.
+    """
+
+    CAMPO_HUELLA = None
+
+    def calcular_huella(self):
+        return huella_movimiento(self.fecha, self.monto, getattr(self, self.CAMPO_HUELLA))
+
+    def save(self, *args, **kwargs):
+        self.huella = self.calcular_huella()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'huella'}
+        super().save(*args, **kwargs)
 
 
 class Entidad(models.Model):
@@ -51,6 +103,7 @@ class Deuda(models.Model):
 
     monto_total = models.DecimalField(max_digits=15, decimal_places=2)
     pago_minimo = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    moneda = campo_moneda()
 
     fecha_vencimiento = models.DateField(null=True, blank=True)
     proximo_pago = models.DateField(null=True, blank=True)
@@ -71,6 +124,13 @@ class Deuda(models.Model):
         max_digits=15, decimal_places=2, null=True, blank=True
     )
     cuotas_restantes = models.PositiveIntegerField(null=True, blank=True)
+    tasa_interes_anual = models.DecimalField(
+        max_digits=7,
+        decimal_places=3,
+        default=0,
+        db_default=0,
+        help_text='Tasa nominal anual en % (para las estrategias de pago).',
+    )
 
     notas = models.TextField(blank=True)
 
@@ -88,7 +148,9 @@ class Deuda(models.Model):
         return self.get_tipo_deuda_display()
 
 
-class Ingreso(models.Model):
+class Ingreso(ConHuella, models.Model):
+    CAMPO_HUELLA = 'tipo'
+
     TIPO_INGRESO_CHOICES = [
         ('sueldo', 'Sueldo'),
         ('aguinaldo', 'Aguinaldo'),
@@ -100,15 +162,25 @@ class Ingreso(models.Model):
     tipo = models.CharField(max_length=20, choices=TIPO_INGRESO_CHOICES)
     descripcion = models.CharField(max_length=255, blank=True)
     monto = models.DecimalField(max_digits=15, decimal_places=2)
+    moneda = campo_moneda()
     confirmado = models.BooleanField(
         default=False,
         help_text='Marcar cuando el ingreso ya está cobrado.',
     )
+    # Versión de la fila para el cache de fragmentos de las listas. Las
+    # escrituras con .update()/bulk_update tienen que setearlo a mano.
+    actualizado = models.DateTimeField(auto_now=True, db_default=Now())
+    # Huella de duplicados (ver ConHuella y finanzas.duplicados).
+    huella = models.CharField(max_length=80, default='', db_default='', editable=False)
 
     class Meta:
         verbose_name = 'Ingreso'
         verbose_name_plural = 'Ingresos'
         ordering = ['-fecha', '-id']
+        indexes = [
+            models.Index(fields=['fecha'], name='ingreso_fecha_idx'),
+            models.Index(fields=['huella'], name='ingreso_huella_idx'),
+        ]
 
     def __str__(self) -> str:
         return f'{self.fecha} - {self.get_tipo_display()}'
@@ -137,7 +209,9 @@ class Ingreso(models.Model):
         return 'pendiente'
 
 
-class Gasto(models.Model):
+class Gasto(ConHuella, models.Model):
+    CAMPO_HUELLA = 'categoria'
+
     TIPO_GASTO_CHOICES = [
         ('fijo', 'Fijo'),
         ('variable', 'Variable'),
@@ -159,6 +233,7 @@ class Gasto(models.Model):
     )
     descripcion = models.CharField(max_length=255, blank=True)
     monto = models.DecimalField(max_digits=15, decimal_places=2)
+    moneda = campo_moneda()
     pagado = models.BooleanField(
         default=False,
         help_text='Marcar cuando el gasto ya está pagado.',
@@ -175,10 +250,35 @@ class Gasto(models.Model):
         help_text='Si este gasto es el pago de una deuda, vinculalo acá.',
     )
 
+    recurrencia = models.ForeignKey(
+        'Recurrencia', null=True, blank=True, on_delete=models.SET_NULL,
+        related_name='gastos',
+        help_text='Regla que generó este gasto al pagarlo o editarlo.',
+    )
+    fecha_recurrencia = models.DateField(
+        null=True, blank=True,
+        help_text='Fecha de la ocurrencia materializada (puede diferir de fecha).',
+    )
+    # Versión de la fila para el cache de fragmentos de las listas. Las
+    # escrituras con .update()/bulk_update tienen que setearlo a mano.
+    actualizado = models.DateTimeField(auto_now=True, db_default=Now())
+    # Huella de duplicados (ver ConHuella y finanzas.duplicados).
+    huella = models.CharField(max_length=80, default='', db_default='', editable=False)
+
     class Meta:
         verbose_name = 'Gasto'
         verbose_name_plural = 'Gastos'
         ordering = ['-fecha', '-id']
+        indexes = [
+            models.Index(fields=['fecha'], name='gasto_fecha_idx'),
+            models.Index(fields=['huella'], name='gasto_huella_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recurrencia', 'fecha_recurrencia'],
+                name='gasto_ocurrencia_unica',
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'{self.fecha} - {self.categoria}'
@@ -221,6 +321,7 @@ class Vencimiento(models.Model):
     fecha = models.DateField()
     concepto = models.CharField(max_length=255)
     monto = models.DecimalField(max_digits=15, decimal_places=2)
+    moneda = campo_moneda()
 
     deuda = models.ForeignKey(
         Deuda, null=True, blank=True, on_delete=models.SET_NULL,
@@ -234,10 +335,26 @@ class Vencimiento(models.Model):
     )
     notas = models.TextField(blank=True)
 
+    recurrencia = models.ForeignKey(
+        'Recurrencia', null=True, blank=True, on_delete=models.SET_NULL,
+        related_name='vencimientos',
+    )
+    fecha_recurrencia = models.DateField(null=True, blank=True)
+
     class Meta:
         verbose_name = 'Vencimiento'
         verbose_name_plural = 'Vencimientos'
         ordering = ['fecha', 'concepto']
+        indexes = [
+            models.Index(fields=['estado', 'fecha'], name='venc_estado_fecha_idx'),
+            models.Index(fields=['fecha'], name='venc_fecha_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recurrencia', 'fecha_recurrencia'],
+                name='vencimiento_ocurrencia_unica',
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'{self.fecha} - {self.concepto}'
@@ -246,3 +363,321 @@ class Vencimiento(models.Model):
     def esta_vencido(self) -> bool:
         """Indica si la fecha está vencida respecto de hoy."""
         return self.fecha < date.today() and self.estado != 'pagado'
+
+
+class Recurrencia(models.Model):
+    """
+    Regla de repetición para gastos fijos o vencimientos periódicos.
+
+    Las ocurrencias no se guardan: se expanden bajo demanda para el rango
+    pedido (ver finanzas.recurrencias) y solo se materializa un Gasto o
+    Vencimiento real cuando la ocurrencia se paga o se edita.
+    """
+    DESTINO_CHOICES = [
+        ('gasto', 'Gasto'),
+        ('vencimiento', 'Vencimiento'),
+    ]
+
+    FRECUENCIA_CHOICES = [
+        ('semanal', 'Semanal'),
+        ('mensual', 'Mensual'),
+        ('anual', 'Anual'),
+    ]
+
+    destino = models.CharField(max_length=20, choices=DESTINO_CHOICES, default='gasto')
+    frecuencia = models.CharField(max_length=10, choices=FRECUENCIA_CHOICES, default='mensual')
+    intervalo = models.PositiveSmallIntegerField(
+        default=1,
+        help_text='Cada cuántas semanas/meses/años se repite.',
+    )
+    fecha_inicio = models.DateField(help_text='Primera ocurrencia; define el día de repetición.')
+    fecha_fin = models.DateField(
+        null=True, blank=True, help_text='Última fecha posible (opcional).'
+    )
+
+    concepto = models.CharField(max_length=255)
+    monto = models.DecimalField(max_digits=15, decimal_places=2)
+    moneda = campo_moneda()
+
+    tipo_gasto = models.CharField(
+        max_length=20, choices=Gasto.TIPO_GASTO_CHOICES, default='fijo',
+    )
+    categoria = models.CharField(max_length=50, blank=True)
+    medio_pago = models.CharField(
+        max_length=20, choices=Gasto.MEDIO_PAGO_CHOICES, default='efectivo',
+    )
+    deuda = models.ForeignKey(
+        Deuda, null=True, blank=True, on_delete=models.SET_NULL,
+        help_text='Deuda asociada (se copia a cada ocurrencia).',
+    )
+
+    activa = models.BooleanField(default=True)
+
+    class Meta:
+        verbose_name = 'Recurrencia'
+        verbose_name_plural = 'Recurrencias'
+        ordering = ['concepto']
+
+    def __str__(self) -> str:
+        return f'{self.concepto} ({self.get_frecuencia_display()})'
+
+
+class TipoCambio(models.Model):
+    """
+    Cotización diaria: cuántos MONEDA_BASE vale una unidad de `moneda`.
+
+    Hay una fila por día (cargar_cotizaciones completa los días sin dato con
+    el anterior), así que las conversiones buscan por fecha exacta.
+    """
+
+    fecha = models.DateField()
+    moneda = models.CharField(max_length=3, choices=MONEDA_CHOICES)
+    valor = models.DecimalField(max_digits=15, decimal_places=4)
+
+    class Meta:
+        verbose_name = 'Tipo de cambio'
+        verbose_name_plural = 'Tipos de cambio'
+        ordering = ['-fecha', 'moneda']
+        constraints = [
+            models.UniqueConstraint(fields=['moneda', 'fecha'], name='tipo_cambio_moneda_fecha'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.fecha} {self.moneda} {self.valor}'
+
+
+class IndicePrecios(models.Model):
+    """
+    Índice de precios al consumidor, uno por mes.
+
+    `indice` es el nivel acumulado (el deflactor): un monto del mes M en
+    pesos del mes B es monto * indice(B) / indice(M). Si el CSV trae la
+    variación mensual, cargar_indice_precios encadena el nivel al cargar.
+    """
+
+    mes = models.DateField(unique=True, help_text='Primer día del mes.')
+    indice = models.DecimalField(max_digits=18, decimal_places=6)
+    variacion = models.DecimalField(
+        max_digits=8, decimal_places=4, null=True, blank=True, help_text='Variación mensual en %.'
+    )
+
+    class Meta:
+        verbose_name = 'Índice de precios'
+        verbose_name_plural = 'Índices de precios'
+        ordering = ['-mes']
+
+    def __str__(self) -> str:
+        return f'{self.mes:%Y-%m} {self.indice}'
+
+
+class CorteSaldo(models.Model):
+    """
+    Acumulado de movimientos anteriores a un mes (checkpoint de saldo).
+
+    Cada fila guarda la suma de todos los ingresos y gastos con fecha menor
+    a `mes`, de modo que el saldo a cualquier fecha sea un corte más la suma
+    acotada del mes en curso. Se mantiene desde finanzas.saldos. Los montos
+    están en MONEDA_BASE, cada movimiento convertido a la cotización de su
+    fecha.
+    """
+    mes = models.DateField(unique=True, help_text='Primer día del mes (excluido del acumulado).')
+
+    ingresos_confirmados = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    ingresos_pendientes = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    gastos_pagados = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    gastos_pendientes = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    gastos_efectivo = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    gastos_debito = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    gastos_tarjeta = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Corte de saldo'
+        verbose_name_plural = 'Cortes de saldo'
+        ordering = ['mes']
+
+    def __str__(self) -> str:
+        return f'Corte {self.mes:%Y-%m}'
+
+
+class GastoArchivado(models.Model):
+    """Gasto antiguo movido fuera de la tabla caliente por `archivar`."""
+    id = models.BigIntegerField(primary_key=True, help_text='Mismo id que tenía como Gasto.')
+    fecha = models.DateField(db_index=True)
+    tipo = models.CharField(max_length=20, choices=Gasto.TIPO_GASTO_CHOICES)
+    categoria = models.CharField(max_length=50)
+    descripcion = models.CharField(max_length=255, blank=True)
+    monto = models.DecimalField(max_digits=15, decimal_places=2)
+    moneda = campo_moneda()
+    pagado = models.BooleanField(default=False)
+    medio_pago = models.CharField(
+        max_length=20, choices=Gasto.MEDIO_PAGO_CHOICES, default='efectivo'
+    )
+    deuda_relacionada = models.ForeignKey(
+        Deuda, null=True, blank=True, on_delete=models.SET_NULL, related_name='+',
+    )
+    recurrencia = models.ForeignKey(
+        Recurrencia, null=True, blank=True, on_delete=models.SET_NULL, related_name='+',
+    )
+    fecha_recurrencia = models.DateField(null=True, blank=True)
+    archivado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Gasto archivado'
+        verbose_name_plural = 'Gastos archivados'
+        ordering = ['-fecha', '-id']
+
+    def __str__(self) -> str:
+        return f'{self.fecha} - {self.categoria} (archivado)'
+
+
+class IngresoArchivado(models.Model):
+    """Ingreso antiguo movido fuera de la tabla caliente por `archivar`."""
+    id = models.BigIntegerField(primary_key=True, help_text='Mismo id que tenía como Ingreso.')
+    fecha = models.DateField(db_index=True)
+    tipo = models.CharField(max_length=20, choices=Ingreso.TIPO_INGRESO_CHOICES)
+    descripcion = models.CharField(max_length=255, blank=True)
+    monto = models.DecimalField(max_digits=15, decimal_places=2)
+    moneda = campo_moneda()
+    confirmado = models.BooleanField(default=False)
+    archivado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Ingreso archivado'
+        verbose_name_plural = 'Ingresos archivados'
+        ordering = ['-fecha', '-id']
+
+    def __str__(self) -> str:
+        return f'{self.fecha} - {self.get_tipo_display()} (archivado)'
+
+
+class ResumenMensual(models.Model):
+    """
+    Totales mensuales de los movimientos archivados.
+
+    Se agrupan por tipo, categoría, medio de pago y si estaba liquidado
+    (cobrado/pagado), lo suficiente para que saldos, reportes y exports
+    sigan viendo los totales históricos sin leer las tablas archivadas.
+    Los totales están en MONEDA_BASE (convertidos al archivar).
+    """
+    MOVIMIENTO_CHOICES = [
+        ('ingreso', 'Ingreso'),
+        ('gasto', 'Gasto'),
+    ]
+
+    mes = models.DateField(help_text='Primer día del mes.')
+    movimiento = models.CharField(max_length=10, choices=MOVIMIENTO_CHOICES)
+    tipo = models.CharField(max_length=20)
+    categoria = models.CharField(max_length=50, blank=True)
+    medio_pago = models.CharField(max_length=20, blank=True)
+    liquidado = models.BooleanField(default=False, help_text='Cobrado (ingreso) o pagado (gasto).')
+    total = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    cantidad = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Resumen mensual'
+        verbose_name_plural = 'Resúmenes mensuales'
+        ordering = ['mes', 'movimiento']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['mes', 'movimiento', 'tipo', 'categoria', 'medio_pago', 'liquidado'],
+                name='resumen_mensual_unico',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.mes:%Y-%m} {self.movimiento} {self.tipo}'
+
+
+class Cambio(models.Model):
+    """
+    Registro append-only de escrituras sobre movimientos.
+
+    El id creciente funciona como cursor: el dashboard en vivo (ver
+    finanzas.envivo) y la API de sincronización (finanzas.sincronizacion)
+    piden los cambios posteriores al último que vieron. Las escrituras
+    masivas que no disparan señales dejan un cambio 'masivo' sin objeto,
+    con la fecha mínima afectada (sin fecha: toda la tabla).
+    """
+    MODELO_CHOICES = [
+        ('ingreso', 'Ingreso'),
+        ('gasto', 'Gasto'),
+        ('entidad', 'Entidad'),
+        ('deuda', 'Deuda'),
+        ('vencimiento', 'Vencimiento'),
+    ]
+    ACCION_CHOICES = [
+        ('alta', 'Alta'),
+        ('cambio', 'Cambio'),
+        ('baja', 'Baja'),
+        ('masivo', 'Cambio masivo'),
+    ]
+
+    modelo = models.CharField(max_length=20, choices=MODELO_CHOICES)
+    objeto_id = models.PositiveBigIntegerField(null=True, blank=True)
+    accion = models.CharField(max_length=10, choices=ACCION_CHOICES)
+    fecha = models.DateField(null=True, blank=True, help_text='Fecha del movimiento.')
+    fecha_anterior = models.DateField(
+        null=True, blank=True, help_text='Fecha previa si el cambio la movió.'
+    )
+    creado = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Cambio'
+        verbose_name_plural = 'Cambios'
+        ordering = ['id']
+
+    def __str__(self) -> str:
+        return f'#{self.pk} {self.accion} {self.modelo} {self.objeto_id or ""}'.strip()
+
+
+class ClaveIdempotencia(models.Model):
+    """
+    Respuesta guardada de una carga por API con header Idempotency-Key.
+
+    Si el cliente reintenta con la misma clave (p. ej. el celular perdió la
+    respuesta), se devuelve esta respuesta en lugar de volver a crear filas.
+    """
+
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    clave = models.CharField(max_length=100)
+    huella = models.CharField(max_length=64, help_text='sha256 del cuerpo del request.')
+    estado = models.PositiveSmallIntegerField()
+    respuesta = models.JSONField()
+    creado = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Clave de idempotencia'
+        verbose_name_plural = 'Claves de idempotencia'
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'clave'], name='idempotencia_usuario_clave'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.clave} ({self.estado})'
+
+
+class HuellaRevisada(models.Model):
+    """
+    Grupo de movimientos con la misma huella que se revisó y no son
+    duplicados. Vuelve a mostrarse si aparecen más filas con esa huella.
+    """
+
+    MODELO_CHOICES = [
+        ('ingreso', 'Ingreso'),
+        ('gasto', 'Gasto'),
+    ]
+
+    modelo = models.CharField(max_length=20, choices=MODELO_CHOICES)
+    huella = models.CharField(max_length=80)
+    cantidad = models.PositiveIntegerField(help_text='Filas con esta huella al revisarla.')
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Huella revisada'
+        verbose_name_plural = 'Huellas revisadas'
+        constraints = [
+            models.UniqueConstraint(fields=['modelo', 'huella'], name='huella_revisada_unica'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.modelo} {self.huella}'
@@ -0,0 +1,265 @@
+"""
+Expansión perezosa de recurrencias.
+
+Las reglas (modelo Recurrencia) se expanden en ocurrencias virtuales solo
+para el rango de fechas que pide cada vista. El cálculo de fechas es puro y
+se memoiza con un LRU, por lo que expandir una ventana de ±2 años en cada
+request del dashboard cuesta dos queries (reglas + ya materializadas).
+"""
+import calendar
+from datetime import date, timedelta
+from functools import lru_cache
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Gasto, GastoArchivado, Recurrencia, Vencimiento
+
+MEDIOS_FLUJO = ('efectivo', 'debito')
+
+
+def _sumar_meses(inicio, meses):
+    """Suma meses a una fecha ajustando el día al largo del mes destino."""
+    total = inicio.month - 1 + meses
+    anio = inicio.year + total // 12
+    mes = total % 12 + 1
+    dia = min(inicio.day, calendar.monthrange(anio, mes)[1])
+    return date(anio, mes, dia)
+
+
+@lru_cache(maxsize=2048)
+def expandir_fechas(frecuencia, intervalo, inicio, fin, desde, hasta):
+    """
+    Devuelve las fechas de ocurrencia de una regla dentro de [desde, hasta].
+
+    Params:
+        frecuencia (str): 'semanal', 'mensual' o 'anual'.
+        intervalo (int): paso entre ocurrencias en la unidad de la frecuencia.
+        inicio (date): primera ocurrencia.
+        fin (date | None): fecha límite de la regla.
+        desde, hasta (date): ventana pedida (inclusiva).
+
+    Retorna:
+        tuple[date, ...] ordenada; es inmutable para poder cachearse.
+    """
+    intervalo = max(int(intervalo or 1), 1)
+    limite = min(hasta, fin) if fin else hasta
+    desde = max(desde, inicio)
+    if desde > limite:
+        return ()
+
+    if frecuencia == 'semanal':
+        paso = timedelta(days=7 * intervalo)
+        n = -(-(desde - inicio).days // paso.days)
+        actual = inicio + paso * n
+        fechas = []
+        while actual <= limite:
+            fechas.append(actual)
+            actual += paso
+        return tuple(fechas)
+
+    meses_paso = intervalo * (12 if frecuencia == 'anual' else 1)
+    meses_hasta_desde = (desde.year - inicio.year) * 12 + desde.month - inicio.month
+    n = max(meses_hasta_desde // meses_paso, 0)
+    fechas = []
+    while True:
+        actual = _sumar_meses(inicio, n * meses_paso)
+        if actual > limite:
+            break
+        if actual >= desde:
+            fechas.append(actual)
+        n += 1
+    return tuple(fechas)
+
+
+def es_ocurrencia(recurrencia, fecha):
+    """Indica si la fecha corresponde a una ocurrencia de la regla."""
+    return fecha in expandir_fechas(
+        recurrencia.frecuencia,
+        recurrencia.intervalo,
+        recurrencia.fecha_inicio,
+        recurrencia.fecha_fin,
+        fecha,
+        fecha,
+    )
+
+
+class Ocurrencia:
+    """
+    Ocurrencia virtual (no guardada) de una Recurrencia.
+
+    Expone los mismos atributos que usan los templates de Gasto y
+    Vencimiento, para poder mezclarse en tablas y series.
+    """
+    __slots__ = ('recurrencia', 'fecha')
+
+    es_virtual = True
+    pagado = False
+    estado = 'pendiente'
+
+    def __init__(self, recurrencia, fecha):
+        self.recurrencia = recurrencia
+        self.fecha = fecha
+
+    def __repr__(self) -> str:
+        return f'<Ocurrencia {self.recurrencia_id} {self.fecha}>'
+
+    @property
+    def recurrencia_id(self):
+        return self.recurrencia.pk
+
+    @property
+    def monto(self):
+        return self.recurrencia.monto
+
+    @property
+    def moneda(self):
+        return self.recurrencia.moneda
+
+    @property
+    def descripcion(self):
+        return self.recurrencia.concepto
+
+    concepto = descripcion
+
+    @property
+    def categoria(self):
+        return self.recurrencia.categoria
+
+    @property
+    def tipo(self):
+        return self.recurrencia.tipo_gasto
+
+    @property
+    def medio_pago(self):
+        return self.recurrencia.medio_pago
+
+    @property
+    def deuda(self):
+        return self.recurrencia.deuda
+
+    @property
+    def impacta_flujo(self) -> bool:
+        return self.medio_pago in MEDIOS_FLUJO
+
+    @property
+    def dias_para_vencer(self) -> int:
+        return (self.fecha - date.today()).days
+
+    @property
+    def estado_vencimiento(self) -> str:
+        dias = self.dias_para_vencer
+        if dias < 0:
+            return 'vencido'
+        if dias == 0:
+            return 'hoy'
+        return 'por_vencer'
+
+    @property
+    def esta_vencido(self) -> bool:
+        return self.fecha < date.today()
+
+
+def ocurrencias(desde, hasta, destino='gasto'):
+    """
+    Expande las recurrencias activas en ocurrencias virtuales para un rango.
+
+    Omite las ocurrencias que ya tienen un Gasto/Vencimiento materializado.
+
+    Params:
+        desde, hasta (date): rango inclusivo.
+        destino (str): 'gasto' o 'vencimiento'.
+
+    Retorna:
+        list[Ocurrencia] ordenada por fecha.
+    """
+    reglas = list(
+        Recurrencia.objects.filter(activa=True, destino=destino, fecha_inicio__lte=hasta)
+        .filter(Q(fecha_fin__isnull=True) | Q(fecha_fin__gte=desde))
+        .select_related('deuda__entidad')
+    )
+    if not reglas:
+        return []
+
+    modelos = (Gasto, GastoArchivado) if destino == 'gasto' else (Vencimiento,)
+    materializadas = set()
+    for modelo in modelos:
+        materializadas.update(
+            modelo.objects.filter(
+                recurrencia__in=reglas,
+                fecha_recurrencia__gte=desde,
+                fecha_recurrencia__lte=hasta,
+            ).values_list('recurrencia_id', 'fecha_recurrencia')
+        )
+
+    resultado = []
+    for regla in reglas:
+        fechas = expandir_fechas(
+            regla.frecuencia, regla.intervalo, regla.fecha_inicio, regla.fecha_fin, desde, hasta
+        )
+        for fecha in fechas:
+            if (regla.pk, fecha) not in materializadas:
+                resultado.append(Ocurrencia(regla, fecha))
+    resultado.sort(key=lambda o: (o.fecha, o.descripcion))
+    return resultado
+
+
+def valores_materializados(recurrencia, fecha):
+    """Campos con los que se crea el movimiento real de una ocurrencia."""
+    if recurrencia.destino == 'vencimiento':
+        return {
+            'fecha': fecha,
+            'concepto': recurrencia.concepto,
+            'monto': recurrencia.monto,
+            'moneda': recurrencia.moneda,
+            'deuda': recurrencia.deuda,
+        }
+    return {
+        'fecha': fecha,
+        'tipo': recurrencia.tipo_gasto,
+        'categoria': recurrencia.categoria or recurrencia.concepto[:50],
+        'descripcion': recurrencia.concepto,
+        'monto': recurrencia.monto,
+        'moneda': recurrencia.moneda,
+        'medio_pago': recurrencia.medio_pago,
+        'deuda_relacionada': recurrencia.deuda,
+    }
+
+
+@transaction.atomic
+def materializar(recurrencia, fecha_ocurrencia, **campos):
+    """
+    Crea (o devuelve) el Gasto/Vencimiento real de una ocurrencia.
+
+    Params:
+        recurrencia (Recurrencia): regla de origen.
+        fecha_ocurrencia (date): fecha de la ocurrencia.
+        campos: valores que pisan los de la regla (ej. pagado=True).
+
+    Retorna:
+        tuple (objeto, creado).
+
+    Lanza:
+        ValueError si la fecha no es una ocurrencia de la regla.
+    """
+    if not es_ocurrencia(recurrencia, fecha_ocurrencia):
+        raise ValueError(f'{fecha_ocurrencia} no es una ocurrencia de {recurrencia}')
+
+    modelo = Gasto if recurrencia.destino == 'gasto' else Vencimiento
+    defaults = valores_materializados(recurrencia, fecha_ocurrencia)
+    defaults.update(campos)
+    obj, creado = modelo.objects.get_or_create(
+        recurrencia=recurrencia,
+        fecha_recurrencia=fecha_ocurrencia,
+        defaults=defaults,
+    )
+    if not creado and campos:
+        for campo, valor in campos.items():
+            setattr(obj, campo, valor)
+        guardar = list(campos)
+        if modelo is Gasto:
+            # auto_now solo se escribe si está en update_fields, y es la
+            # versión del fragmento cacheado de la fila.
+            guardar.append('actualizado')
+        obj.save(update_fields=guardar)
+    return obj, creado
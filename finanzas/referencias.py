@@ -0,0 +1,86 @@
+"""
+Datos de referencia cacheados para los formularios (deudas con su entidad).
+
+La lista de deudas que se pueden vincular a un gasto se arma una vez por
+versión del grupo 'referencias' (ver finanzas.versiones), que se invalida
+al escribir Entidad o Deuda. Los formularios solo muestran la opción
+elegida y buscan el resto por el endpoint de autocompletado, así que su
+costo no crece con la cantidad de deudas.
+"""
+import unicodedata
+
+from django.core.cache import cache
+
+from . import versiones
+from .models import Deuda
+
+GRUPO = 'referencias'
+CACHE_TIMEOUT = 60 * 60
+LIMITE_BUSQUEDA = 20
+# Tipos de deuda que se pagan con un gasto (tarjeta, préstamo, otro).
+TIPOS_PAGABLES = ('tarjeta', 'prestamo', 'otro')
+
+
+def _normalizar(texto):
+    """Minúsculas y sin acentos, para comparar búsquedas."""
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def deudas_pagables():
+    """
+    Deudas vinculables a un gasto, ordenadas por entidad y tipo.
+
+    Retorna:
+        list[tuple[int, str]]: (id, etiqueta) con la misma etiqueta que
+        str(deuda).
+    """
+    clave = f'finanzas:{GRUPO}:{versiones.version(GRUPO)}:deudas'
+    opciones = cache.get(clave)
+    if opciones is None:
+        tipos = dict(Deuda.TIPO_DEUDA_CHOICES)
+        filas = (
+            Deuda.objects.filter(tipo_deuda__in=TIPOS_PAGABLES)
+            .order_by('entidad__nombre', 'tipo_deuda', 'pk')
+            .values_list('pk', 'entidad__nombre', 'tipo_deuda')
+        )
+        opciones = [
+            (pk, f'{entidad} - {tipos.get(tipo, tipo)}') for pk, entidad, tipo in filas
+        ]
+        cache.set(clave, opciones, CACHE_TIMEOUT)
+    return opciones
+
+
+def etiqueta_deuda(pk):
+    """Etiqueta de una deuda pagable, o None si no existe o no es pagable."""
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    return dict(deudas_pagables()).get(pk)
+
+
+def buscar_deudas(texto, limite=LIMITE_BUSQUEDA):
+    """
+    Deudas pagables cuya etiqueta contiene todas las palabras de `texto`.
+
+    Params:
+        texto (str): búsqueda libre (sin distinguir mayúsculas ni acentos).
+        limite (int): máximo de resultados.
+
+    Retorna:
+        list[dict]: {'id', 'texto'} en el orden de deudas_pagables().
+    """
+    palabras = _normalizar(texto).split()
+    resultados = []
+    for pk, etiqueta in deudas_pagables():
+        normalizada = _normalizar(etiqueta)
+        if all(p in normalizada for p in palabras):
+            resultados.append({'id': pk, 'texto': etiqueta})
+            if len(resultados) >= limite:
+                break
+    return resultados
+
+
+def invalidar():
+    versiones.invalidar(GRUPO)
@@ -0,0 +1,272 @@
+"""
+Respaldo y restauración rápida de la base de datos.
+
+El archivo generado es un .tar.gz con un manifest.json (motor, fecha y
+sha256 de cada miembro) más los datos:
+
+- SQLite: una copia de la base hecha con la API de backup online de SQLite,
+  página por página, sin bloquear a los escritores entre pasos.
+- PostgreSQL: un CSV por tabla generado con COPY ... TO STDOUT, todas en
+  una transacción REPEATABLE READ (una sola foto de la base); al restaurar
+  se vacían las tablas y se recargan con COPY ... FROM STDIN.
+
+El manifest guarda la última migración aplicada de cada app: COPY carga
+las columnas por posición, así que solo se restaura sobre el mismo esquema.
+"""
+import hashlib
+import io
+import json
+import sqlite3
+import tarfile
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.migrations.recorder import MigrationRecorder
+
+from .copia_masiva import copy_a, copy_desde
+
+FORMATO = 2
+PAGINAS_POR_PASO = 1024
+TAMANO_BLOQUE = 1024 * 1024
+MIEMBRO_SQLITE = 'db.sqlite3'
+
+
+class RespaldoError(Exception):
+    """Archivo de respaldo inválido o incompatible con la base actual."""
+
+
+class _EscrituraConHash:
+    """Envuelve un archivo binario calculando sha256 de lo escrito."""
+
+    def __init__(self, destino):
+        self.destino = destino
+        self.hash = hashlib.sha256()
+
+    def write(self, datos):
+        if isinstance(datos, str):
+            datos = datos.encode('utf-8')
+        else:
+            datos = bytes(datos)
+        self.hash.update(datos)
+        return self.destino.write(datos)
+
+
+def _sha256_archivo(ruta):
+    digest = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(TAMANO_BLOQUE), b''):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+def _agregar(tar, nombre, fileobj, tamano):
+    info = tarfile.TarInfo(nombre)
+    info.size = tamano
+    info.mtime = int(time.time())
+    fileobj.seek(0)
+    tar.addfile(info, fileobj)
+
+
+def _migraciones():
+    """{app: última migración aplicada} de la base 'default'."""
+    ultimas = {}
+    for app, nombre in MigrationRecorder(connection).applied_migrations():
+        ultimas[app] = max(nombre, ultimas.get(app, nombre))
+    return ultimas
+
+
+def _tablas():
+    """Tablas de todos los modelos instalados que existen en la base."""
+    existentes = set(connection.introspection.table_names())
+    tablas = []
+    for modelo in apps.get_models(include_auto_created=True):
+        meta = modelo._meta
+        if meta.managed and not meta.proxy and meta.db_table in existentes:
+            if meta.db_table not in tablas:
+                tablas.append(meta.db_table)
+    return sorted(tablas)
+
+
+def crear_respaldo(destino):
+    """
+    Genera un respaldo comprimido de la base 'default'.
+
+    Params:
+        destino (Path): ruta del .tar.gz a crear.
+
+    Retorna:
+        dict con 'ruta', 'motor', 'bytes', 'segundos' y 'miembros'.
+    """
+    inicio = time.perf_counter()
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    motor = connection.vendor
+    manifest = {
+        'formato': FORMATO,
+        'motor': motor,
+        'creado': datetime.now().isoformat(timespec='seconds'),
+        'miembros': {},
+    }
+
+    with tarfile.open(destino, 'w:gz') as tar:
+        if motor == 'sqlite':
+            manifest['migraciones'] = _migraciones()
+            connection.ensure_connection()
+            with tempfile.TemporaryDirectory() as tmp:
+                copia = Path(tmp) / MIEMBRO_SQLITE
+                destino_sqlite = sqlite3.connect(copia)
+                try:
+                    connection.connection.backup(
+                        destino_sqlite, pages=PAGINAS_POR_PASO, sleep=0.001
+                    )
+                finally:
+                    destino_sqlite.close()
+                manifest['miembros'][MIEMBRO_SQLITE] = _sha256_archivo(copia)
+                tar.add(copia, arcname=MIEMBRO_SQLITE)
+        elif motor == 'postgresql':
+            tablas = _tablas()
+            # Cada COPY en autocommit vería su propia foto: una fila copiada
+            # después de que se saltó su FK no se podría restaurar.
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+                manifest['migraciones'] = _migraciones()
+                for tabla in tablas:
+                    nombre = f'{tabla}.csv'
+                    with tempfile.SpooledTemporaryFile(max_size=8 * TAMANO_BLOQUE) as tmp:
+                        escritura = _EscrituraConHash(tmp)
+                        tabla_sql = connection.ops.quote_name(tabla)
+                        copy_a(
+                            cursor,
+                            f'COPY {tabla_sql} TO STDOUT WITH (FORMAT csv, HEADER true)',
+                            escritura,
+                        )
+                        manifest['miembros'][nombre] = escritura.hash.hexdigest()
+                        _agregar(tar, nombre, tmp, tmp.tell())
+        else:
+            raise RespaldoError(f'Motor no soportado para respaldo: {motor}')
+
+        datos_manifest = json.dumps(manifest, indent=2).encode('utf-8')
+        _agregar(tar, 'manifest.json', io.BytesIO(datos_manifest), len(datos_manifest))
+
+    return {
+        'ruta': destino,
+        'motor': motor,
+        'bytes': destino.stat().st_size,
+        'segundos': time.perf_counter() - inicio,
+        'miembros': len(manifest['miembros']),
+    }
+
+
+def _leer_manifest(tar):
+    try:
+        manifest = json.load(tar.extractfile('manifest.json'))
+    except KeyError:
+        raise RespaldoError('El archivo no tiene manifest.json.')
+    if manifest.get('formato') != FORMATO:
+        raise RespaldoError(f"Formato de respaldo no soportado: {manifest.get('formato')}")
+    if manifest.get('motor') != connection.vendor:
+        raise RespaldoError(
+            f"El respaldo es de {manifest.get('motor')} y la base actual es {connection.vendor}."
+        )
+    if manifest.get('migraciones') != _migraciones():
+        raise RespaldoError(
+            'El respaldo se generó con otras migraciones que la base actual; '
+            'aplicá las mismas migraciones antes de restaurar.'
+        )
+    return manifest
+
+
+def _extraer_verificado(tar, nombre, esperado, directorio):
+    """Extrae un miembro a disco verificando su sha256."""
+    ruta = Path(directorio) / Path(nombre).name
+    origen = tar.extractfile(nombre)
+    if origen is None:
+        raise RespaldoError(f'Falta {nombre} en el respaldo.')
+    digest = hashlib.sha256()
+    with open(ruta, 'wb') as salida:
+        for bloque in iter(lambda: origen.read(TAMANO_BLOQUE), b''):
+            digest.update(bloque)
+            salida.write(bloque)
+    if digest.hexdigest() != esperado:
+        raise RespaldoError(f'Checksum inválido para {nombre}.')
+    return ruta
+
+
+def restaurar_respaldo(origen):
+    """
+    Restaura un respaldo generado por crear_respaldo sobre la base 'default'.
+
+    Reemplaza todos los datos actuales. Verifica el checksum de cada miembro
+    antes de tocar la base.
+
+    Retorna:
+        dict con 'motor', 'bytes', 'segundos' y 'miembros'.
+
+    Lanza:
+        RespaldoError si el archivo es inválido o de otro motor.
+    """
+    inicio = time.perf_counter()
+    origen = Path(origen)
+    with tarfile.open(origen, 'r:gz') as tar, tempfile.TemporaryDirectory() as tmp:
+        manifest = _leer_manifest(tar)
+        rutas = {
+            nombre: _extraer_verificado(tar, nombre, esperado, tmp)
+            for nombre, esperado in manifest['miembros'].items()
+        }
+
+        if connection.vendor == 'sqlite':
+            connection.ensure_connection()
+            fuente = sqlite3.connect(rutas[MIEMBRO_SQLITE])
+            try:
+                fuente.backup(connection.connection, pages=PAGINAS_POR_PASO)
+            finally:
+                fuente.close()
+        else:
+            _restaurar_postgres(rutas)
+
+    cache.clear()
+    return {
+        'motor': manifest['motor'],
+        'bytes': origen.stat().st_size,
+        'segundos': time.perf_counter() - inicio,
+        'miembros': len(manifest['miembros']),
+    }
+
+
+def _restaurar_postgres(rutas):
+    tablas = [nombre[:-len('.csv')] for nombre in rutas]
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Django crea las FK de Postgres como DEFERRABLE INITIALLY DEFERRED,
+        # así que el orden de carga dentro de la transacción no importa.
+        lista = ', '.join(connection.ops.quote_name(tabla) for tabla in tablas)
+        cursor.execute(f'TRUNCATE {lista} RESTART IDENTITY CASCADE')
+        for nombre, ruta in rutas.items():
+            tabla = connection.ops.quote_name(nombre[:-len('.csv')])
+            with open(ruta, 'rb') as archivo:
+                copy_desde(
+                    cursor, f'COPY {tabla} FROM STDIN WITH (FORMAT csv, HEADER true)', archivo
+                )
+        modelos = [
+            modelo for modelo in apps.get_models(include_auto_created=True)
+            if modelo._meta.db_table in tablas
+        ]
+        for sql in connection.ops.sequence_reset_sql(no_style(), modelos):
+            cursor.execute(sql)
+
+
+def nombre_por_defecto(directorio='backups'):
+    marca = datetime.now().strftime('%Y%m%d-%H%M%S')
+    return Path(directorio) / f'respaldo-{connection.vendor}-{marca}.tar.gz'
+
+
+def escribir_sha256(ruta):
+    """Escribe <ruta>.sha256 con el hash del archivo completo."""
+    digest = _sha256_archivo(ruta)
+    Path(f'{ruta}.sha256').write_text(f'{digest}  {Path(ruta).name}\n', encoding='utf-8')
+    return digest
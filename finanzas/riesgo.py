@@ -0,0 +1,237 @@
+"""
+Riesgo de flujo de caja por simulación (Monte Carlo).
+
+El sobrante del dashboard es una sola línea: suma lo que ya está cargado.
+Los gastos variables (tipo 'variable') casi nunca se cargan por adelantado
+y fluctúan mucho, así que esa línea es optimista. Para cada categoría de
+gasto variable se ajusta, con los últimos HISTORIA_DIAS días, la
+probabilidad de que haya gasto en un día y una lognormal para el monto de
+ese día. Cada simulación suma a la línea determinística los gastos
+variables sorteados para los días futuros (en lugar de los ya cargados
+para esos días); de todas salen, por día, la
+probabilidad de saldo negativo y las bandas de percentiles.
+
+Las simulaciones se vectorizan con NumPy: un arreglo (simulaciones, días,
+categorías) por bloque de BLOQUE_DIAS días, sin bucles de Python por
+simulación ni por día. Con la semilla fija el resultado es reproducible y
+se cachea por versión de los datos. NumPy se importa recién al simular
+para no sumarlo al arranque de cada worker.
+"""
+import math
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db.models import Sum
+
+from . import cotizaciones, envivo, saldos, tablero, versiones
+from .models import MONEDA_BASE, Gasto
+from .recurrencias import MEDIOS_FLUJO, ocurrencias
+
+HISTORIA_DIAS = 365
+SIMULACIONES = 2000
+MAX_SIMULACIONES = 20000
+MAX_MESES = 12
+SEMILLA = 20240101
+PERCENTILES = (5, 25, 50, 75, 95)
+BLOQUE_DIAS = 31
+CACHE_TIMEOUT = 600
+
+
+def historia(hoy):
+    """
+    Gasto variable por categoría y día de los últimos HISTORIA_DIAS días.
+
+    Retorna:
+        tuple ({categoría: [totales diarios > 0]}, días observados).
+    """
+    desde = hoy - timedelta(days=HISTORIA_DIAS)
+    filas = (
+        Gasto.objects.filter(
+            tipo='variable', medio_pago__in=MEDIOS_FLUJO, fecha__gte=desde, fecha__lt=hoy
+        )
+        .values_list('categoria', 'fecha')
+        .annotate(total=Sum(cotizaciones.convertido()))
+        .order_by()
+    )
+    por_categoria = {}
+    primera = hoy
+    for categoria, fecha, total in filas:
+        if total and total > 0:
+            por_categoria.setdefault(categoria, []).append(float(total))
+            primera = min(primera, fecha)
+    # Con menos historia que la ventana, la frecuencia se mide sobre lo que hay.
+    return por_categoria, max((hoy - primera).days, 1)
+
+
+def ajustar(por_categoria, dias):
+    """
+    Parámetros por categoría: probabilidad diaria y lognormal del monto.
+
+    Retorna:
+        list[dict] con 'categoria', 'prob_dia', 'mu', 'sigma' y
+        'media_dia' (gasto esperado por día).
+    """
+    ajustes = []
+    for categoria, montos in sorted(por_categoria.items()):
+        logs = [math.log(monto) for monto in montos]
+        mu = sum(logs) / len(logs)
+        sigma = math.sqrt(sum((x - mu) ** 2 for x in logs) / len(logs)) if len(logs) > 1 else 0.0
+        prob = min(len(montos) / dias, 1.0)
+        ajustes.append({
+            'categoria': categoria,
+            'prob_dia': prob,
+            'mu': mu,
+            'sigma': sigma,
+            'media_dia': prob * math.exp(mu + sigma ** 2 / 2),
+        })
+    return ajustes
+
+
+def linea_base(inicio, fin, saldo_inicial):
+    """
+    Sobrante acumulado determinístico por día entre `inicio` y `fin`, con
+    los mismos montos que el dashboard (programados y recurrentes incluidos).
+    """
+    ingresos = tablero.montos_ingresos(inicio, fin)
+    gastos = tablero.montos_gastos(inicio, fin)
+    recurrentes = {}
+    for ocurrencia in ocurrencias(inicio, fin):
+        if ocurrencia.impacta_flujo:
+            monto = cotizaciones.convertir(ocurrencia.monto, ocurrencia.moneda, MONEDA_BASE)
+            recurrentes[ocurrencia.fecha] = recurrentes.get(ocurrencia.fecha, 0) + monto
+    fechas, linea = [], []
+    saldo = float(saldo_inicial)
+    fecha = inicio
+    while fecha <= fin:
+        saldo += float(sum(ingresos.get(fecha, (0, 0))) - sum(gastos.get(fecha, (0, 0))))
+        saldo -= float(recurrentes.get(fecha, 0))
+        fechas.append(fecha)
+        linea.append(saldo)
+        fecha += timedelta(days=1)
+    return fechas, linea
+
+
+def sin_variables_futuras(fechas, linea, hoy):
+    """
+    `linea` sin los gastos variables ya cargados para después de `hoy`: la
+    simulación los reemplaza por los sorteados, no se suman a ellos.
+    """
+    cargados = dict(
+        Gasto.objects.filter(
+            tipo='variable',
+            medio_pago__in=MEDIOS_FLUJO,
+            fecha__gt=hoy,
+            fecha__range=(fechas[0], fechas[-1]),
+        )
+        .values_list('fecha')
+        .annotate(total=Sum(cotizaciones.convertido()))
+        .order_by()
+    )
+    acumulado = 0.0
+    ajustada = []
+    for fecha, saldo in zip(fechas, linea):
+        acumulado += float(cargados.get(fecha, 0))
+        ajustada.append(saldo + acumulado)
+    return ajustada
+
+
+def simular(linea, futuros, ajustes, simulaciones, semilla):
+    """
+    Saldos simulados: `linea` menos los gastos variables sorteados desde
+    el día `futuros` (índice del primer día futuro) en adelante.
+
+    Retorna:
+        numpy.ndarray (simulaciones, días) de float64.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(semilla)
+    dias = len(linea)
+    saldo = np.tile(np.asarray(linea, dtype=np.float64), (simulaciones, 1))
+    if not ajustes or futuros >= dias:
+        return saldo
+    prob = np.array([a['prob_dia'] for a in ajustes], dtype=np.float32)
+    mu = np.array([a['mu'] for a in ajustes], dtype=np.float32)
+    sigma = np.array([a['sigma'] for a in ajustes], dtype=np.float32)
+    gasto = np.empty((simulaciones, dias - futuros), dtype=np.float64)
+    # Por bloques para acotar la memoria: (simulaciones, BLOQUE_DIAS, categorías).
+    for desde in range(0, dias - futuros, BLOQUE_DIAS):
+        forma = (simulaciones, min(BLOQUE_DIAS, dias - futuros - desde), len(ajustes))
+        hay = rng.random(forma, dtype=np.float32) < prob
+        montos = np.exp(mu + sigma * rng.standard_normal(forma, dtype=np.float32))
+        gasto[:, desde:desde + forma[1]] = np.where(hay, montos, 0).sum(axis=2)
+    saldo[:, futuros:] -= np.cumsum(gasto, axis=1)
+    return saldo
+
+
+def _meses_despues(mes, meses):
+    total = mes.month - 1 + meses
+    return date(mes.year + total // 12, total % 12 + 1, 1)
+
+
+def riesgo(month_param=None, meses=1, simulaciones=SIMULACIONES, semilla=SEMILLA, hoy=None):
+    """
+    Probabilidad de saldo negativo y bandas del sobrante por día.
+
+    Params:
+        month_param (str): primer mes (?month=YYYY-MM, como el dashboard).
+        meses (int): horizonte en meses (hasta MAX_MESES).
+        simulaciones (int): cantidad de simulaciones (hasta MAX_SIMULACIONES).
+        semilla (int): semilla del generador (resultado reproducible).
+
+    Retorna:
+        dict con 'fechas', 'determinista', 'prob_negativo' (por día),
+        'prob_negativo_periodo' (algún día negativo), 'percentiles'
+        ({'p5': [...], ...}) y 'categorias' (parámetros ajustados). Montos
+        en MONEDA_BASE nominal.
+    """
+    hoy = hoy or date.today()
+    inicio = tablero.mes_seleccionado(month_param, hoy)[0]
+    fin = _meses_despues(inicio, meses) - timedelta(days=1)
+    # Las recurrencias no dejan Cambio: su versión va aparte.
+    clave = 'finanzas:riesgo:{}:{}:{}:{}:{}:{}:{}:{}'.format(
+        envivo.cursor_actual(),
+        versiones.version('vencimientos'),
+        versiones.version(cotizaciones.GRUPO),
+        hoy,
+        inicio,
+        meses,
+        simulaciones,
+        semilla,
+    )
+    datos = cache.get(clave)
+    if datos is not None:
+        return datos
+
+    import numpy as np
+
+    ajustes = ajustar(*historia(hoy))
+    saldo_inicial = saldos.saldo_al(inicio - timedelta(days=1))['saldo_flujo']
+    fechas, linea = linea_base(inicio, fin, saldo_inicial)
+    futuros = max((hoy - inicio).days + 1, 0)
+    base = sin_variables_futuras(fechas, linea, hoy)
+    saldo = simular(base, futuros, ajustes, simulaciones, semilla)
+    bandas = np.percentile(saldo, PERCENTILES, axis=0)
+    datos = {
+        'desde': inicio.isoformat(),
+        'hasta': fin.isoformat(),
+        'simulaciones': simulaciones,
+        'semilla': semilla,
+        'fechas': [fecha.isoformat() for fecha in fechas],
+        'determinista': [round(valor, 2) for valor in linea],
+        'prob_negativo': np.round((saldo < 0).mean(axis=0), 4).tolist(),
+        'prob_negativo_periodo': round(float((saldo.min(axis=1) < 0).mean()), 4),
+        'percentiles': {
+            f'p{p}': np.round(banda, 2).tolist() for p, banda in zip(PERCENTILES, bandas)
+        },
+        'categorias': [
+            {
+                'categoria': a['categoria'],
+                'prob_dia': round(a['prob_dia'], 4),
+                'media_dia': round(a['media_dia'], 2),
+            }
+            for a in ajustes
+        ],
+    }
+    cache.set(clave, datos, CACHE_TIMEOUT)
+    return datos
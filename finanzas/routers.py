@@ -0,0 +1,65 @@
+"""
+Router de lecturas hacia una réplica opcional.
+
+Si DATABASES tiene el alias 'replica' (DATABASE_REPLICA_URL), las lecturas
+de los modelos de finanzas van a la réplica solo cuando el código lo pide
+explícitamente con `usar_replica()`; lo hace ReplicaMiddleware en los
+requests de lectura y exportar_csv. Todo lo demás (escrituras, lecturas
+dentro de una transacción, auth/sesiones/admin, comandos) usa la primaria.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+ALIAS_REPLICA = 'replica'
+
+_leer_de_replica = ContextVar('finanzas_leer_de_replica', default=False)
+
+
+def replica_configurada():
+    return ALIAS_REPLICA in settings.DATABASES
+
+
+@contextmanager
+def usar_replica(activar=True):
+    """Dentro del bloque, las lecturas de finanzas pueden ir a la réplica."""
+    token = _leer_de_replica.set(activar)
+    try:
+        yield
+    finally:
+        _leer_de_replica.reset(token)
+
+
+def usar_primaria():
+    """Dentro del bloque, todas las lecturas van a la primaria."""
+    return usar_replica(False)
+
+
+class RouterReplica:
+    """Manda lecturas a la réplica cuando el contexto lo permite."""
+
+    apps_replica = {'finanzas'}
+
+    def db_for_read(self, model, **hints):
+        if not (_leer_de_replica.get() and replica_configurada()):
+            return None
+        if model._meta.app_label not in self.apps_replica:
+            return None
+        # Lectura dentro de una transacción en la primaria: tiene que ver lo
+        # que la transacción acaba de escribir (p. ej. asegurar_corte).
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return ALIAS_REPLICA
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Misma base de datos lógica: la réplica es una copia de la primaria.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # La réplica recibe el esquema por replicación.
+        return db != ALIAS_REPLICA
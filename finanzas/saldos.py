@@ -0,0 +1,250 @@
+"""
+Saldo acumulado a cualquier fecha usando cortes mensuales.
+
+Un CorteSaldo guarda el acumulado de todos los movimientos anteriores a su
+mes. El saldo al <fecha> es entonces el corte de ese mes (búsqueda por
+índice único) más la suma acotada de los movimientos del mes hasta la
+fecha, en lugar de sumar toda la historia.
+
+Los cortes se crean bajo demanda, se ajustan por delta cuando cambia un
+movimiento pasado (ver finanzas.signals) y se descartan desde una fecha
+cuando hubo actualizaciones masivas que no disparan señales.
+
+Los movimientos archivados (ver finanzas.archivo) siguen contando: las
+reconstrucciones usan ResumenMensual y las sumas acotadas leen también las
+tablas de archivo, que solo se tocan para fechas anteriores al horizonte.
+
+Todo se acumula en MONEDA_BASE, cada movimiento convertido con la
+cotización de su fecha (ver finanzas.cotizaciones).
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Min, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from . import cotizaciones
+from .models import (
+    MONEDA_BASE,
+    CorteSaldo,
+    Gasto,
+    GastoArchivado,
+    Ingreso,
+    IngresoArchivado,
+    ResumenMensual,
+)
+
+CAMPOS = (
+    'ingresos_confirmados',
+    'ingresos_pendientes',
+    'gastos_pagados',
+    'gastos_pendientes',
+    'gastos_efectivo',
+    'gastos_debito',
+    'gastos_tarjeta',
+)
+
+MEDIOS_FLUJO = ('efectivo', 'debito')
+
+
+def _cero():
+    return dict.fromkeys(CAMPOS, Decimal('0'))
+
+
+def _agregados_ingresos():
+    monto = cotizaciones.convertido()
+    return {
+        'ingresos_confirmados': Sum(monto, filter=Q(confirmado=True), default=0),
+        'ingresos_pendientes': Sum(monto, filter=Q(confirmado=False), default=0),
+    }
+
+
+def _agregados_gastos():
+    monto = cotizaciones.convertido()
+    agregados = {
+        'gastos_pagados': Sum(monto, filter=Q(pagado=True), default=0),
+        'gastos_pendientes': Sum(monto, filter=Q(pagado=False), default=0),
+    }
+    for medio, _ in Gasto.MEDIO_PAGO_CHOICES:
+        agregados[f'gastos_{medio}'] = Sum(monto, filter=Q(medio_pago=medio), default=0)
+    return agregados
+
+
+def _agregados_resumen():
+    agregados = {
+        'ingresos_confirmados': Q(movimiento='ingreso', liquidado=True),
+        'ingresos_pendientes': Q(movimiento='ingreso', liquidado=False),
+        'gastos_pagados': Q(movimiento='gasto', liquidado=True),
+        'gastos_pendientes': Q(movimiento='gasto', liquidado=False),
+    }
+    for medio, _ in Gasto.MEDIO_PAGO_CHOICES:
+        agregados[f'gastos_{medio}'] = Q(movimiento='gasto', medio_pago=medio)
+    return {campo: Sum('total', filter=filtro, default=0) for campo, filtro in agregados.items()}
+
+
+def _rango(qs, desde, hasta, campo='fecha'):
+    if desde:
+        qs = qs.filter(**{f'{campo}__gte': desde})
+    if hasta:
+        qs = qs.filter(**{f'{campo}__lte': hasta})
+    return qs
+
+
+def totales(desde=None, hasta=None):
+    """Suma los movimientos con fecha en [desde, hasta] (extremos opcionales)."""
+    resultado = _cero()
+    consultas = (
+        (Ingreso.objects.all(), _agregados_ingresos()),
+        (Gasto.objects.all(), _agregados_gastos()),
+        (IngresoArchivado.objects.all(), _agregados_ingresos()),
+        (GastoArchivado.objects.all(), _agregados_gastos()),
+    )
+    for qs, agregados in consultas:
+        resultado = _sumar(resultado, _rango(qs, desde, hasta).aggregate(**agregados))
+    return resultado
+
+
+def _totales_por_mes(desde, hasta):
+    """Devuelve {mes: totales} para los movimientos en [desde, hasta]."""
+    por_mes = {}
+
+    def acumular(filas):
+        for fila in filas:
+            mes = fila.pop('mes')
+            por_mes[mes] = _sumar(por_mes.get(mes, _cero()), fila)
+
+    consultas = (
+        (Ingreso.objects.all(), _agregados_ingresos()),
+        (Gasto.objects.all(), _agregados_gastos()),
+    )
+    for qs, agregados in consultas:
+        acumular(
+            _rango(qs, desde, hasta)
+            .annotate(mes=TruncMonth('fecha'))
+            .order_by()
+            .values('mes')
+            .annotate(**agregados)
+        )
+    acumular(
+        _rango(ResumenMensual.objects.all(), desde, hasta, campo='mes')
+        .order_by()
+        .values('mes')
+        .annotate(**_agregados_resumen())
+    )
+    return por_mes
+
+
+def _mes_siguiente(mes):
+    return (mes.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _primer_movimiento():
+    fechas = [
+        Ingreso.objects.aggregate(m=Min('fecha'))['m'],
+        Gasto.objects.aggregate(m=Min('fecha'))['m'],
+        ResumenMensual.objects.aggregate(m=Min('mes'))['m'],
+    ]
+    fechas = [f for f in fechas if f]
+    return min(fechas) if fechas else None
+
+
+@transaction.atomic
+def asegurar_corte(mes):
+    """
+    Devuelve el CorteSaldo de `mes`, creando los que falten hasta él.
+
+    Parte del último corte existente anterior a `mes` y completa los meses
+    faltantes con una única consulta agrupada por mes.
+    """
+    mes = mes.replace(day=1)
+    anterior = CorteSaldo.objects.filter(mes__lte=mes).order_by('-mes').first()
+    if anterior and anterior.mes == mes:
+        return anterior
+
+    if anterior:
+        inicio = anterior.mes
+        acumulado = {campo: getattr(anterior, campo) for campo in CAMPOS}
+    else:
+        primero = _primer_movimiento()
+        inicio = min(primero.replace(day=1), mes) if primero else mes
+        acumulado = _cero()
+
+    por_mes = _totales_por_mes(inicio, mes - timedelta(days=1))
+    nuevos = []
+    actual = inicio
+    if anterior:
+        acumulado = _sumar(acumulado, por_mes.get(actual))
+        actual = _mes_siguiente(actual)
+    while actual <= mes:
+        nuevos.append(CorteSaldo(mes=actual, **acumulado))
+        acumulado = _sumar(acumulado, por_mes.get(actual))
+        actual = _mes_siguiente(actual)
+    CorteSaldo.objects.bulk_create(nuevos, ignore_conflicts=True)
+    return CorteSaldo.objects.get(mes=mes)
+
+
+def _sumar(base, extra):
+    if not extra:
+        return dict(base)
+    return {campo: base[campo] + extra.get(campo, 0) for campo in CAMPOS}
+
+
+def saldo_al(fecha):
+    """
+    Acumulado de todos los movimientos con fecha <= `fecha`.
+
+    Retorna:
+        dict con los CAMPOS más 'saldo_confirmado' (cobrado - pagado) y
+        'saldo_flujo' (todos los ingresos - gastos en efectivo/débito, el
+        mismo criterio que el sobrante del dashboard).
+    """
+    mes = fecha.replace(day=1)
+    corte = asegurar_corte(mes)
+    base = {campo: getattr(corte, campo) for campo in CAMPOS}
+    saldo = _sumar(base, totales(mes, fecha))
+    saldo['saldo_confirmado'] = saldo['ingresos_confirmados'] - saldo['gastos_pagados']
+    saldo['saldo_flujo'] = (
+        saldo['ingresos_confirmados']
+        + saldo['ingresos_pendientes']
+        - sum(saldo[f'gastos_{medio}'] for medio in MEDIOS_FLUJO)
+    )
+    return saldo
+
+
+def delta_movimiento(obj, signo=1):
+    """Aporte de un Ingreso/Gasto a los campos del corte, con signo."""
+    # Desde el shell o scripts el monto puede llegar como int o float.
+    monto = Decimal(str(obj.monto or 0))
+    monto = cotizaciones.convertir(monto, obj.moneda, MONEDA_BASE, obj.fecha)
+    monto = monto.quantize(Decimal('0.01')) * signo
+    if isinstance(obj, Ingreso):
+        campo = 'ingresos_confirmados' if obj.confirmado else 'ingresos_pendientes'
+        return {campo: monto}
+    campo = 'gastos_pagados' if obj.pagado else 'gastos_pendientes'
+    return {campo: monto, f'gastos_{obj.medio_pago}': monto}
+
+
+def aplicar_delta(fecha, delta):
+    """Suma `delta` a los cortes posteriores a `fecha` con un solo UPDATE."""
+    delta = {campo: valor for campo, valor in delta.items() if valor}
+    if not delta or fecha is None:
+        return
+    CorteSaldo.objects.filter(mes__gt=fecha).update(
+        **{campo: F(campo) + valor for campo, valor in delta.items()}
+    )
+
+
+def invalidar_desde(fecha):
+    """Descarta los cortes afectados por cambios masivos desde `fecha`."""
+    if fecha is not None:
+        CorteSaldo.objects.filter(mes__gt=fecha).delete()
+
+
+def reconstruir(hasta=None):
+    """Borra y recalcula todos los cortes hasta el mes de `hasta` (hoy)."""
+    hasta = hasta or date.today()
+    with transaction.atomic():
+        CorteSaldo.objects.all().delete()
+        asegurar_corte(hasta)
+    return CorteSaldo.objects.count()
@@ -0,0 +1,89 @@
+"""
+Receptores de señales de los modelos de finanzas.
+
+Mantienen las versiones de cache (ver finanzas.versiones), los cortes de
+saldo (ver finanzas.saldos) y el registro de cambios del dashboard en vivo
+y de la sincronización (ver finanzas.envivo) al día cuando se escriben
+filas por el ORM.
+Las actualizaciones masivas con .update() no disparan señales: quien las
+haga debe invalidar explícitamente.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import envivo, referencias, saldos, versiones
+from .models import Deuda, Entidad, Gasto, Ingreso, Recurrencia, Vencimiento
+
+
+@receiver(post_save, sender=Vencimiento)
+@receiver(post_delete, sender=Vencimiento)
+@receiver(post_save, sender=Recurrencia)
+@receiver(post_delete, sender=Recurrencia)
+def invalidar_vencimientos(sender, **kwargs):
+    versiones.invalidar('vencimientos')
+
+
+@receiver(post_save, sender=Entidad)
+@receiver(post_delete, sender=Entidad)
+@receiver(post_save, sender=Deuda)
+@receiver(post_delete, sender=Deuda)
+def invalidar_referencias(sender, **kwargs):
+    referencias.invalidar()
+    # La agenda muestra el nombre de la deuda y de su entidad.
+    versiones.invalidar('vencimientos')
+
+
+@receiver(pre_save, sender=Ingreso)
+@receiver(pre_save, sender=Gasto)
+def recordar_movimiento_anterior(sender, instance, **kwargs):
+    """Guarda la versión previa del movimiento para calcular el delta."""
+    instance._movimiento_anterior = None
+    if instance.pk:
+        instance._movimiento_anterior = sender.objects.filter(pk=instance.pk).first()
+
+
+@receiver(post_save, sender=Ingreso)
+@receiver(post_save, sender=Gasto)
+def actualizar_cortes_al_guardar(sender, instance, **kwargs):
+    anterior = getattr(instance, '_movimiento_anterior', None)
+    if anterior is not None:
+        saldos.aplicar_delta(anterior.fecha, saldos.delta_movimiento(anterior, -1))
+    saldos.aplicar_delta(instance.fecha, saldos.delta_movimiento(instance))
+    envivo.registrar(
+        sender._meta.model_name,
+        'cambio' if anterior is not None else 'alta',
+        objeto_id=instance.pk,
+        fecha=instance.fecha,
+        fecha_anterior=anterior.fecha if anterior is not None else None,
+    )
+
+
+@receiver(post_delete, sender=Ingreso)
+@receiver(post_delete, sender=Gasto)
+def actualizar_cortes_al_borrar(sender, instance, **kwargs):
+    saldos.aplicar_delta(instance.fecha, saldos.delta_movimiento(instance, -1))
+    envivo.registrar(sender._meta.model_name, 'baja', objeto_id=instance.pk, fecha=instance.fecha)
+
+
+@receiver(post_save, sender=Entidad)
+@receiver(post_save, sender=Deuda)
+@receiver(post_save, sender=Vencimiento)
+def registrar_referencia_guardada(sender, instance, created, **kwargs):
+    envivo.registrar(
+        sender._meta.model_name,
+        'alta' if created else 'cambio',
+        objeto_id=instance.pk,
+        fecha=getattr(instance, 'fecha', None),
+    )
+
+
+@receiver(post_delete, sender=Entidad)
+@receiver(post_delete, sender=Deuda)
+@receiver(post_delete, sender=Vencimiento)
+def registrar_referencia_borrada(sender, instance, **kwargs):
+    envivo.registrar(
+        sender._meta.model_name,
+        'baja',
+        objeto_id=instance.pk,
+        fecha=getattr(instance, 'fecha', None),
+    )
@@ -0,0 +1,296 @@
+"""
+Sincronización incremental para clientes con conexión intermitente.
+
+El cursor es el id de Cambio (ver finanzas.envivo). Un cliente nuevo pide
+la copia completa por páginas (`instantanea`) y se queda con el cursor que
+le devuelve la primera; después pide solo lo cambiado desde su cursor
+(`cambios`), así que el tamaño de la respuesta depende de lo que cambió y
+no del total de datos.
+
+Por cada modelo, `cambios` devuelve:
+    filas:    filas creadas o modificadas (completas).
+    borrados: ids que ya no existen.
+    rango:    solo si hubo escrituras masivas. {'desde', 'ids'}: el cliente
+              borra sus filas con fecha >= desde (o todas, si desde es
+              None) cuyo id no esté en ids.
+Al borrarse una deuda o entidad, el cliente pone en null sus referencias
+(la base lo hace con SET NULL sin dejar Cambio por cada fila).
+
+Los cambios del cliente (`aplicar`) traen el cursor con el que el cliente
+vio la fila por última vez (`base`); si el servidor la modificó después, no
+se aplica y se devuelve la versión actual para que el cliente resuelva.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max, Min, Q
+from django.forms import modelform_factory
+
+from . import envivo
+from .forms import GastoForm, IngresoForm, MonedaForm
+from .models import Cambio, Deuda, Entidad, Gasto, Ingreso, Vencimiento
+
+LIMITE = 500
+LIMITE_MAXIMO = 2000
+MAX_CAMBIOS_CLIENTE = 200
+# Margen sobre el momento del cursor al buscar filas tocadas por escrituras
+# masivas: `actualizado` puede tomarse antes que el Cambio que las anota.
+MARGEN = timedelta(minutes=5)
+
+# nombre en Cambio -> (modelo, campos que se envían)
+MODELOS = {
+    'entidad': (Entidad, ('id', 'nombre', 'tipo')),
+    'deuda': (
+        Deuda,
+        (
+            'id', 'entidad', 'tipo_deuda', 'descripcion', 'monto_total', 'pago_minimo', 'moneda',
+            'fecha_vencimiento', 'proximo_pago', 'estado', 'prioridad',
+            'cuota_mensual_aprox', 'cuotas_restantes', 'notas',
+        ),
+    ),
+    'ingreso': (
+        Ingreso,
+        ('id', 'fecha', 'tipo', 'descripcion', 'monto', 'moneda', 'confirmado', 'actualizado'),
+    ),
+    'gasto': (
+        Gasto,
+        (
+            'id', 'fecha', 'tipo', 'categoria', 'descripcion', 'monto', 'moneda', 'pagado',
+            'medio_pago', 'deuda_relacionada', 'recurrencia', 'fecha_recurrencia',
+            'actualizado',
+        ),
+    ),
+    'vencimiento': (
+        Vencimiento,
+        ('id', 'fecha', 'concepto', 'monto', 'moneda', 'deuda', 'estado', 'notas'),
+    ),
+}
+
+# Ingresos y gastos se validan con los formularios de la app.
+FORMULARIOS = {
+    'entidad': modelform_factory(Entidad, fields=('nombre', 'tipo')),
+    'deuda': modelform_factory(
+        Deuda, form=MonedaForm, fields=[c for c in MODELOS['deuda'][1] if c != 'id']
+    ),
+    'ingreso': IngresoForm,
+    'gasto': GastoForm,
+    'vencimiento': modelform_factory(
+        Vencimiento,
+        form=MonedaForm,
+        fields=('fecha', 'concepto', 'monto', 'moneda', 'deuda', 'estado', 'notas'),
+    ),
+}
+
+
+class CursorVencido(Exception):
+    """El cursor es anterior a los cambios conservados: hace falta copia completa."""
+
+
+def validar_cursor(cursor):
+    """
+    Lanza:
+        CursorVencido si faltan cambios posteriores a `cursor` (purgados por
+        purgar_cambios o una restauración) o si es mayor que el último.
+    """
+    if cursor == 0:
+        return
+    ids = Cambio.objects.aggregate(primero=Min('id'), ultimo=Max('id'))
+    if ids['ultimo'] is None or cursor > ids['ultimo'] or ids['primero'] > cursor + 1:
+        raise CursorVencido(cursor)
+
+
+def _momento(cursor):
+    """Cuándo se anotó el cambio `cursor` (o el anterior más cercano)."""
+    return (
+        Cambio.objects.filter(id__lte=cursor)
+        .order_by('-id')
+        .values_list('creado', flat=True)
+        .first()
+    )
+
+
+def _filas(nombre, qs, limite=None):
+    # El corte va en el SQL (LIMIT): no se trae la tabla entera para una página.
+    return list(qs.order_by('pk').values(*MODELOS[nombre][1])[:limite])
+
+
+def instantanea(token=None, limite=LIMITE):
+    """
+    Una página de la copia completa, recorriendo los modelos por pk.
+
+    Params:
+        token (str): 'siguiente' de la página anterior (None: la primera).
+        limite (int): filas por página.
+
+    Retorna:
+        dict con 'cursor' (desde el que seguir con `cambios`), 'modelos'
+        ({nombre: {'filas'}}) y 'siguiente' (None en la última página).
+
+    Lanza:
+        ValueError si el token no es válido.
+    """
+    nombres = list(MODELOS)
+    if token is None:
+        cursor, indice, ultimo = envivo.cursor_actual(), 0, 0
+    else:
+        cursor, indice, ultimo = (int(parte) for parte in token.split('.'))
+        if not 0 <= indice < len(nombres):
+            raise ValueError('Token de página inválido.')
+    modelos = {}
+    restante = limite
+    while indice < len(nombres) and restante > 0:
+        nombre = nombres[indice]
+        filas = _filas(nombre, MODELOS[nombre][0].objects.filter(pk__gt=ultimo), restante)
+        if filas:
+            modelos[nombre] = {'filas': filas}
+            ultimo = filas[-1]['id']
+            restante -= len(filas)
+        if restante > 0:
+            indice, ultimo = indice + 1, 0
+    siguiente = f'{cursor}.{indice}.{ultimo}' if indice < len(nombres) else None
+    return {'cursor': cursor, 'completo': True, 'modelos': modelos, 'siguiente': siguiente}
+
+
+def cambios(cursor, limite=LIMITE):
+    """
+    Cambios posteriores a `cursor`, hasta `limite` entradas de Cambio.
+
+    Retorna:
+        dict con 'cursor' (el último incluido), 'hay_mas' y 'modelos'.
+
+    Lanza:
+        CursorVencido si el cursor ya no sirve.
+    """
+    validar_cursor(cursor)
+    lote = list(Cambio.objects.filter(id__gt=cursor).order_by('id')[:limite])
+    if not lote:
+        return {'cursor': cursor, 'hay_mas': False, 'modelos': {}}
+
+    ultimas = defaultdict(dict)
+    rangos = {}
+    for cambio in lote:
+        if cambio.modelo not in MODELOS:
+            continue
+        if cambio.accion == 'masivo':
+            previo = rangos.get(cambio.modelo, cambio.fecha)
+            rangos[cambio.modelo] = (
+                None if previo is None or cambio.fecha is None else min(previo, cambio.fecha)
+            )
+        elif cambio.objeto_id is not None:
+            ultimas[cambio.modelo][cambio.objeto_id] = cambio.accion
+
+    momento = _momento(cursor) if cursor else None
+    modelos = {}
+    for nombre, (modelo, campos) in MODELOS.items():
+        acciones = ultimas.get(nombre, {})
+        if not acciones and nombre not in rangos:
+            continue
+        vivos = [pk for pk, accion in acciones.items() if accion != 'baja']
+        filas = _filas(nombre, modelo.objects.filter(pk__in=vivos)) if vivos else []
+        enviados = {fila['id'] for fila in filas}
+        datos = {'borrados': sorted(pk for pk in acciones if pk not in enviados)}
+        if nombre in rangos:
+            desde = rangos[nombre]
+            qs = modelo.objects.all() if desde is None else modelo.objects.filter(fecha__gte=desde)
+            datos['rango'] = {'desde': desde, 'ids': sorted(qs.values_list('pk', flat=True))}
+            tocadas = qs.exclude(pk__in=enviados)
+            if momento is not None and 'actualizado' in campos:
+                tocadas = tocadas.filter(actualizado__gte=momento - MARGEN)
+            filas += _filas(nombre, tocadas)
+        datos['filas'] = filas
+        modelos[nombre] = datos
+    return {'cursor': lote[-1].id, 'hay_mas': len(lote) == limite, 'modelos': modelos}
+
+
+def _modificada_desde(nombre, obj, base):
+    """True si el servidor cambió `obj` después del cursor `base`."""
+    posteriores = Cambio.objects.filter(id__gt=base, modelo=nombre)
+    masivos = Q(accion='masivo', fecha__isnull=True)
+    fecha = getattr(obj, 'fecha', None)
+    if fecha is not None:
+        masivos |= Q(accion='masivo', fecha__lte=fecha)
+    return posteriores.filter(Q(objeto_id=obj.pk) | masivos).exists()
+
+
+def _errores(form):
+    return {
+        campo: [e['message'] for e in lista]
+        for campo, lista in form.errors.get_json_data().items()
+    }
+
+
+def _aplicar_uno(item):
+    nombre = item.get('modelo')
+    accion = item.get('accion')
+    resultado = {'ref': item.get('ref')}
+    if nombre not in MODELOS or accion not in ('alta', 'cambio', 'baja'):
+        errores = {'__all__': ['Modelo o acción inválidos.']}
+        return {**resultado, 'estado': 'error', 'errores': errores}
+    modelo = MODELOS[nombre][0]
+    datos = item.get('datos') or {}
+
+    if accion == 'alta':
+        form = FORMULARIOS[nombre](data=datos)
+        if not form.is_valid():
+            return {**resultado, 'estado': 'error', 'errores': _errores(form)}
+        with transaction.atomic():
+            obj = form.save()
+        return {**resultado, 'estado': 'ok', 'id': obj.pk}
+
+    try:
+        pk, base = int(item['id']), int(item['base'])
+        validar_cursor(base)
+    except (KeyError, TypeError, ValueError):
+        return {**resultado, 'estado': 'error', 'errores': {'__all__': ['Faltan id o base.']}}
+    except CursorVencido:
+        return {**resultado, 'estado': 'conflicto', 'motivo': 'base_vencida'}
+
+    with transaction.atomic():
+        obj = modelo.objects.select_for_update().filter(pk=pk).first()
+        if obj is None:
+            # Borrar algo ya borrado no es un conflicto.
+            if accion == 'baja':
+                return {**resultado, 'estado': 'ok', 'id': pk}
+            return {**resultado, 'estado': 'conflicto', 'motivo': 'borrada', 'id': pk}
+        if _modificada_desde(nombre, obj, base):
+            actual = _filas(nombre, modelo.objects.filter(pk=pk))[0]
+            return {
+                **resultado,
+                'estado': 'conflicto',
+                'motivo': 'modificada',
+                'id': pk,
+                'actual': actual,
+            }
+        if accion == 'baja':
+            obj.delete()
+            return {**resultado, 'estado': 'ok', 'id': pk}
+        form = FORMULARIOS[nombre](data=datos, instance=obj)
+        if not form.is_valid():
+            return {**resultado, 'estado': 'error', 'id': pk, 'errores': _errores(form)}
+        form.save()
+    return {**resultado, 'estado': 'ok', 'id': pk}
+
+
+def aplicar(items):
+    """
+    Aplica los cambios del cliente, cada uno en su propia transacción.
+
+    Params:
+        items (list[dict]): {'modelo', 'accion' ('alta'|'cambio'|'baja'),
+            'id' y 'base' (cambio/baja), 'datos' (campos del formulario),
+            'ref' (opcional, se devuelve tal cual)}.
+
+    Retorna:
+        dict con 'resultados' (estado 'ok', 'error' o 'conflicto' por ítem)
+        y el 'cursor' actual.
+
+    Lanza:
+        ValueError si items no es una lista acotada de objetos.
+    """
+    if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+        raise ValueError('"cambios" debe ser una lista de objetos.')
+    if len(items) > MAX_CAMBIOS_CLIENTE:
+        raise ValueError(f'Máximo {MAX_CAMBIOS_CLIENTE} cambios por envío.')
+    resultados = [_aplicar_uno(item) for item in items]
+    return {'resultados': resultados, 'cursor': envivo.cursor_actual()}
@@ -0,0 +1,350 @@
+"""
+Cálculos del dashboard, en versión sincrónica y asincrónica.
+
+Las series diarias salen de una consulta agrupada por fecha para ingresos y
+otra para gastos (antes eran cuatro agregados por día del mes). El resto de
+los bloques (totales de deuda, totales del mes, gastos pendientes, saldo
+inicial y ocurrencias recurrentes) son independientes entre sí.
+
+`contexto` los corre uno detrás de otro. `acontexto` los lanza a la vez
+con asyncio.gather: cada bloque corre en un hilo propio con su propia
+conexión, así que con una base remota la latencia total se acerca a la del
+bloque más lento en lugar de la suma. El ORM async de Django (aaggregate,
+async for) pasa todas las consultas por un único hilo y no las solaparía.
+"""
+import asyncio
+import calendar
+from datetime import date, timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.db.models import Q, Sum
+
+from . import cotizaciones, inflacion, saldos
+from .models import MONEDA_BASE, Deuda, Gasto, Ingreso
+from .recurrencias import MEDIOS_FLUJO, ocurrencias
+
+ESTADOS_DEUDA_ACTIVA = ('al_dia', 'en_curso')
+DIAS_PENDIENTES = 30
+LIMITE_PENDIENTES = 10
+
+
+def mes_seleccionado(month_param, today):
+    """
+    Interpreta ?month=YYYY-MM acotado a ±24 meses de hoy.
+
+    Retorna:
+        tuple (mes seleccionado, mes mínimo, mes máximo), todos día 1.
+    """
+    min_month = date(today.year - 2, today.month, 1)
+    max_month = date(today.year + 2, today.month, 1)
+    selected_date = date(today.year, today.month, 1)
+    if month_param:
+        try:
+            anio_str, mes_str = month_param.split('-')
+            selected_date = date(int(anio_str), int(mes_str), 1)
+        except Exception:  # noqa: BLE001
+            pass
+    return min(max(selected_date, min_month), max_month), min_month, max_month
+
+
+def fin_de_mes(fecha):
+    return fecha.replace(day=calendar.monthrange(fecha.year, fecha.month)[1])
+
+
+def _montos_por_dia(qs, campo_liquidado, moneda):
+    """{fecha: (liquidado, pendiente)} en `moneda` con una consulta agrupada."""
+    monto = cotizaciones.convertido(moneda)
+    filas = (
+        qs.order_by()
+        .values('fecha')
+        .annotate(
+            liquidado=Sum(monto, filter=Q(**{campo_liquidado: True}), default=0),
+            pendiente=Sum(monto, filter=Q(**{campo_liquidado: False}), default=0),
+        )
+        .values_list('fecha', 'liquidado', 'pendiente')
+    )
+    return {fecha: (liquidado, pendiente) for fecha, liquidado, pendiente in filas}
+
+
+def montos_ingresos(desde, hasta, moneda=MONEDA_BASE):
+    return _montos_por_dia(
+        Ingreso.objects.filter(fecha__range=(desde, hasta)), 'confirmado', moneda
+    )
+
+
+def montos_gastos(desde, hasta, moneda=MONEDA_BASE):
+    return _montos_por_dia(
+        Gasto.objects.filter(fecha__range=(desde, hasta), medio_pago__in=MEDIOS_FLUJO),
+        'pagado',
+        moneda,
+    )
+
+
+def _monto_ocurrencia(ocurrencia, moneda):
+    # Ocurrencias futuras: cotización vigente (en memoria, sin consulta).
+    return cotizaciones.convertir(ocurrencia.monto, ocurrencia.moneda, moneda)
+
+
+def recurrentes_por_dia(desde, hasta, moneda=MONEDA_BASE):
+    """Gastos recurrentes aún no materializados que impactan el flujo, por día."""
+    por_dia = {}
+    for ocurrencia in ocurrencias(desde, hasta):
+        if ocurrencia.impacta_flujo:
+            dia = ocurrencia.fecha.day
+            por_dia[dia] = por_dia.get(dia, 0) + _monto_ocurrencia(ocurrencia, moneda)
+    return por_dia
+
+
+def saldo_inicial(selected_date, moneda=MONEDA_BASE):
+    """Saldo de flujo al cierre del mes anterior, convertido a esa fecha."""
+    fecha = selected_date - timedelta(days=1)
+    saldo = saldos.saldo_al(fecha)['saldo_flujo']
+    return cotizaciones.convertir(saldo, MONEDA_BASE, moneda, fecha)
+
+
+def series_diarias(selected_date, today, ingresos, gastos, recurrentes, inicial):
+    """
+    Arma las series del gráfico a partir de los montos agrupados por fecha.
+
+    Los días futuros no distinguen confirmado/pagado: todo cuenta como
+    pendiente.
+    """
+    series = {
+        'dias_labels': [],
+        'ingresos_confirmados_por_dia': [],
+        'ingresos_pendientes_por_dia': [],
+        'gastos_pagados_por_dia': [],
+        'gastos_pendientes_por_dia': [],
+        'sobrante_por_dia': [],
+    }
+    saldo_acumulado = float(inicial)
+    for dia in range(1, fin_de_mes(selected_date).day + 1):
+        fecha_iter = selected_date.replace(day=dia)
+        ingresos_conf, ingresos_pend = ingresos.get(fecha_iter, (0, 0))
+        gastos_pagados, gastos_pend = gastos.get(fecha_iter, (0, 0))
+        if fecha_iter > today:
+            ingresos_conf, ingresos_pend = 0, ingresos_conf + ingresos_pend
+            gastos_pagados, gastos_pend = 0, gastos_pagados + gastos_pend
+        gastos_pend += recurrentes.get(dia, 0)
+
+        series['dias_labels'].append(dia)
+        series['ingresos_confirmados_por_dia'].append(float(ingresos_conf))
+        series['ingresos_pendientes_por_dia'].append(float(ingresos_pend))
+        series['gastos_pagados_por_dia'].append(float(gastos_pagados))
+        series['gastos_pendientes_por_dia'].append(float(gastos_pend))
+        saldo_acumulado += (
+            float(ingresos_conf + ingresos_pend) - float(gastos_pagados + gastos_pend)
+        )
+        series['sobrante_por_dia'].append(saldo_acumulado)
+    return series
+
+
+def totales_deuda(moneda=MONEDA_BASE):
+    """Saldos de deuda a la cotización vigente (las deudas no tienen fecha)."""
+    return Deuda.objects.aggregate(
+        deuda_total=Sum(
+            cotizaciones.convertido(moneda, 'monto_total', campo_fecha=None),
+            filter=Q(estado__in=ESTADOS_DEUDA_ACTIVA),
+            default=0,
+        ),
+        cuota_fija_total=Sum(
+            cotizaciones.convertido(moneda, 'cuota_mensual_aprox', campo_fecha=None), default=0
+        ),
+    )
+
+
+def totales_mes_actual(today, moneda=MONEDA_BASE):
+    """Ingresos y gastos de flujo del mes de hoy (incluye recurrentes pendientes)."""
+    inicio, fin = today.replace(day=1), fin_de_mes(today)
+    monto = cotizaciones.convertido(moneda)
+    ingresos_mes = Ingreso.objects.filter(fecha__range=(inicio, fin)).aggregate(
+        total=Sum(monto, default=0)
+    )['total']
+    gastos_mes = Gasto.objects.filter(
+        fecha__range=(inicio, fin), medio_pago__in=MEDIOS_FLUJO
+    ).aggregate(total=Sum(monto, default=0))['total']
+    gastos_mes += sum(
+        _monto_ocurrencia(o, moneda) for o in ocurrencias(inicio, fin) if o.impacta_flujo
+    )
+    return {'ingresos_mes': ingresos_mes, 'gastos_mes': gastos_mes}
+
+
+def gastos_pendientes(today):
+    """Próximos gastos de flujo impagos (reales y recurrentes) a DIAS_PENDIENTES días."""
+    hasta = today + timedelta(days=DIAS_PENDIENTES)
+    reales = list(
+        Gasto.objects.filter(
+            pagado=False,
+            fecha__range=(today, hasta),
+            medio_pago__in=MEDIOS_FLUJO,
+        ).order_by('fecha')[:LIMITE_PENDIENTES]
+    )
+    reales += [o for o in ocurrencias(today, hasta) if o.impacta_flujo]
+    return sorted(reales, key=lambda g: g.fecha)[:LIMITE_PENDIENTES]
+
+
+def _a_pesos_constantes(partes, selected_date, today, base):
+    """
+    Lleva los bloques a pesos del mes `base`: un factor por bloque (las
+    series del mes seleccionado, el saldo al cierre del anterior y los
+    totales del mes actual), aplicado sobre los montos ya agrupados.
+    """
+    del_mes = inflacion.factor(selected_date, base)
+    anterior = inflacion.factor(selected_date - timedelta(days=1), base)
+    actual = inflacion.factor(today, base)
+    return {
+        **partes,
+        'ingresos': {f: (a * del_mes, b * del_mes) for f, (a, b) in partes['ingresos'].items()},
+        'gastos': {f: (a * del_mes, b * del_mes) for f, (a, b) in partes['gastos'].items()},
+        'recurrentes': {dia: monto * del_mes for dia, monto in partes['recurrentes'].items()},
+        'saldo_inicial': partes['saldo_inicial'] * anterior,
+        'deuda': {clave: monto * actual for clave, monto in partes['deuda'].items()},
+        'mes': {clave: monto * actual for clave, monto in partes['mes'].items()},
+    }
+
+
+def _armar(selected_date, min_month, max_month, today, partes, moneda, base=None):
+    # El índice de precios es de pesos: en otra moneda los montos quedan nominales.
+    if moneda != MONEDA_BASE:
+        base = None
+    if base is not None:
+        partes = _a_pesos_constantes(partes, selected_date, today, base)
+    deuda = partes['deuda']
+    mes = partes['mes']
+    ingresos_mes = mes['ingresos_mes']
+    relacion_cuotas_ingresos = 0
+    if ingresos_mes > 0:
+        relacion_cuotas_ingresos = (deuda['cuota_fija_total'] / ingresos_mes) * 100
+    mes_actual = (selected_date.year, selected_date.month) == (today.year, today.month)
+    dia_hoy = today.day if mes_actual else None
+    return {
+        'deuda_total': deuda['deuda_total'],
+        'cuota_fija_total': deuda['cuota_fija_total'],
+        'ingresos_mes': ingresos_mes,
+        'gastos_mes': mes['gastos_mes'],
+        'saldo_mes': ingresos_mes - mes['gastos_mes'],
+        'saldo_inicial': partes['saldo_inicial'],
+        'gastos_pendientes': partes['pendientes'],
+        'relacion_cuotas_ingresos': relacion_cuotas_ingresos,
+        **series_diarias(
+            selected_date,
+            today,
+            partes['ingresos'],
+            partes['gastos'],
+            partes['recurrentes'],
+            partes['saldo_inicial'],
+        ),
+        'month_str': f'{selected_date.year:04d}-{selected_date.month:02d}',
+        'month_min': f'{min_month.year:04d}-{min_month.month:02d}',
+        'month_max': f'{max_month.year:04d}-{max_month.month:02d}',
+        'dia_hoy': dia_hoy,
+        'moneda': moneda,
+        'simbolo': cotizaciones.SIMBOLOS[moneda],
+        'base': f'{base:%Y-%m}' if base else '',
+    }
+
+
+def _bloques(selected_date, today, moneda):
+    """Bloques independientes del dashboard: nombre -> (función, argumentos)."""
+    fin = fin_de_mes(selected_date)
+    return {
+        'ingresos': (montos_ingresos, (selected_date, fin, moneda)),
+        'gastos': (montos_gastos, (selected_date, fin, moneda)),
+        'recurrentes': (recurrentes_por_dia, (selected_date, fin, moneda)),
+        'saldo_inicial': (saldo_inicial, (selected_date, moneda)),
+        'deuda': (totales_deuda, (moneda,)),
+        'mes': (totales_mes_actual, (today, moneda)),
+        'pendientes': (gastos_pendientes, (today,)),
+    }
+
+
+def contexto(month_param=None, today=None, moneda=MONEDA_BASE, base=None):
+    """
+    Contexto completo del dashboard, calculado en secuencia.
+
+    Params:
+        month_param (str): valor de ?month=YYYY-MM (opcional).
+        today (date): fecha de referencia (hoy por defecto).
+        moneda (str): moneda de los totales y series (ver finanzas.cotizaciones).
+        base (date): mes base para expresar los pesos en términos reales
+            (ver finanzas.inflacion); None para montos nominales.
+    """
+    today = today or date.today()
+    selected_date, min_month, max_month = mes_seleccionado(month_param, today)
+    partes = {
+        nombre: funcion(*args)
+        for nombre, (funcion, args) in _bloques(selected_date, today, moneda).items()
+    }
+    return _armar(selected_date, min_month, max_month, today, partes, moneda, base)
+
+
+def series_y_kpis(selected_date, today=None, moneda=MONEDA_BASE, base=None):
+    """
+    Contexto del dashboard sin la lista de gastos pendientes.
+
+    Lo usa el dashboard en vivo para recalcular series y KPIs de un mes
+    después de un cambio.
+    """
+    today = today or date.today()
+    bloques = _bloques(selected_date, today, moneda)
+    del bloques['pendientes']
+    partes = {nombre: funcion(*args) for nombre, (funcion, args) in bloques.items()}
+    partes['pendientes'] = []
+    return _armar(selected_date, selected_date, selected_date, today, partes, moneda, base)
+
+
+def con_conexion_propia(funcion):
+    """
+    Corre `funcion` en un hilo del pool con la conexión de ese hilo.
+
+    Igual que en cada request, close_old_connections descarta las conexiones
+    vencidas (CONN_MAX_AGE) o rotas; las demás quedan abiertas para el
+    próximo uso del hilo.
+    """
+
+    def envoltura(*args):
+        close_old_connections()
+        try:
+            return funcion(*args)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(envoltura, thread_sensitive=False)
+
+
+async def acontexto(month_param=None, today=None, moneda=MONEDA_BASE, base=None):
+    """Igual que `contexto`, pero con los bloques consultados en paralelo."""
+    today = today or date.today()
+    selected_date, min_month, max_month = mes_seleccionado(month_param, today)
+    bloques = _bloques(selected_date, today, moneda)
+    resultados = await asyncio.gather(
+        *(con_conexion_propia(funcion)(*args) for funcion, args in bloques.values())
+    )
+    partes = dict(zip(bloques, resultados))
+    # Con base, _armar lee el índice de precios (cacheado, pero puede consultar).
+    return await sync_to_async(_armar)(
+        selected_date, min_month, max_month, today, partes, moneda, base
+    )
+
+
+def kpis(ctx):
+    """Subconjunto serializable de un contexto del dashboard para la API."""
+    claves = (
+        'deuda_total', 'cuota_fija_total', 'ingresos_mes', 'gastos_mes',
+        'saldo_mes', 'saldo_inicial', 'relacion_cuotas_ingresos',
+    )
+    datos = {clave: float(ctx[clave]) for clave in claves}
+    datos['mes'] = ctx['month_str']
+    datos['moneda'] = ctx['moneda']
+    datos['base'] = ctx['base'] or None
+    datos['gastos_pendientes'] = [
+        {
+            'fecha': g.fecha.isoformat(),
+            'descripcion': g.descripcion,
+            'monto': float(g.monto),
+            'moneda': g.moneda,
+        }
+        for g in ctx['gastos_pendientes']
+    ]
+    return datos
@@ -1,3 +1,1078 @@
-from django.test import TestCase
+import io
+import json
+import os
+import runpy
+import tempfile
+import time
+import unittest
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.cached_db import SessionStore
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.models import Sum
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    amortizacion,
+    conciliacion,
+    cotizaciones,
+    duplicados,
+    envivo,
+    importacion,
+    inflacion,
+    riesgo,
+    sincronizacion,
+    tablero,
+)
+from .agenda import agenda
+from .archivo import archivar, fecha_corte
+from .importacion import COLUMNAS
+from .middleware import COOKIE_PRIMARIA
+from .models import (
+    Deuda,
+    Entidad,
+    Gasto,
+    GastoArchivado,
+    Ingreso,
+    IndicePrecios,
+    IngresoArchivado,
+    Recurrencia,
+    TipoCambio,
+    Vencimiento,
+)
+from .recurrencias import expandir_fechas, materializar, ocurrencias
+from .routers import ALIAS_REPLICA, RouterReplica, usar_replica
+from .respaldo import RespaldoError, crear_respaldo, restaurar_respaldo
+from .saldos import reconstruir, saldo_al
+
+
+def _cargar_datos():
+    banco = Entidad.objects.create(nombre='Banco "Uno"', tipo='banco')
+    tienda = Entidad.objects.create(nombre='Tienda, S.A.', tipo='tienda')
+    prestamo = Deuda.objects.create(
+        entidad=banco,
+        tipo_deuda='prestamo',
+        descripcion='Préstamo personal',
+        monto_total=Decimal('150000.50'),
+        pago_minimo=Decimal('12000'),
+        fecha_vencimiento=date(2026, 3, 10),
+        cuota_mensual_aprox=Decimal('12500.25'),
+        cuotas_restantes=12,
+        prioridad='alta',
+        notas='Línea 1\nLínea 2',
+    )
+    Deuda.objects.create(
+        entidad=tienda,
+        tipo_deuda='otro',
+        descripcion='Compra en cuotas',
+        monto_total=Decimal('1000'),
+        pago_minimo=Decimal('0'),
+    )
+    Ingreso.objects.create(
+        fecha=date(2025, 1, 5),
+        tipo='sueldo',
+        descripcion='Sueldo',
+        monto=Decimal('500000'),
+        confirmado=True,
+    )
+    Ingreso.objects.create(
+        fecha=date(2025, 1, 5),
+        tipo='extra',
+        descripcion='Venta; varios',
+        monto=Decimal('1234.56'),
+        confirmado=False,
+    )
+    Gasto.objects.create(
+        fecha=date(2025, 1, 6),
+        tipo='fijo',
+        categoria='servicios',
+        descripcion='Luz',
+        monto=Decimal('8000'),
+        pagado=True,
+    )
+    Gasto.objects.create(
+        fecha=date(2025, 1, 7),
+        tipo='deuda',
+        categoria='deudas',
+        descripcion='Cuota préstamo',
+        monto=Decimal('12500.25'),
+        pagado=False,
+        deuda_relacionada=prestamo,
+    )
+    Vencimiento.objects.create(
+        fecha=date(2025, 1, 10), concepto='Cuota "enero"', monto=Decimal('12500.25'), deuda=prestamo
+    )
+    Vencimiento.objects.create(
+        fecha=date(2025, 1, 10), concepto='Patente', monto=Decimal('3000'), estado='pagado'
+    )
+
+
+def _borrar_datos():
+    for modelo in (Vencimiento, Gasto, Ingreso, Deuda, Entidad):
+        modelo.objects.all().delete()
+
+
+def _leer(directorio):
+    return {nombre: (Path(directorio) / nombre).read_bytes() for nombre in COLUMNAS}
+
+
+def _exportar(directorio, modo='orm'):
+    call_command('exportar_csv', directorio=directorio, modo=modo, stdout=io.StringIO())
+    return _leer(directorio)
+
+
+class ExportarImportarCSVTests(TestCase):
+    def setUp(self):
+        _cargar_datos()
+
+    def _exportar(self, directorio, modo='orm'):
+        return _exportar(directorio, modo)
+
+    def _importar(self, directorio, modo='orm'):
+        with mock.patch('builtins.print'):
+            call_command('importar_csv', directorio=directorio, modo=modo)
+
+    def test_ida_y_vuelta_produce_los_mismos_archivos(self):
+        with tempfile.TemporaryDirectory() as primero, tempfile.TemporaryDirectory() as segundo:
+            originales = self._exportar(primero)
+            _borrar_datos()
+            self._importar(primero)
+            self.assertEqual(self._exportar(segundo), originales)
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'COPY requiere PostgreSQL')
+    def test_copy_igual_que_orm(self):
+        with tempfile.TemporaryDirectory() as orm, tempfile.TemporaryDirectory() as copy:
+            self.assertEqual(self._exportar(copy, 'copy'), self._exportar(orm, 'orm'))
+            originales = _leer(orm)
+            _borrar_datos()
+            self._importar(copy, 'copy')
+            self.assertEqual(self._exportar(orm, 'orm'), originales)
+
+
+class RecurrenciasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_fin_de_mes_se_ajusta_al_largo_del_mes(self):
+        fechas = expandir_fechas(
+            'mensual', 1, date(2024, 1, 31), None, date(2024, 1, 1), date(2024, 4, 30)
+        )
+        self.assertEqual(
+            fechas, (date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30))
+        )
+
+    def test_fecha_fin_corta_la_expansion(self):
+        fechas = expandir_fechas(
+            'mensual', 1, date(2025, 1, 15), date(2025, 3, 14), date(2025, 1, 1), date(2025, 12, 31)
+        )
+        self.assertEqual(fechas, (date(2025, 1, 15), date(2025, 2, 15)))
+        semanales = expandir_fechas(
+            'semanal', 2, date(2025, 1, 1), None, date(2025, 1, 10), date(2025, 2, 1)
+        )
+        self.assertEqual(semanales, (date(2025, 1, 15), date(2025, 1, 29)))
+
+    def test_materializar_es_idempotente(self):
+        regla = Recurrencia.objects.create(
+            fecha_inicio=date(2025, 1, 10),
+            concepto='Alquiler',
+            monto=Decimal('1000'),
+            categoria='vivienda',
+        )
+        gasto, creado = materializar(regla, date(2025, 2, 10), pagado=True)
+        otra_vez, creado_otra_vez = materializar(regla, date(2025, 2, 10), pagado=True)
+        self.assertTrue(creado)
+        self.assertFalse(creado_otra_vez)
+        self.assertEqual(otra_vez.pk, gasto.pk)
+        self.assertEqual(Gasto.objects.filter(recurrencia=regla).count(), 1)
+        fechas = [o.fecha for o in ocurrencias(date(2025, 1, 1), date(2025, 3, 31))]
+        self.assertEqual(fechas, [date(2025, 1, 10), date(2025, 3, 10)])
+        with self.assertRaises(ValueError):
+            materializar(regla, date(2025, 2, 11))
+
+    def test_volver_a_materializar_renueva_actualizado(self):
+        regla = Recurrencia.objects.create(
+            fecha_inicio=date(2025, 1, 10), concepto='Alquiler', monto=Decimal('1000')
+        )
+        gasto, _ = materializar(regla, date(2025, 2, 10))
+        antes = Gasto.objects.get(pk=gasto.pk).actualizado
+        materializar(regla, date(2025, 2, 10), pagado=True)
+        self.assertGreater(Gasto.objects.get(pk=gasto.pk).actualizado, antes)
+
+    def test_pagar_vencimiento_recurrente_vuelve_a_vencimientos(self):
+        regla = Recurrencia.objects.create(
+            destino='vencimiento',
+            fecha_inicio=date(2025, 1, 10),
+            concepto='Patente',
+            monto=Decimal('300'),
+        )
+        self.client.force_login(get_user_model().objects.create_user('prueba'))
+        respuesta = self.client.post(
+            reverse('finanzas:pagar_ocurrencia', args=[regla.pk, '2025-02-10'])
+        )
+        self.assertRedirects(
+            respuesta, reverse('finanzas:vencimientos'), fetch_redirect_response=False
+        )
+        self.assertEqual(Vencimiento.objects.get(recurrencia=regla).estado, 'pagado')
+
+
+class AgendaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_renombrar_entidad_invalida_la_agenda(self):
+        banco = Entidad.objects.create(nombre='Banco Viejo', tipo='banco')
+        deuda = Deuda.objects.create(
+            entidad=banco, tipo_deuda='tarjeta', monto_total=Decimal('500')
+        )
+        hoy = date.today()
+        Vencimiento.objects.create(fecha=hoy, concepto='Resumen', monto=Decimal('500'), deuda=deuda)
+        dias = agenda(hoy, hoy)
+        self.assertEqual(dias[0]['items'][0]['entidad'], 'Banco Viejo')
+        self.assertEqual(dias[0]['total'], '500.00')
+        banco.nombre = 'Banco Nuevo'
+        banco.save()
+        self.assertEqual(agenda(hoy, hoy)[0]['items'][0]['entidad'], 'Banco Nuevo')
+
+
+def _saldo_a_mano(fecha):
+    """saldo_flujo y saldo_confirmado sumando fila por fila (tablas calientes y archivo)."""
+    ingresos = [
+        i for modelo in (Ingreso, IngresoArchivado) for i in modelo.objects.filter(fecha__lte=fecha)
+    ]
+    gastos = [
+        g for modelo in (Gasto, GastoArchivado) for g in modelo.objects.filter(fecha__lte=fecha)
+    ]
+    return {
+        'saldo_flujo': (
+            sum(i.monto for i in ingresos)
+            - sum(g.monto for g in gastos if g.medio_pago in ('efectivo', 'debito'))
+        ),
+        'saldo_confirmado': (
+            sum(i.monto for i in ingresos if i.confirmado)
+            - sum(g.monto for g in gastos if g.pagado)
+        ),
+    }
+
+
+class SaldosTests(TestCase):
+    FECHAS = (date(2025, 1, 31), date(2025, 2, 14), date(2025, 3, 31), date(2025, 4, 30))
+
+    def setUp(self):
+        cache.clear()
+        self.sueldo = Ingreso.objects.create(
+            fecha=date(2025, 1, 5), tipo='sueldo', monto=Decimal('1000'), confirmado=True
+        )
+        self.extra = Ingreso.objects.create(
+            fecha=date(2025, 2, 10), tipo='extra', monto=Decimal('250.50')
+        )
+        self.luz = Gasto.objects.create(
+            fecha=date(2025, 1, 20),
+            tipo='fijo',
+            categoria='servicios',
+            monto=Decimal('80'),
+            pagado=True,
+        )
+        self.super = Gasto.objects.create(
+            fecha=date(2025, 3, 3),
+            tipo='variable',
+            categoria='super',
+            monto=Decimal('120.25'),
+            medio_pago='debito',
+        )
+        Gasto.objects.create(
+            fecha=date(2025, 3, 15),
+            tipo='variable',
+            categoria='ropa',
+            monto=Decimal('300'),
+            medio_pago='tarjeta',
+        )
+
+    def _comparar(self):
+        for fecha in self.FECHAS:
+            saldo = saldo_al(fecha)
+            esperado = _saldo_a_mano(fecha)
+            self.assertEqual(saldo['saldo_flujo'], esperado['saldo_flujo'], fecha)
+            self.assertEqual(saldo['saldo_confirmado'], esperado['saldo_confirmado'], fecha)
+
+    def test_cortes_siguen_a_ediciones_y_bajas(self):
+        self._comparar()
+        self.luz.monto = Decimal('95.10')
+        self.luz.medio_pago = 'tarjeta'
+        self.luz.save()
+        self.extra.fecha = date(2025, 4, 2)
+        self.extra.confirmado = True
+        self.extra.save()
+        self.super.delete()
+        self._comparar()
+
+    def test_montos_int_y_float_desde_el_shell(self):
+        self._comparar()
+        Gasto.objects.create(fecha=date(2025, 1, 25), tipo='variable', categoria='super', monto=100)
+        Ingreso.objects.create(fecha=date(2025, 2, 1), tipo='extra', monto=100.5, confirmado=True)
+        self._comparar()
+
+
+class ArchivoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_archivar_no_cambia_los_saldos(self):
+        viejo = fecha_corte(30)
+        Ingreso.objects.create(fecha=viejo, tipo='sueldo', monto=Decimal('900'), confirmado=True)
+        Gasto.objects.create(
+            fecha=viejo + timedelta(days=3),
+            tipo='fijo',
+            categoria='luz',
+            monto=Decimal('70.30'),
+            pagado=True,
+        )
+        Gasto.objects.create(
+            fecha=viejo + timedelta(days=40),
+            tipo='variable',
+            categoria='super',
+            monto=Decimal('55'),
+        )
+        Gasto.objects.create(
+            fecha=date.today(), tipo='variable', categoria='super', monto=Decimal('12')
+        )
+        fechas = (viejo + timedelta(days=10), viejo + timedelta(days=60), date.today())
+        antes = [saldo_al(fecha) for fecha in fechas]
+
+        resultado = archivar(meses=25)
+
+        self.assertEqual((resultado['gastos'], resultado['ingresos']), (2, 1))
+        self.assertEqual(Gasto.objects.count(), 1)
+        # Con los cortes existentes y reconstruidos desde ResumenMensual.
+        for _ in range(2):
+            for fecha, saldo in zip(fechas, antes):
+                self.assertEqual(
+                    saldo_al(fecha)['saldo_flujo'], _saldo_a_mano(fecha)['saldo_flujo'], fecha
+                )
+                self.assertEqual(
+                    saldo_al(fecha)['saldo_confirmado'], saldo['saldo_confirmado'], fecha
+                )
+            reconstruir()
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'Prueba del respaldo de SQLite')
+class RespaldoTests(TransactionTestCase):
+    def test_respaldo_y_restauracion_devuelven_los_mismos_datos(self):
+        _cargar_datos()
+        with tempfile.TemporaryDirectory() as directorio:
+            originales = _exportar(Path(directorio) / 'antes')
+            archivo = Path(directorio) / 'respaldo.tar.gz'
+            crear_respaldo(archivo)
+            _borrar_datos()
+            Gasto.objects.create(
+                fecha=date(2025, 2, 1), tipo='variable', categoria='extra', monto=Decimal('1')
+            )
+
+            restaurar_respaldo(archivo)
+
+            self.assertEqual(_exportar(Path(directorio) / 'despues'), originales)
+
+    def test_no_restaura_sobre_otras_migraciones(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            archivo = Path(directorio) / 'respaldo.tar.gz'
+            crear_respaldo(archivo)
+            with mock.patch(
+                'finanzas.respaldo._migraciones', return_value={'finanzas': '9999_futura'}
+            ):
+                with self.assertRaises(RespaldoError):
+                    restaurar_respaldo(archivo)
+
+
+class ImportacionStreamingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _cargar_datos()
+        self.directorio = tempfile.TemporaryDirectory()
+        self.originales = _exportar(Path(self.directorio.name) / 'antes')
+        _borrar_datos()
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def _despues(self):
+        return _exportar(Path(self.directorio.name) / 'despues')
+
+    def test_subida_de_csv(self):
+        self.client.force_login(get_user_model().objects.create_user('prueba'))
+        subidas = [
+            SimpleUploadedFile(nombre, contenido) for nombre, contenido in self.originales.items()
+        ]
+        self.client.post(
+            reverse('finanzas:importar_exportar'), {'import': '1', 'csv_files': subidas}
+        )
+        self.assertEqual(self._despues(), self.originales)
+
+    def test_zip_en_lotes_chicos(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zipf:
+            for nombre, contenido in self.originales.items():
+                zipf.writestr(f'exports/{nombre}', contenido)
+        buffer.seek(0)
+        zipf, miembros = importacion.miembros_zip(buffer)
+        with zipf:
+            resultados = importacion.importar(miembros, lote=1)
+        self.assertEqual(resultados['gastos.csv']['creados'], 2)
+        self.assertFalse(any(resultado['errores'] for resultado in resultados.values()))
+        self.assertEqual(self._despues(), self.originales)
+
+
+class KpisTests(TransactionTestCase):
+    # Los bloques del dashboard async corren en hilos con su propia conexión:
+    # los datos tienen que estar confirmados para que los vean.
+    def setUp(self):
+        cache.clear()
+
+    def test_kpis_async_igual_que_el_contexto_secuencial(self):
+        _cargar_datos()
+        Gasto.objects.create(
+            fecha=date.today(), tipo='variable', categoria='super', monto=Decimal('42.50')
+        )
+        Ingreso.objects.create(
+            fecha=date.today(), tipo='sueldo', monto=Decimal('1000'), confirmado=True
+        )
+        self.client.force_login(get_user_model().objects.create_user('prueba'))
+        respuesta = self.client.get(reverse('finanzas:kpis'), {'series': '1'})
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        esperado = tablero.kpis(tablero.contexto())
+        for clave in ('deuda_total', 'ingresos_mes', 'gastos_mes', 'saldo_mes', 'saldo_inicial'):
+            self.assertEqual(datos[clave], esperado[clave], clave)
+        self.assertEqual(datos['gastos_mes'], 42.5)
+        self.assertEqual(len(datos['sobrante_por_dia']), len(datos['dias_labels']))
+
+
+class EnVivoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_delta_cubre_los_dias_tocados_y_avanza_el_cursor(self):
+        mes = date.today().replace(day=1)
+        cursor = envivo.cursor_actual()
+        gasto = Gasto.objects.create(
+            fecha=mes + timedelta(days=4), tipo='variable', categoria='super', monto=Decimal('30')
+        )
+        gasto.fecha = mes + timedelta(days=9)
+        gasto.save()
+
+        cambios = envivo.cambios_desde(cursor)
+        nuevo = envivo.cursor_actual()
+        self.assertEqual([c.accion for c in cambios], ['alta', 'cambio'])
+        self.assertEqual(cambios[-1].id, nuevo)
+        datos = envivo.delta(mes, cambios, nuevo)
+        self.assertEqual(sorted(datos['dias']), [5, 10])
+        self.assertEqual(datos['dias'][5]['gastos_pendientes_por_dia'], 0)
+        self.assertEqual(datos['dias'][10]['gastos_pendientes_por_dia'], 30)
+        self.assertEqual(datos['sobrante_desde'], 5)
+        self.assertEqual(len(datos['sobrante']), tablero.fin_de_mes(mes).day - 4)
+        self.assertEqual(datos['kpis']['gastos_mes'], 30)
+
+        self.assertIn(f'id: {nuevo}\n', envivo.respuesta_unica(mes, cursor))
+        self.assertEqual(envivo.respuesta_unica(mes, nuevo), f'retry: {envivo.REINTENTO_MS}\n\n')
+
+
+class FragmentosListasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['template_fragments'].clear()
+        self.client.force_login(get_user_model().objects.create_user('prueba'))
+        self.luz = Gasto.objects.create(
+            fecha=date.today(),
+            tipo='fijo',
+            categoria='servicios',
+            descripcion='Luz',
+            monto=Decimal('80'),
+        )
+        self.gas = Gasto.objects.create(
+            fecha=date.today(),
+            tipo='fijo',
+            categoria='servicios',
+            descripcion='Gas',
+            monto=Decimal('60'),
+        )
+
+    def test_editar_una_fila_renueva_su_fragmento(self):
+        url = reverse('finanzas:lista_gastos')
+        self.assertContains(self.client.get(url), 'Luz')
+        self.luz.descripcion = 'Electricidad'
+        self.luz.save()
+        respuesta = self.client.get(url)
+        self.assertContains(respuesta, 'Electricidad')
+        self.assertNotContains(respuesta, 'Luz')
+
+    def test_marcar_pagados_solo_escribe_las_filas_que_cambian(self):
+        antes = Gasto.objects.get(pk=self.gas.pk).actualizado
+        self.client.post(reverse('finanzas:lista_gastos'), {'pagado': [self.luz.pk]})
+        self.assertTrue(Gasto.objects.get(pk=self.luz.pk).pagado)
+        self.assertEqual(Gasto.objects.get(pk=self.gas.pk).actualizado, antes)
+        self.assertNotContains(self.client.get(reverse('finanzas:lista_gastos')), 'Luz')
+
+
+class AdminTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(
+            get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x')
+        )
+
+    def test_accion_masiva_mantiene_los_saldos(self):
+        fecha = date(2025, 1, 10)
+        gastos = [
+            Gasto.objects.create(
+                fecha=fecha, tipo='fijo', categoria='servicios', monto=Decimal(monto)
+            )
+            for monto in ('10', '20.50')
+        ]
+        saldo_al(date(2025, 3, 31))
+        url = reverse('admin:finanzas_gasto_changelist')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.post(
+            url, {'action': 'marcar_pagados', '_selected_action': [g.pk for g in gastos]}
+        )
+        self.assertEqual(Gasto.objects.filter(pagado=True).count(), 2)
+        self.assertEqual(saldo_al(date(2025, 3, 31))['gastos_pagados'], Decimal('30.50'))
+
+
+class ReferenciasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_autocompletado_sin_acentos_y_al_dia(self):
+        banco = Entidad.objects.create(nombre='Banco Nación', tipo='banco')
+        tarjeta = Deuda.objects.create(
+            entidad=banco, tipo_deuda='tarjeta', monto_total=Decimal('100')
+        )
+        Deuda.objects.create(entidad=banco, tipo_deuda='servicio', monto_total=Decimal('50'))
+        self.client.force_login(get_user_model().objects.create_user('prueba'))
+        url = reverse('finanzas:buscar_deudas')
+        resultados = self.client.get(url, {'q': 'nacion tarj'}).json()['resultados']
+        self.assertEqual(resultados, [{'id': tarjeta.pk, 'texto': str(tarjeta)}])
+        banco.nombre = 'Banco Sur'
+        banco.save()
+        self.assertEqual(self.client.get(url, {'q': 'nacion'}).json()['resultados'], [])
+        self.assertEqual(
+            self.client.get(url, {'q': 'sur'}).json()['resultados'][0]['id'], tarjeta.pk
+        )
+
+
+class CargaRapidaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(get_user_model().objects.create_user('prueba'))
+        self.url = reverse('finanzas:cargar_movimientos')
+
+    def _cargar(self, cuerpo, clave):
+        return self.client.post(
+            self.url,
+            json.dumps(cuerpo),
+            content_type='application/json',
+            headers={'Idempotency-Key': clave},
+        )
+
+    def test_misma_clave_repite_la_respuesta_y_otro_cuerpo_da_422(self):
+        cuerpo = {
+            'gastos': [{
+                'fecha': '2025-03-01', 'tipo': 'variable', 'categoria': 'super', 'monto': '25.10',
+                'medio_pago': 'debito',
+            }],
+            'ingresos': [{'fecha': '2025-03-01', 'tipo': 'extra', 'monto': '100'}],
+        }
+        primera = self._cargar(cuerpo, 'carga-1')
+        self.assertEqual(primera.status_code, 201)
+        repetida = self._cargar(cuerpo, 'carga-1')
+        self.assertEqual(repetida.status_code, 201)
+        self.assertEqual(repetida.json(), primera.json())
+        self.assertEqual(repetida['Idempotent-Replayed'], 'true')
+        self.assertEqual((Gasto.objects.count(), Ingreso.objects.count()), (1, 1))
+
+        cuerpo['gastos'][0]['monto'] = '30'
+        self.assertEqual(self._cargar(cuerpo, 'carga-1').status_code, 422)
+        self.assertEqual(Gasto.objects.get().monto, Decimal('25.10'))
+
+
+class SincronizacionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        hoy = date.today()
+        self.viejo = Gasto.objects.create(
+            fecha=hoy - timedelta(days=20), tipo='fijo', categoria='luz', monto=Decimal('10')
+        )
+        self.nuevo = Gasto.objects.create(
+            fecha=hoy, tipo='fijo', categoria='gas', monto=Decimal('20')
+        )
+        self.cursor = envivo.cursor_actual()
+
+    def test_cambio_masivo_manda_el_rango_y_las_filas_tocadas(self):
+        Gasto.objects.filter(pk=self.nuevo.pk).update(pagado=True, actualizado=timezone.now())
+        envivo.registrar_masivo('gasto', self.nuevo.fecha)
+        borrado = self.viejo.pk
+        self.viejo.delete()
+
+        datos = sincronizacion.cambios(self.cursor)
+
+        gastos = datos['modelos']['gasto']
+        self.assertEqual(datos['cursor'], envivo.cursor_actual())
+        self.assertEqual(gastos['rango'], {'desde': self.nuevo.fecha, 'ids': [self.nuevo.pk]})
+        self.assertEqual(gastos['borrados'], [borrado])
+        self.assertEqual([(f['id'], f['pagado']) for f in gastos['filas']], [(self.nuevo.pk, True)])
+        self.assertEqual(sincronizacion.cambios(datos['cursor'])['modelos'], {})
+
+    def test_cambio_sobre_fila_modificada_en_el_servidor_es_conflicto(self):
+        datos = {
+            'fecha': self.viejo.fecha.isoformat(), 'tipo': 'fijo', 'medio_pago': 'efectivo',
+            'categoria': 'luz', 'monto': '15', 'pagado': 'on',
+        }
+        self.viejo.monto = Decimal('12')
+        self.viejo.save()
+        item = {
+            'modelo': 'gasto',
+            'accion': 'cambio',
+            'id': self.viejo.pk,
+            'base': self.cursor,
+            'datos': datos,
+            'ref': 'a',
+        }
+
+        conflicto = sincronizacion.aplicar([item])['resultados'][0]
+        self.assertEqual((conflicto['estado'], conflicto['motivo']), ('conflicto', 'modificada'))
+        self.assertEqual(Decimal(conflicto['actual']['monto']), Decimal('12'))
+
+        resultado = sincronizacion.aplicar([{**item, 'base': envivo.cursor_actual()}])
+        self.assertEqual(resultado['resultados'][0]['estado'], 'ok')
+        self.assertEqual(Gasto.objects.get(pk=self.viejo.pk).monto, Decimal('15'))
+
+    def test_instantanea_pagina_con_limit_en_la_consulta(self):
+        with CaptureQueriesContext(connection) as consultas:
+            pagina = sincronizacion.instantanea(limite=1)
+        self.assertEqual(pagina['modelos'], {'gasto': {'filas': [mock.ANY]}})
+        self.assertEqual(pagina['modelos']['gasto']['filas'][0]['id'], self.viejo.pk)
+        self.assertTrue(any('LIMIT 1' in c['sql'] for c in consultas.captured_queries))
+
+        siguiente = sincronizacion.instantanea(pagina['siguiente'], limite=1)
+        self.assertEqual([f['id'] for f in siguiente['modelos']['gasto']['filas']], [self.nuevo.pk])
+
+
+class ConciliacionTests(TestCase):
+    EXTRACTO = (
+        'Fecha;Importe;Concepto\n'
+        '02/03/2025;-50,00;Debito A\n'
+        '04/03/2025;-50,00;Debito B\n'
+        '11/03/2025;-1.200,00;Patente\n'
+        '02/03/2025;-30,00;Sin pendiente\n'
+        '05/03/2025;1000,00;Acreditacion\n'
+    ).encode()
+
+    def setUp(self):
+        cache.clear()
+        gasto = dict(tipo='variable', categoria='varios', monto=Decimal('50'), medio_pago='debito')
+        self.primero = Gasto.objects.create(fecha=date(2025, 3, 1), **gasto)
+        self.segundo = Gasto.objects.create(fecha=date(2025, 3, 5), **gasto)
+        self.tarjeta = Gasto.objects.create(
+            fecha=date(2025, 3, 2),
+            tipo='variable',
+            categoria='ropa',
+            monto=Decimal('30'),
+            medio_pago='tarjeta',
+        )
+        self.patente = Vencimiento.objects.create(
+            fecha=date(2025, 3, 10), concepto='Patente', monto=Decimal('1200')
+        )
+
+    def test_empareja_por_monto_medio_y_fecha_mas_cercana(self):
+        resultado = conciliacion.conciliar(
+            conciliacion.leer_extracto('extracto.csv', io.BytesIO(self.EXTRACTO))
+        )
+        self.assertEqual(resultado['movimientos'], 4)
+        self.assertEqual(
+            [(p.modelo, p.pk, p.dias) for p in resultado['propuestas']],
+            [
+                ('gasto', self.primero.pk, 1),
+                ('gasto', self.segundo.pk, 1),
+                ('vencimiento', self.patente.pk, 1),
+            ],
+        )
+        self.assertEqual([m.descripcion for m in resultado['sin_coincidencia']], ['Sin pendiente'])
+
+        saldo_al(date(2025, 3, 31))
+        self.assertEqual(conciliacion.aplicar(resultado['propuestas']), (2, 1))
+        self.assertFalse(Gasto.objects.get(pk=self.tarjeta.pk).pagado)
+        self.assertEqual(Vencimiento.objects.get(pk=self.patente.pk).estado, 'pagado')
+        self.assertEqual(saldo_al(date(2025, 3, 31))['gastos_pagados'], Decimal('100'))
+
+    def test_bom_redondeo_y_moneda(self):
+        Gasto.objects.create(
+            fecha=date(2025, 3, 2), tipo='variable', categoria='viaje', monto=Decimal('30'),
+            medio_pago='debito', moneda='USD',
+        )
+        extracto = (
+            '\ufeffFecha;Importe;Concepto\n'
+            '02/03/2025;-49,996;Redondeado\n'
+            '02/03/2025;-30,00;En pesos\n'
+        )
+        movimientos = list(
+            conciliacion.leer_extracto('extracto.csv', io.BytesIO(extracto.encode()))
+        )
+        self.assertEqual([m.descripcion for m in movimientos], ['Redondeado', 'En pesos'])
+
+        resultado = conciliacion.conciliar(movimientos)
+        self.assertEqual(
+            [(p.modelo, p.pk) for p in resultado['propuestas']], [('gasto', self.primero.pk)]
+        )
+        self.assertEqual([m.descripcion for m in resultado['sin_coincidencia']], ['En pesos'])
+        en_dolares = conciliacion.conciliar(movimientos, indice=conciliacion.Indice(moneda='USD'))
+        self.assertEqual([m.descripcion for m in en_dolares['sin_coincidencia']], ['Redondeado'])
+
+
+class DuplicadosTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_huella_agrupa_y_fusionar_conserva_lo_pagado(self):
+        fecha = date(2025, 4, 3)
+        conservar = Gasto.objects.create(
+            fecha=fecha,
+            tipo='variable',
+            categoria='Almacén',
+            descripcion='Compra',
+            monto=Decimal('45.5'),
+        )
+        repetido = Gasto.objects.create(
+            fecha=fecha,
+            tipo='variable',
+            categoria='almacen!',
+            descripcion='ALMACEN 123',
+            monto=Decimal('45.50'),
+            pagado=True,
+        )
+        Gasto.objects.create(
+            fecha=fecha, tipo='variable', categoria='almacen', monto=Decimal('45.51')
+        )
+        self.assertEqual(conservar.huella, repetido.huella)
+        self.assertEqual(duplicados.iguales(conservar), [repetido.pk])
+        grupos, hay_mas = duplicados.grupos('gasto')
+        self.assertFalse(hay_mas)
+        self.assertEqual(
+            [[g.pk for g in grupo['filas']] for grupo in grupos], [[conservar.pk, repetido.pk]]
+        )
+
+        saldo_al(date(2025, 4, 30))
+        self.assertEqual(duplicados.fusionar('gasto', conservar.huella, conservar.pk), 1)
+        self.assertFalse(Gasto.objects.filter(pk=repetido.pk).exists())
+        self.assertTrue(Gasto.objects.get(pk=conservar.pk).pagado)
+        self.assertEqual(saldo_al(date(2025, 4, 30))['gastos_pagados'], Decimal('45.50'))
+        self.assertEqual(duplicados.grupos('gasto')[0], [])
+
+
+class CotizacionesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.fecha = date(2025, 5, 2)
+        # Valor entero: en SQLite la división tiene que seguir siendo decimal.
+        TipoCambio.objects.create(moneda='USD', fecha=self.fecha, valor=Decimal('1000'))
+
+    def _total(self, destino):
+        return Gasto.objects.aggregate(total=Sum(cotizaciones.convertido(destino)))['total']
+
+    def test_convertido_en_la_base_igual_que_convertir(self):
+        Gasto.objects.create(
+            fecha=self.fecha,
+            tipo='variable',
+            categoria='viaje',
+            monto=Decimal('12.50'),
+            moneda='USD',
+        )
+        esperado = cotizaciones.convertir(Decimal('12.50'), 'USD', 'ARS', self.fecha)
+        self.assertEqual(esperado, Decimal('12500'))
+        self.assertEqual(self._total('ARS'), esperado)
+        self.assertEqual(self._total('USD'), Decimal('12.50'))
+        self.assertEqual(saldo_al(self.fecha)['gastos_pendientes'], esperado)
+
+    def test_pesos_a_dolares(self):
+        Gasto.objects.create(
+            fecha=self.fecha, tipo='variable', categoria='super', monto=Decimal('2500')
+        )
+        esperado = cotizaciones.convertir(Decimal('2500'), 'ARS', 'USD', self.fecha)
+        self.assertEqual(esperado, Decimal('2.5'))
+        self.assertAlmostEqual(self._total('USD'), esperado, places=6)
+
+    def test_carga_de_otro_proceso_se_ve_al_vencer_la_memoria(self):
+        self.assertEqual(cotizaciones.vigentes(self.fecha), {'USD': Decimal('1000')})
+        # Como cargar_cotizaciones en otro proceso: cambia la tabla pero la
+        # versión de este proceso no se entera.
+        TipoCambio.objects.filter(moneda='USD').update(valor=Decimal('1200'))
+        self.assertEqual(cotizaciones.vigentes(self.fecha), {'USD': Decimal('1000')})
+        despues = time.monotonic() + cotizaciones.MEMORIA_SEGUNDOS + 1
+        with mock.patch('time.monotonic', return_value=despues):
+            self.assertEqual(cotizaciones.vigentes(self.fecha), {'USD': Decimal('1200')})
+
+
+class InflacionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for mes, indice in ((1, '100'), (2, '110'), (3, '121')):
+            IndicePrecios.objects.create(mes=date(2025, mes, 1), indice=Decimal(indice))
+
+    def test_factor_entre_meses_y_fuera_del_rango_cargado(self):
+        marzo = date(2025, 3, 1)
+        self.assertEqual(inflacion.factor(date(2025, 1, 15), marzo), Decimal('1.21'))
+        self.assertEqual(
+            inflacion.factor(date(2025, 3, 31), date(2025, 1, 1)), Decimal('100') / Decimal('121')
+        )
+        # Después del último índice no hay inflación; antes del primero, se usa el primero.
+        self.assertEqual(inflacion.factor(date(2025, 6, 1), marzo), Decimal('1'))
+        self.assertEqual(inflacion.factor(date(2024, 11, 1), marzo), Decimal('1.21'))
+        self.assertEqual(inflacion.factor(date(2025, 1, 1), None), Decimal('1'))
+
+    def test_encadenar_variaciones_desde_el_ultimo_indice(self):
+        objetos = inflacion._encadenar(
+            {date(2025, 5, 1): Decimal('0'), date(2025, 4, 1): Decimal('10')}
+        )
+        self.assertEqual(
+            [(o.mes, o.indice, o.variacion) for o in objetos],
+            [
+                (date(2025, 4, 1), Decimal('133.1'), Decimal('10')),
+                (date(2025, 5, 1), Decimal('133.1'), Decimal('0')),
+            ],
+        )
+        with self.assertRaises(ValueError):
+            inflacion._encadenar({date(2025, 4, 1): Decimal('1'), date(2025, 6, 1): Decimal('1')})
+
+    def test_cargar_variaciones_invalida_el_indice_en_memoria(self):
+        self.assertEqual(inflacion.factor(date(2025, 3, 1), date(2025, 4, 1)), Decimal('1'))
+        inflacion.cargar_csv(io.BytesIO(b'mes,variacion\n2025-04,10\n'))
+        self.assertEqual(inflacion.factor(date(2025, 3, 1), date(2025, 4, 1)), Decimal('1.1'))
+
+    def test_carga_de_otro_proceso_se_ve_al_vencer_la_memoria(self):
+        marzo = date(2025, 3, 1)
+        self.assertEqual(inflacion.factor(date(2025, 1, 1), marzo), Decimal('1.21'))
+        # Como cargar_indice_precios en otro proceso: sin versiones.invalidar.
+        IndicePrecios.objects.filter(mes=marzo).update(indice=Decimal('130'))
+        self.assertEqual(inflacion.factor(date(2025, 1, 1), marzo), Decimal('1.21'))
+        despues = time.monotonic() + inflacion.MEMORIA_SEGUNDOS + 1
+        with mock.patch('time.monotonic', return_value=despues):
+            self.assertEqual(inflacion.factor(date(2025, 1, 1), marzo), Decimal('1.3'))
+
+
+class AmortizacionTests(SimpleTestCase):
+    def _escenario(self, deudas, presupuesto):
+        escenario = amortizacion.evaluar_escenario(deudas, presupuesto)
+        return {e['nombre']: e for e in escenario['estrategias']}
+
+    def test_avalancha_y_orden_optimizado(self):
+        deudas = [
+            amortizacion.DeudaPlan(1, 5000.0, 0.03, 150.0, 'baja'),
+            amortizacion.DeudaPlan(2, 800.0, 0.01, 40.0, 'alta'),
+            amortizacion.DeudaPlan(3, 12000.0, 0.015, 300.0, 'media'),
+            amortizacion.DeudaPlan(4, 2500.0, 0.0, 100.0, 'media'),
+        ]
+        for presupuesto in (600.0, 900.0, 1500.0):
+            estrategias = self._escenario(deudas, presupuesto)
+            self.assertEqual(estrategias['avalancha']['orden'], [1, 3, 2, 4])
+            self.assertEqual(estrategias['bola_de_nieve']['orden'], [2, 4, 1, 3])
+            self.assertLessEqual(
+                estrategias['avalancha']['interes_total'],
+                estrategias['bola_de_nieve']['interes_total'],
+            )
+            optimizada = estrategias.pop('optimizada')
+            self.assertIsNotNone(optimizada['meses'])
+            for estrategia in estrategias.values():
+                self.assertLessEqual(
+                    optimizada['interes_total'], estrategia['interes_total'], estrategia['nombre']
+                )
+            self.assertEqual(set(optimizada['cancelacion']), {1, 2, 3, 4})
+
+    def test_busqueda_local_con_muchas_deudas(self):
+        deudas = [
+            amortizacion.DeudaPlan(i, 1000.0 + 350 * i, 0.005 * (i % 5), 30.0, 'media')
+            for i in range(amortizacion.PERMUTAR_HASTA + 2)
+        ]
+        estrategias = self._escenario(deudas, 700.0)
+        optimizada = estrategias.pop('optimizada')
+        self.assertEqual(sorted(optimizada['orden']), [d.id for d in deudas])
+        self.assertLessEqual(
+            optimizada['interes_total'], min(e['interes_total'] for e in estrategias.values())
+        )
+
+    def test_presupuesto_insuficiente_no_cancela(self):
+        deudas = [amortizacion.DeudaPlan(1, 10000.0, 0.05, 100.0, 'alta')]
+        self.assertIsNone(self._escenario(deudas, 100.0)['avalancha']['meses'])
+
+
+class RiesgoTests(TestCase):
+    HOY = date(2025, 6, 10)
+
+    def setUp(self):
+        cache.clear()
+        Ingreso.objects.create(
+            fecha=date(2025, 6, 1), tipo='sueldo', monto=Decimal('3000'), confirmado=True
+        )
+        for dias in range(3, 180, 4):
+            Gasto.objects.create(
+                fecha=self.HOY - timedelta(days=dias), tipo='variable', categoria='super',
+                monto=Decimal(40 + dias % 7 * 15), medio_pago='debito',
+            )
+        self.alquiler = Recurrencia.objects.create(
+            fecha_inicio=date(2025, 1, 20), concepto='Alquiler', monto=Decimal('1500')
+        )
+
+    def _riesgo(self, **opciones):
+        return riesgo.riesgo('2025-06', hoy=self.HOY, simulaciones=500, **opciones)
+
+    def test_reproducible_con_semilla_y_forma_de_la_salida(self):
+        datos = self._riesgo(semilla=7)
+        cache.clear()
+        self.assertEqual(self._riesgo(semilla=7), datos)
+        self.assertNotEqual(self._riesgo(semilla=8)['percentiles'], datos['percentiles'])
+
+        self.assertEqual(len(datos['fechas']), 30)
+        self.assertEqual((datos['fechas'][0], datos['fechas'][-1]), ('2025-06-01', '2025-06-30'))
+        series = (datos['determinista'], datos['prob_negativo'], *datos['percentiles'].values())
+        for serie in series:
+            self.assertEqual(len(serie), 30)
+        self.assertEqual(set(datos['percentiles']), {f'p{p}' for p in riesgo.PERCENTILES})
+        self.assertTrue(all(0 <= p <= 1 for p in datos['prob_negativo']))
+        # Hasta hoy no se sortea nada: las bandas coinciden con la línea.
+        self.assertEqual(datos['percentiles']['p5'][:10], datos['percentiles']['p95'][:10])
+        self.assertTrue(
+            all(a <= b for a, b in zip(datos['percentiles']['p5'], datos['percentiles']['p95']))
+        )
+        self.assertEqual([c['categoria'] for c in datos['categorias']], ['super'])
+
+    def test_cambiar_una_recurrencia_renueva_el_resultado(self):
+        antes = self._riesgo()['determinista'][-1]
+        self.alquiler.activa = False
+        self.alquiler.save()
+        self.assertEqual(self._riesgo()['determinista'][-1], antes + 1500)
+
+
+def _cargar_settings(**entorno):
+    """Valores de config/settings.py ejecutado con otras variables de entorno."""
+    propias = ('DB_', 'DATABASE_', 'POSTGRES_', 'SESSION_', 'REDIS_', 'DJANGO_DEBUG')
+    base = {clave: valor for clave, valor in os.environ.items() if not clave.startswith(propias)}
+    ruta = Path(__file__).resolve().parent.parent / 'config' / 'settings.py'
+    with mock.patch.dict(os.environ, {**base, 'DJANGO_SECRET_KEY': 'x', **entorno}, clear=True):
+        return runpy.run_path(str(ruta))
+
+
+class ConfiguracionTests(SimpleTestCase):
+    def test_pool_fuerza_conn_max_age_cero(self):
+        valores = _cargar_settings(
+            POSTGRES_DB='finanzas', POSTGRES_USER='finanzas', DB_POOL='True',
+            DB_POOL_MAX_SIZE='7', DB_CONN_HEALTH_CHECKS='False',
+        )
+        base = valores['DATABASES']['default']
+        self.assertEqual(base['CONN_MAX_AGE'], 0)
+        self.assertEqual(base['OPTIONS']['pool']['max_size'], 7)
+        sin_pool = _cargar_settings(POSTGRES_DB='finanzas', POSTGRES_USER='finanzas')
+        self.assertEqual(sin_pool['DATABASES']['default']['CONN_MAX_AGE'], 60)
+        self.assertNotIn('OPTIONS', sin_pool['DATABASES']['default'])
+
+    def test_sqlite_afinada_aplica_pragmas_y_transacciones_immediate(self):
+        valores = _cargar_settings(DB_SQLITE_TUNED='True', DJANGO_DEBUG='False')
+        config = valores['DATABASES']['default']
+        self.assertEqual(config['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        with tempfile.TemporaryDirectory() as tmp:
+            # Alias propio: las conexiones creadas aparte están permitidas en SimpleTestCase.
+            config = {**config, 'NAME': str(Path(tmp) / 'db.sqlite3')}
+            conexiones = ConnectionHandler({'default': config, 'afinada': config})
+            conexion = conexiones['afinada']
+            try:
+                with conexion.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA synchronous')
+                    self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+                self.assertEqual(conexion.transaction_mode, 'IMMEDIATE')
+            finally:
+                conexion.close()
+
+    def test_estrategia_de_sesion_invalida_no_arranca(self):
+        self.assertEqual(
+            _cargar_settings()['SESSION_ENGINE'], 'django.contrib.sessions.backends.cached_db'
+        )
+        with self.assertRaises(RuntimeError):
+            _cargar_settings(SESSION_STRATEGY='redis')
+
+
+class SesionesMensajesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(get_user_model().objects.create_user('prueba'))
+
+    def test_sesion_en_cache_y_mensajes_en_cookie(self):
+        clave = self.client.session.session_key
+        self.assertIsNotNone(cache.get(SessionStore(clave).cache_key))
+
+        respuesta = self.client.post(reverse('finanzas:lista_gastos'), {'pagado': []})
+        self.assertIn('messages', respuesta.cookies)
+        siguiente = self.client.get(reverse('finanzas:lista_gastos'))
+        self.assertContains(siguiente, 'Gastos actualizados.')
+
+
+class ReplicaTests(TransactionTestCase):
+    # Segunda conexión SQLite a la misma base de test, igual que
+    # DATABASE_REPLICA_URL con TEST['MIRROR'] en settings. El alias se agrega
+    # recién acá: el runner no tiene que crear ni chequear otra base.
+    @classmethod
+    def setUpClass(cls):
+        config = {**connections['default'].settings_dict, 'TEST': {'MIRROR': 'default'}}
+        settings.DATABASES[ALIAS_REPLICA] = config
+        connections.settings[ALIAS_REPLICA] = config
+        cls.databases = {'default', ALIAS_REPLICA}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[ALIAS_REPLICA].close()
+        del connections[ALIAS_REPLICA]
+        connections.settings.pop(ALIAS_REPLICA, None)
+        settings.DATABASES.pop(ALIAS_REPLICA, None)
+
+    def setUp(self):
+        cache.clear()
+        caches['template_fragments'].clear()
+        self.client.force_login(get_user_model().objects.create_user('prueba'))
+
+    def test_get_lee_de_la_replica(self):
+        with CaptureQueriesContext(connections[ALIAS_REPLICA]) as replica:
+            self.assertEqual(self.client.get(reverse('finanzas:lista_gastos')).status_code, 200)
+        self.assertTrue(any('finanzas_gasto' in q['sql'] for q in replica.captured_queries))
+
+    def test_transaccion_y_escrituras_quedan_en_la_primaria(self):
+        router = RouterReplica()
+        with usar_replica():
+            self.assertEqual(router.db_for_read(Gasto), ALIAS_REPLICA)
+            self.assertEqual(router.db_for_write(Gasto), 'default')
+            self.assertIsNone(router.db_for_read(get_user_model()))
+            with transaction.atomic():
+                gasto = Gasto.objects.create(
+                    fecha=date(2025, 1, 5), tipo='variable', categoria='super', monto=Decimal('10')
+                )
+                self.assertEqual(router.db_for_read(Gasto), 'default')
+                self.assertTrue(Gasto.objects.filter(pk=gasto.pk).exists())
+        self.assertIsNone(router.db_for_read(Gasto))
+
+    def test_post_fija_la_primaria_durante_la_ventana(self):
+        respuesta = self.client.post(reverse('finanzas:lista_gastos'), {'pagado': []})
+        cookie = respuesta.cookies[COOKIE_PRIMARIA]
+        self.assertEqual(cookie['max-age'], settings.DB_REPLICA_STICKY)
+        with CaptureQueriesContext(connections[ALIAS_REPLICA]) as replica:
+            self.assertEqual(self.client.get(reverse('finanzas:lista_gastos')).status_code, 200)
+        self.assertEqual(replica.captured_queries, [])
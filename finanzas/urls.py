@@ -6,6 +6,12 @@ app_name = 'finanzas'
 
 urlpatterns = [
     path('', views.dashboard, name='dashboard'),
+    path('async/', views.dashboard_async, name='dashboard_async'),
+    path('api/kpis/', views.kpis, name='kpis'),
+    path('api/categorias/', views.analitica_categorias, name='analitica_categorias'),
+    path('api/riesgo/', views.riesgo_flujo, name='riesgo'),
+    path('eventos/', views.eventos, name='eventos'),
+    path('metricas/', views.metricas_view, name='metricas'),
     path('deudas/', views.ListaDeudasView.as_view(), name='lista_deudas'),
     path('ingresos/', views.ListaIngresosView.as_view(), name='lista_ingresos'),
     path('gastos/', views.ListaGastosView.as_view(), name='lista_gastos'),
@@ -13,5 +19,22 @@ urlpatterns = [
     path('ingresos/<int:pk>/editar/', views.EditarIngresoView.as_view(), name='editar_ingreso'),
     path('gastos/nuevo/', views.CrearGastoView.as_view(), name='nuevo_gasto'),
     path('gastos/<int:pk>/editar/', views.EditarGastoView.as_view(), name='editar_gasto'),
+    path(
+        'recurrencias/<int:pk>/<str:fecha>/pagar/',
+        views.pagar_ocurrencia,
+        name='pagar_ocurrencia',
+    ),
+    path(
+        'recurrencias/<int:pk>/<str:fecha>/editar/',
+        views.EditarOcurrenciaView.as_view(),
+        name='editar_ocurrencia',
+    ),
+    path('vencimientos/', views.vencimientos, name='vencimientos'),
+    path('duplicados/', views.revisar_duplicados, name='duplicados'),
+    path('vencimientos/feed/', views.vencimientos_feed, name='vencimientos_feed'),
+    path('api/deudas/', views.buscar_deudas, name='buscar_deudas'),
+    path('api/deudas/estrategias/', views.estrategias_deudas, name='estrategias_deudas'),
+    path('api/movimientos/', views.cargar_movimientos, name='cargar_movimientos'),
+    path('api/sync/', views.sincronizar, name='sincronizar'),
     path('importar-exportar/', views.importar_exportar, name='importar_exportar'),
 ]
@@ -0,0 +1,33 @@
+"""
+Versiones de datos para invalidar caches sin borrar claves.
+
+Cada grupo de datos (ej. 'vencimientos') tiene un número de versión guardado
+en el cache de Django. Las claves cacheadas incluyen esa versión, así que
+incrementarla invalida todas las entradas del grupo de una sola vez.
+"""
+import time
+
+from django.core.cache import cache
+
+PREFIJO = 'finanzas:version:'
+
+
+def version(nombre):
+    """Devuelve la versión actual del grupo, creándola si no existe."""
+    clave = PREFIJO + nombre
+    valor = cache.get(clave)
+    if valor is None:
+        # Se arranca desde el reloj para no reutilizar versiones viejas si el
+        # cache perdió la clave (reinicio, desalojo).
+        cache.add(clave, time.time_ns(), None)
+        valor = cache.get(clave)
+    return valor
+
+
+def invalidar(nombre):
+    """Incrementa la versión del grupo, invalidando sus entradas cacheadas."""
+    clave = PREFIJO + nombre
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.set(clave, time.time_ns(), None)
@@ -1,32 +1,63 @@
 import calendar
+import json
 from datetime import date, timedelta
-from io import BytesIO
 from pathlib import Path
-from zipfile import ZipFile, ZIP_DEFLATED
 
+from asgiref.sync import sync_to_async
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.management import call_command
-from django.db.models import Sum
-from django.http import FileResponse
-from django.shortcuts import redirect, render
-from django.urls import reverse_lazy
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Min, Q
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
 from django.views.generic import CreateView, ListView
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_http_methods, require_POST
 from django.views.generic.edit import UpdateView
 
+from . import (
+    carga_rapida,
+    cotizaciones,
+    duplicados,
+    envivo,
+    estrategias,
+    inflacion,
+    metricas,
+    referencias,
+    riesgo,
+    saldos,
+    sincronizacion,
+    tablero,
+    versiones,
+)
+from .agenda import ESTADOS_FILTRO, agenda
 from .forms import IngresoForm, GastoForm
-from .models import Deuda, Ingreso, Gasto
+from .models import Deuda, Ingreso, IngresoArchivado, Gasto, GastoArchivado, Recurrencia
+from .recurrencias import materializar, ocurrencias, valores_materializados
 
+# Ventana (en días, hacia atrás y adelante) de ocurrencias recurrentes en gastos.
+DIAS_OCURRENCIAS = 30
+# Máximo de filas archivadas que se muestran al pedir "incluir archivados".
+LIMITE_ARCHIVADOS = 500
 
-def _totales_mes(model, field_name):
-    """Agrega el total del mes actual para el campo indicado."""
-    today = date.today()
-    return (
-        model.objects.filter(fecha__year=today.year, fecha__month=today.month)
-        .aggregate(total=Sum(field_name))
-        .get('total') or 0
-    )
+
+def _opciones_tablero(request):
+    """Moneda (?moneda=) y mes base para pesos constantes (?base=YYYY-MM)."""
+    return {
+        'moneda': cotizaciones.moneda_param(request.GET.get('moneda')),
+        'base': inflacion.base_param(request.GET.get('base')),
+    }
 
 
 @login_required
@@ -41,144 +72,146 @@ def dashboard(request):
         HttpResponse con los totales del mes, relación cuotas/ingresos y
         los gastos pendientes en los próximos 30 días.
     """
-    today = date.today()
-    month_param = request.GET.get('month')
-    min_month = date(today.year - 2, today.month, 1)
-    max_month = date(today.year + 2, today.month, 1)
-    medios_flujo = ['efectivo', 'debito']
+    contexto = tablero.contexto(request.GET.get('month'), **_opciones_tablero(request))
+    contexto['cursor_cambios'] = envivo.cursor_actual()
+    contexto['version_agenda'] = versiones.version('vencimientos')
+    contexto['version_cotizaciones'] = versiones.version(cotizaciones.GRUPO)
+    contexto['version_inflacion'] = versiones.version(inflacion.GRUPO)
+    contexto['monedas'] = cotizaciones.MONEDAS
+    return render(request, 'finanzas/dashboard.html', contexto)
 
-    if month_param:
-        try:
-            anio_str, mes_str = month_param.split('-')
-            anio_sel = int(anio_str)
-            mes_sel = int(mes_str)
-            selected_date = date(anio_sel, mes_sel, 1)
-        except Exception:  # noqa: BLE001
-            selected_date = date(today.year, today.month, 1)
-    else:
-        selected_date = date(today.year, today.month, 1)
-
-    if selected_date < min_month:
-        selected_date = min_month
-    elif selected_date > max_month:
-        selected_date = max_month
-
-    ultimo_dia = calendar.monthrange(selected_date.year, selected_date.month)[1]
-    dias_labels = list(range(1, ultimo_dia + 1))
-
-    ingresos_confirmados_por_dia = []
-    ingresos_pendientes_por_dia = []
-    gastos_pagados_por_dia = []
-    gastos_pendientes_por_dia = []
-    sobrante_por_dia = []
-    saldo_acumulado = 0
-
-    for dia in dias_labels:
-        fecha_iter = date(selected_date.year, selected_date.month, dia)
-        es_futuro = fecha_iter > today
-
-        ingresos_qs = Ingreso.objects.filter(
-            fecha__year=selected_date.year,
-            fecha__month=selected_date.month,
-            fecha__day=dia,
-        )
-        gastos_qs = Gasto.objects.filter(
-            fecha__year=selected_date.year,
-            fecha__month=selected_date.month,
-            fecha__day=dia,
-            medio_pago__in=medios_flujo,
-        )
 
-        if es_futuro:
-            ingresos_conf = 0
-            ingresos_pend = ingresos_qs.aggregate(total=Sum('monto')).get('total') or 0
-            gastos_pagados = 0
-            gastos_pend = gastos_qs.aggregate(total=Sum('monto')).get('total') or 0
-        else:
-            ingresos_conf = (
-                ingresos_qs.filter(confirmado=True).aggregate(total=Sum('monto')).get('total') or 0
-            )
-            ingresos_pend = (
-                ingresos_qs.filter(confirmado=False).aggregate(total=Sum('monto')).get('total') or 0
-            )
-            gastos_pagados = (
-                gastos_qs.filter(pagado=True).aggregate(total=Sum('monto')).get('total') or 0
-            )
-            gastos_pend = (
-                gastos_qs.filter(pagado=False).aggregate(total=Sum('monto')).get('total') or 0
-            )
+@login_required
+async def dashboard_async(request):
+    """
+    Mismo dashboard que `dashboard`, con los agregados consultados en
+    paralelo (ver finanzas.tablero). Pensado para correr bajo ASGI.
+    """
+    contexto = await tablero.acontexto(request.GET.get('month'), **_opciones_tablero(request))
+    contexto['cursor_cambios'] = await sync_to_async(envivo.cursor_actual)()
+    contexto['version_agenda'] = await sync_to_async(versiones.version)('vencimientos')
+    contexto['version_cotizaciones'] = await sync_to_async(versiones.version)(cotizaciones.GRUPO)
+    contexto['version_inflacion'] = await sync_to_async(versiones.version)(inflacion.GRUPO)
+    contexto['monedas'] = cotizaciones.MONEDAS
+    return await sync_to_async(render)(request, 'finanzas/dashboard.html', contexto)
 
-        ingresos_confirmados_por_dia.append(float(ingresos_conf))
-        ingresos_pendientes_por_dia.append(float(ingresos_pend))
-        gastos_pagados_por_dia.append(float(gastos_pagados))
-        gastos_pendientes_por_dia.append(float(gastos_pend))
 
-        saldo_acumulado += float(ingresos_conf + ingresos_pend) - float(
-            gastos_pagados + gastos_pend
-        )
-        sobrante_por_dia.append(saldo_acumulado)
+@login_required
+async def kpis(request):
+    """
+    KPIs del dashboard en JSON (?month=YYYY-MM para las series del mes,
+    ?moneda=ARS|USD para la moneda de los totales, ?base=YYYY-MM para
+    expresarlos en pesos de ese mes).
 
-    treinta_dias = today + timedelta(days=30)
+    Retorna:
+        JsonResponse con los totales, los gastos pendientes y, con
+        ?series=1, las series diarias del gráfico.
+    """
+    contexto = await tablero.acontexto(request.GET.get('month'), **_opciones_tablero(request))
+    datos = tablero.kpis(contexto)
+    if request.GET.get('series') == '1':
+        for clave in (
+            'dias_labels',
+            'ingresos_confirmados_por_dia',
+            'ingresos_pendientes_por_dia',
+            'gastos_pagados_por_dia',
+            'gastos_pendientes_por_dia',
+            'sobrante_por_dia',
+        ):
+            datos[clave] = contexto[clave]
+    return JsonResponse(datos)
 
-    deuda_total = (
-        Deuda.objects.filter(estado__in=['al_dia', 'en_curso'])
-        .aggregate(total=Sum('monto_total'))
-        .get('total')
-        or 0
-    )
-    cuota_fija_total = (
-        Deuda.objects.aggregate(total=Sum('cuota_mensual_aprox')).get('total') or 0
-    )
-    ingresos_mes = _totales_mes(Ingreso, 'monto')
-    gastos_mes = (
-        Gasto.objects.filter(
-            fecha__year=today.year,
-            fecha__month=today.month,
-            medio_pago__in=medios_flujo,
-        )
-        .aggregate(total=Sum('monto'))
-        .get('total')
-        or 0
-    )
-    saldo_mes = ingresos_mes - gastos_mes
-
-    gastos_pendientes = (
-        Gasto.objects.filter(
-            pagado=False,
-            fecha__gte=today,
-            fecha__lte=treinta_dias,
-            medio_pago__in=medios_flujo,
-        ).order_by('fecha')[:10]
-    )
 
-    relacion_cuotas_ingresos = 0
-    if ingresos_mes > 0:
-        relacion_cuotas_ingresos = (cuota_fija_total / ingresos_mes) * 100
+@login_required
+def riesgo_flujo(request):
+    """
+    Riesgo del sobrante por simulación de gastos variables (ver finanzas.riesgo).
 
-    dia_hoy = None
-    if selected_date.year == today.year and selected_date.month == today.month:
-        dia_hoy = today.day
+    Params (GET):
+        month (YYYY-MM): primer mes, como en el dashboard.
+        meses (int): horizonte, de 1 a riesgo.MAX_MESES (1 por defecto).
+        simulaciones (int): de 100 a riesgo.MAX_SIMULACIONES.
+        semilla (int): semilla del generador.
+
+    Retorna:
+        JsonResponse con la probabilidad de saldo negativo por día y las
+        bandas de percentiles; 400 si algún parámetro es inválido.
+    """
+    try:
+        meses = int(request.GET.get('meses') or 1)
+        simulaciones = int(request.GET.get('simulaciones') or riesgo.SIMULACIONES)
+        semilla = int(request.GET.get('semilla') or riesgo.SEMILLA)
+    except ValueError:
+        return JsonResponse({'error': 'Parámetros inválidos.'}, status=400)
+    if not (1 <= meses <= riesgo.MAX_MESES and 100 <= simulaciones <= riesgo.MAX_SIMULACIONES):
+        return JsonResponse({'error': 'Parámetros fuera de rango.'}, status=400)
+    return JsonResponse(riesgo.riesgo(request.GET.get('month'), meses, simulaciones, semilla))
+
+
+@login_required
+def analitica_categorias(request):
+    """
+    Gastos por mes y categoría en JSON, incluidos los meses archivados.
+
+    Params (GET):
+        desde, hasta (YYYY-MM): rango de meses (por defecto, los últimos
+            inflacion.MESES_ANALITICA hasta el actual).
+        base (YYYY-MM): mes base para expresar los montos en pesos
+            constantes (sin base, pesos nominales).
+
+    Retorna:
+        JsonResponse con 'meses', 'categorias', 'totales' y 'base'; 400 si
+        el rango es inválido o supera los 10 años.
+    """
+    hasta = date.today().replace(day=1)
+    if request.GET.get('hasta'):
+        hasta = inflacion.parse_mes(request.GET['hasta'])
+    if request.GET.get('desde'):
+        desde = inflacion.parse_mes(request.GET['desde'])
+    elif hasta is not None:
+        anio, mes = divmod(hasta.year * 12 + hasta.month - inflacion.MESES_ANALITICA, 12)
+        desde = date(anio, mes + 1, 1)
+    else:
+        desde = None
+    if desde is None or hasta is None or desde > hasta or (hasta.year - desde.year) > 10:
+        return JsonResponse({'error': 'Rango de meses inválido.'}, status=400)
+    base = inflacion.base_param(request.GET.get('base'))
+    return JsonResponse(inflacion.por_categoria(desde, hasta, base))
+
+
+@login_required
+async def eventos(request):
+    """
+    Stream SSE con los deltas del dashboard para ?month=YYYY-MM.
+
+    El cursor inicial sale del header Last-Event-ID (reconexión) o de
+    ?cursor= (el que trae la página). Bajo ASGI la conexión queda abierta;
+    bajo WSGI se responde un solo lote y el navegador reconecta.
+    """
+    mes = envivo.mes_param(request.GET.get('month'))
+    opciones = _opciones_tablero(request)
+    try:
+        cursor = int(request.headers.get('Last-Event-ID') or request.GET.get('cursor') or 0)
+    except ValueError:
+        cursor = 0
+    if not cursor:
+        cursor = await sync_to_async(envivo.cursor_actual)()
+    if isinstance(request, ASGIRequest):
+        respuesta = StreamingHttpResponse(
+            envivo.flujo(mes, cursor, **opciones), content_type='text/event-stream'
+        )
+    else:
+        texto = await sync_to_async(envivo.respuesta_unica)(mes, cursor, **opciones)
+        respuesta = HttpResponse(texto, content_type='text/event-stream')
+    respuesta['Cache-Control'] = 'no-cache'
+    respuesta['X-Accel-Buffering'] = 'no'
+    return respuesta
 
-    contexto = {
-        'deuda_total': deuda_total,
-        'cuota_fija_total': cuota_fija_total,
-        'ingresos_mes': ingresos_mes,
-        'gastos_mes': gastos_mes,
-        'saldo_mes': saldo_mes,
-        'gastos_pendientes': gastos_pendientes,
-        'relacion_cuotas_ingresos': relacion_cuotas_ingresos,
-        'dias_labels': dias_labels,
-        'ingresos_confirmados_por_dia': ingresos_confirmados_por_dia,
-        'ingresos_pendientes_por_dia': ingresos_pendientes_por_dia,
-        'gastos_pagados_por_dia': gastos_pagados_por_dia,
-        'gastos_pendientes_por_dia': gastos_pendientes_por_dia,
-        'sobrante_por_dia': sobrante_por_dia,
-        'month_str': f'{selected_date.year:04d}-{selected_date.month:02d}',
-        'month_min': f'{min_month.year:04d}-{min_month.month:02d}',
-        'month_max': f'{max_month.year:04d}-{max_month.month:02d}',
-        'dia_hoy': dia_hoy,
-    }
-    return render(request, 'finanzas/dashboard.html', contexto)
+
+@staff_member_required
+def metricas_view(request):
+    """Métricas operativas en JSON (pool de conexiones, etc.), solo staff."""
+    return JsonResponse(metricas.todas())
 
 
 class ListaIngresosView(LoginRequiredMixin, ListView):
@@ -204,6 +237,15 @@ class ListaIngresosView(LoginRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         context['ver_todos'] = self.request.GET.get('ver_todos') == '1'
         context['hoy'] = date.today()
+        # Cualquier escritura de ingresos/gastos deja un Cambio: si el cursor
+        # no se movió, la tabla sale entera del cache de fragmentos.
+        context['version_lista'] = envivo.cursor_actual()
+        context['incluir_archivados'] = self.request.GET.get('archivados') == '1'
+        if context['incluir_archivados']:
+            archivados = IngresoArchivado.objects.all()
+            if not context['ver_todos']:
+                archivados = archivados.filter(confirmado=False)
+            context['archivados'] = archivados[:LIMITE_ARCHIVADOS]
         return context
 
     def post(self, request, *args, **kwargs):
@@ -214,13 +256,38 @@ class ListaIngresosView(LoginRequiredMixin, ListView):
             request (HttpRequest): incluye lista 'confirmado' con ids marcados.
         """
         marcados = request.POST.getlist('confirmado')
-        Ingreso.objects.update(confirmado=False)
+        cambiados = Ingreso.objects.filter(
+            Q(confirmado=True) & ~Q(pk__in=marcados) | Q(confirmado=False, pk__in=marcados)
+        )
+        desde = cambiados.aggregate(desde=Min('fecha'))['desde']
+        saldos.invalidar_desde(desde)
+        envivo.registrar_masivo('ingreso', desde)
+        # Solo se escriben las filas que cambian: el resto conserva su
+        # `actualizado` y su fragmento cacheado.
+        ahora = timezone.now()
+        Ingreso.objects.filter(confirmado=True).exclude(pk__in=marcados).update(
+            confirmado=False, actualizado=ahora
+        )
         if marcados:
-            Ingreso.objects.filter(pk__in=marcados).update(confirmado=True)
+            Ingreso.objects.filter(confirmado=False, pk__in=marcados).update(
+                confirmado=True, actualizado=ahora
+            )
         messages.success(request, 'Ingresos actualizados.')
         return redirect('finanzas:lista_ingresos')
 
 
+def _avisar_duplicados(request, obj):
+    """Avisa si el movimiento recién cargado tiene la huella de otros."""
+    otros = duplicados.iguales(obj)
+    if otros:
+        campo = obj._meta.get_field(obj.CAMPO_HUELLA).verbose_name
+        messages.warning(
+            request,
+            f'Posible duplicado: hay {len(otros)} movimiento(s) con la misma fecha, '
+            f'monto y {campo}. Revisalos en Duplicados.',
+        )
+
+
 class CrearIngresoView(LoginRequiredMixin, CreateView):
     """
     Alta de ingresos.
@@ -234,7 +301,9 @@ class CrearIngresoView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         messages.success(self.request, 'Ingreso cargado correctamente.')
-        return super().form_valid(form)
+        respuesta = super().form_valid(form)
+        _avisar_duplicados(self.request, self.object)
+        return respuesta
 
 
 class EditarIngresoView(LoginRequiredMixin, UpdateView):
@@ -276,8 +345,19 @@ class ListaGastosView(LoginRequiredMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        hoy = date.today()
         context['ver_todos'] = self.request.GET.get('ver_todos') == '1'
-        context['hoy'] = date.today()
+        context['hoy'] = hoy
+        context['version_lista'] = envivo.cursor_actual()
+        context['ocurrencias'] = ocurrencias(
+            hoy - timedelta(days=DIAS_OCURRENCIAS), hoy + timedelta(days=DIAS_OCURRENCIAS)
+        )
+        context['incluir_archivados'] = self.request.GET.get('archivados') == '1'
+        if context['incluir_archivados']:
+            archivados = GastoArchivado.objects.all()
+            if not context['ver_todos']:
+                archivados = archivados.filter(pagado=False)
+            context['archivados'] = archivados[:LIMITE_ARCHIVADOS]
         return context
 
     def post(self, request, *args, **kwargs):
@@ -288,13 +368,56 @@ class ListaGastosView(LoginRequiredMixin, ListView):
             request (HttpRequest): incluye lista 'pagado' con ids marcados.
         """
         marcados = request.POST.getlist('pagado')
-        Gasto.objects.update(pagado=False)
+        cambiados = Gasto.objects.filter(
+            Q(pagado=True) & ~Q(pk__in=marcados) | Q(pagado=False, pk__in=marcados)
+        )
+        desde = cambiados.aggregate(desde=Min('fecha'))['desde']
+        saldos.invalidar_desde(desde)
+        envivo.registrar_masivo('gasto', desde)
+        ahora = timezone.now()
+        Gasto.objects.filter(pagado=True).exclude(pk__in=marcados).update(
+            pagado=False, actualizado=ahora
+        )
         if marcados:
-            Gasto.objects.filter(pk__in=marcados).update(pagado=True)
+            Gasto.objects.filter(pagado=False, pk__in=marcados).update(
+                pagado=True, actualizado=ahora
+            )
         messages.success(request, 'Gastos actualizados.')
         return redirect('finanzas:lista_gastos')
 
 
+def _recurrencia_y_fecha(pk, fecha_str):
+    """Obtiene la regla y valida que la fecha sea una ocurrencia suya."""
+    recurrencia = get_object_or_404(Recurrencia, pk=pk, activa=True)
+    try:
+        fecha = date.fromisoformat(fecha_str)
+    except ValueError:
+        raise Http404('Fecha inválida.')
+    return recurrencia, fecha
+
+
+@login_required
+@require_POST
+def pagar_ocurrencia(request, pk, fecha):
+    """
+    Materializa una ocurrencia recurrente como gasto/vencimiento pagado.
+
+    Params:
+        pk (int): id de la Recurrencia.
+        fecha (str): fecha ISO de la ocurrencia.
+    """
+    recurrencia, fecha_oc = _recurrencia_y_fecha(pk, fecha)
+    campos = {'estado': 'pagado'} if recurrencia.destino == 'vencimiento' else {'pagado': True}
+    try:
+        materializar(recurrencia, fecha_oc, **campos)
+    except ValueError as exc:
+        raise Http404(str(exc))
+    messages.success(request, f'{recurrencia.concepto} ({fecha_oc}) marcado como pagado.')
+    if recurrencia.destino == 'vencimiento':
+        return redirect('finanzas:vencimientos')
+    return redirect('finanzas:lista_gastos')
+
+
 class CrearGastoView(LoginRequiredMixin, CreateView):
     """
     Alta de gastos.
@@ -308,7 +431,47 @@ class CrearGastoView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         messages.success(self.request, 'Gasto cargado correctamente.')
-        return super().form_valid(form)
+        respuesta = super().form_valid(form)
+        _avisar_duplicados(self.request, self.object)
+        return respuesta
+
+
+class EditarOcurrenciaView(CrearGastoView):
+    """
+    Edición de una ocurrencia recurrente aún no materializada.
+
+    Muestra el formulario con los valores de la regla y recién al guardar
+    crea el Gasto real vinculado a la recurrencia.
+
+    Params:
+        pk (int): id de la Recurrencia.
+        fecha (str): fecha ISO de la ocurrencia.
+    """
+    extra_context = {'form_title': 'Editar gasto recurrente'}
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            self.recurrencia, self.fecha_ocurrencia = _recurrencia_y_fecha(
+                kwargs['pk'], kwargs['fecha']
+            )
+            if self.recurrencia.destino != 'gasto':
+                raise Http404('La recurrencia no genera gastos.')
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_initial(self):
+        initial = super().get_initial()
+        initial.update(valores_materializados(self.recurrencia, self.fecha_ocurrencia))
+        return initial
+
+    def form_valid(self, form):
+        try:
+            self.object, _ = materializar(
+                self.recurrencia, self.fecha_ocurrencia, **form.cleaned_data
+            )
+        except ValueError as exc:
+            raise Http404(str(exc))
+        messages.success(self.request, 'Gasto recurrente guardado.')
+        return redirect(self.get_success_url())
 
 
 class EditarGastoView(LoginRequiredMixin, UpdateView):
@@ -339,23 +502,250 @@ class ListaDeudasView(LoginRequiredMixin, ListView):
     ordering = ['prioridad', 'entidad__nombre']
 
 
+def _mes_desde_param(valor, default):
+    """Parsea un parámetro 'YYYY-MM' al primer día del mes."""
+    try:
+        anio_str, mes_str = valor.split('-')
+        return date(int(anio_str), int(mes_str), 1)
+    except (AttributeError, ValueError):
+        return default
+
+
+@login_required
+def vencimientos(request):
+    """
+    Agenda mensual de vencimientos agrupada por día.
+
+    Params (GET):
+        month (str): mes 'YYYY-MM' a mostrar (por defecto el actual).
+        estado (str): 'pendiente' (defecto), 'pagado' o 'todos'.
+    """
+    today = date.today()
+    mes = _mes_desde_param(request.GET.get('month'), date(today.year, today.month, 1))
+    estado = request.GET.get('estado', 'pendiente')
+    if estado not in ESTADOS_FILTRO:
+        estado = 'pendiente'
+
+    ultimo_dia = calendar.monthrange(mes.year, mes.month)[1]
+    dias = agenda(mes, mes.replace(day=ultimo_dia), estado)
+    mes_anterior = (mes - timedelta(days=1)).replace(day=1)
+    mes_siguiente = mes.replace(day=ultimo_dia) + timedelta(days=1)
+
+    contexto = {
+        'dias': dias,
+        'estado': estado,
+        'month_str': f'{mes.year:04d}-{mes.month:02d}',
+        'month_prev': f'{mes_anterior.year:04d}-{mes_anterior.month:02d}',
+        'month_next': f'{mes_siguiente.year:04d}-{mes_siguiente.month:02d}',
+    }
+    return render(request, 'finanzas/vencimientos.html', contexto)
+
+
+@login_required
+def vencimientos_feed(request):
+    """
+    Feed JSON de vencimientos agrupados por día.
+
+    Params (GET):
+        desde, hasta (str): fechas ISO de la ventana (por defecto, 30 días
+            desde hoy).
+        estado (str): 'pendiente' (defecto), 'pagado' o 'todos'.
+    """
+    today = date.today()
+    try:
+        desde = date.fromisoformat(request.GET.get('desde', today.isoformat()))
+        hasta = date.fromisoformat(
+            request.GET.get('hasta', (desde + timedelta(days=30)).isoformat())
+        )
+        dias = agenda(desde, hasta, request.GET.get('estado', 'pendiente'))
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse({'desde': desde.isoformat(), 'hasta': hasta.isoformat(), 'dias': dias})
+
+
+@login_required
+def buscar_deudas(request):
+    """
+    Autocompletado de deudas para el campo deuda_relacionada.
+
+    Params (GET):
+        q (str): texto a buscar en "entidad - tipo" (vacío: las primeras).
+
+    Retorna:
+        JsonResponse con 'resultados' (id, texto), a lo sumo
+        referencias.LIMITE_BUSQUEDA.
+    """
+    return JsonResponse({'resultados': referencias.buscar_deudas(request.GET.get('q', ''))})
+
+
+@login_required
+def estrategias_deudas(request):
+    """
+    Estrategias de pago de las deudas abiertas (ver finanzas.estrategias).
+
+    Params (GET):
+        presupuesto (float): monto mensual para deudas (por defecto,
+            cuotas + sobrante del mes).
+        barrido (str): '1' para evaluar varios presupuestos.
+
+    Retorna:
+        JsonResponse con 'cuotas', 'sobrante' y 'escenarios' (por
+        estrategia: meses, fecha_fin, interes_total y orden); 202 con
+        Retry-After mientras un barrido se calcula en el fondo; 400 si el
+        presupuesto es inválido.
+    """
+    presupuesto = request.GET.get('presupuesto')
+    if presupuesto:
+        try:
+            presupuesto = float(presupuesto)
+        except ValueError:
+            presupuesto = -1
+        if not 0 <= presupuesto < 1e12:
+            return JsonResponse({'error': 'Presupuesto inválido.'}, status=400)
+    datos = estrategias.resultado(presupuesto or None, barrido=request.GET.get('barrido') == '1')
+    if datos is None:
+        respuesta = JsonResponse({'estado': 'calculando'}, status=202)
+        respuesta['Retry-After'] = '2'
+        return respuesta
+    return JsonResponse(datos)
+
+
+@login_required
+@require_POST
+def cargar_movimientos(request):
+    """
+    Carga en bloque de gastos e ingresos en JSON (ver finanzas.carga_rapida).
+
+    Cuerpo: {"gastos": [{...}], "ingresos": [{...}]} con los campos de
+    GastoForm/IngresoForm. Header opcional Idempotency-Key.
+
+    Retorna:
+        JsonResponse 201 con los ids creados, 400 con los errores por ítem
+        (no se crea nada) o 422 si la clave se usó con otro cuerpo.
+    """
+    estado, datos, repetida = carga_rapida.procesar(
+        request.user, request.body, request.headers.get('Idempotency-Key')
+    )
+    respuesta = JsonResponse(datos, status=estado)
+    if repetida:
+        respuesta['Idempotent-Replayed'] = 'true'
+    return respuesta
+
+
+@login_required
+@require_http_methods(['GET', 'POST'])
+@gzip_page
+def sincronizar(request):
+    """
+    Sincronización incremental para clientes offline (ver finanzas.sincronizacion).
+
+    GET: ?cursor=N (0 o ausente: copia completa por páginas con ?pagina=),
+    ?limite= (cambios por respuesta, hasta sincronizacion.LIMITE_MAXIMO).
+    POST: {"cambios": [{modelo, accion, id, base, datos, ref}]}.
+
+    Retorna:
+        JsonResponse (comprimida si el cliente acepta gzip); 410 si el
+        cursor es más viejo que los cambios conservados.
+    """
+    if request.method == 'POST':
+        try:
+            datos = json.loads(request.body)
+            return JsonResponse(sincronizacion.aplicar(datos.get('cambios')))
+        except (UnicodeDecodeError, json.JSONDecodeError, AttributeError):
+            return JsonResponse({'error': 'Se espera un objeto JSON con "cambios".'}, status=400)
+        except ValueError as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+
+    try:
+        cursor = int(request.GET.get('cursor', 0))
+        limite = min(
+            int(request.GET.get('limite', sincronizacion.LIMITE)), sincronizacion.LIMITE_MAXIMO
+        )
+        if cursor < 0 or limite < 1:
+            raise ValueError
+        if cursor == 0:
+            return JsonResponse(sincronizacion.instantanea(request.GET.get('pagina'), limite))
+        return JsonResponse(sincronizacion.cambios(cursor, limite))
+    except ValueError:
+        return JsonResponse({'error': 'cursor, limite o pagina inválidos.'}, status=400)
+    except sincronizacion.CursorVencido:
+        return JsonResponse(
+            {'error': 'Cursor vencido: pedir la copia completa con cursor=0.'}, status=410
+        )
+
+
+@login_required
+def revisar_duplicados(request):
+    """
+    Revisión de posibles duplicados (ver finanzas.duplicados).
+
+    Params (GET):
+        modelo (str): 'gasto' (defecto) o 'ingreso'.
+        page (int): página de grupos.
+
+    POST: 'huella' del grupo y 'conservar' (pk) para fusionarlo, o
+    'descartar' para marcarlo como no duplicado.
+    """
+    nombre = request.GET.get('modelo', 'gasto')
+    if nombre not in duplicados.MODELOS:
+        nombre = 'gasto'
+    if request.method == 'POST':
+        huella = request.POST.get('huella', '')
+        if 'descartar' in request.POST:
+            duplicados.descartar(nombre, huella)
+            messages.success(request, 'Grupo marcado como revisado.')
+        else:
+            try:
+                conservar = int(request.POST.get('conservar', ''))
+                borrados = duplicados.fusionar(nombre, huella, conservar)
+            except (ValueError, ObjectDoesNotExist):
+                messages.error(request, 'Elegí qué movimiento conservar.')
+            else:
+                messages.success(request, f'{borrados} duplicado(s) borrado(s).')
+        return redirect(f"{reverse('finanzas:duplicados')}?modelo={nombre}")
+
+    try:
+        pagina = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        pagina = 1
+    grupos, hay_mas = duplicados.grupos(nombre, pagina)
+    return render(request, 'finanzas/duplicados.html', {
+        'modelo': nombre,
+        'grupos': grupos,
+        'pagina': pagina,
+        'hay_mas': hay_mas,
+    })
+
+
 @login_required
 def importar_exportar(request):
     """
     Vista para importar/exportar CSV mediante management commands.
 
     Botones:
-        - Exportar CSV: ejecuta exportar_csv y descarga un ZIP.
-        - Importar CSV: sube uno o varios CSV, los guarda en imports/ y corre
-          importar_csv.
+        - Exportar CSV: ejecuta exportar_csv y descarga un ZIP (opcionalmente
+          con los movimientos archivados).
+        - Importar CSV: sube uno o varios CSV, o el ZIP de la exportación, y
+          los importa por streaming con finanzas.importacion.
     """
+    # Camino poco usado: sus imports (management, zipfile, csv) se cargan
+    # recién acá para no sumarlos al arranque de cada worker.
+    from io import BytesIO
+    from zipfile import ZIP_DEFLATED, ZipFile
+
+    from django.core.management import call_command
+
+    from . import importacion
+
     exports_dir = Path('exports')
-    imports_dir = Path('imports')
 
     if request.method == 'POST':
         if 'export' in request.POST:
             try:
-                call_command('exportar_csv')
+                call_command(
+                    'exportar_csv',
+                    incluir_archivados=request.POST.get('incluir_archivados') == '1',
+                )
                 csv_files = list(exports_dir.glob('*.csv'))
                 if not csv_files:
                     messages.warning(request, 'No hay archivos CSV para exportar.')
@@ -374,30 +764,61 @@ def importar_exportar(request):
         if 'import' in request.POST:
             archivos = request.FILES.getlist('csv_files')
             if not archivos:
-                messages.warning(request, 'Selecciona al menos un archivo CSV para importar.')
-                return redirect('finanzas:importar_exportar')
-
-            imports_dir.mkdir(parents=True, exist_ok=True)
-            guardados = 0
-            for file in archivos:
-                if not file.name.lower().endswith('.csv'):
-                    messages.warning(request, f'Se omitió {file.name} (no es CSV).')
-                    continue
-                destino = imports_dir / file.name
-                with destino.open('wb') as dest:
-                    for chunk in file.chunks():
-                        dest.write(chunk)
-                guardados += 1
-
-            if guardados == 0:
-                messages.warning(request, 'No se guardó ningún archivo válido para importar.')
+                messages.warning(request, 'Selecciona al menos un archivo CSV o ZIP para importar.')
                 return redirect('finanzas:importar_exportar')
 
+            # Los CSV se leen directo de la subida (o del ZIP) por lotes,
+            # sin pasar por imports/.
+            flujos = {}
+            zips = []
             try:
-                call_command('importar_csv')
-                messages.success(request, 'Importación completada.')
-            except Exception as exc:  # noqa: BLE001
-                messages.error(request, f'Error al importar: {exc}')
+                for file in archivos:
+                    nombre = file.name.lower()
+                    if nombre.endswith('.zip'):
+                        try:
+                            zipf, miembros = importacion.miembros_zip(file)
+                        except ValueError as exc:
+                            messages.warning(request, f'Se omitió {file.name}: {exc}')
+                            continue
+                        zips.append(zipf)
+                        flujos.update(miembros)
+                    elif nombre in importacion.COLUMNAS:
+                        flujos[nombre] = file
+                    else:
+                        messages.warning(
+                            request, f'Se omitió {file.name} (no es un CSV conocido).'
+                        )
+
+                if not flujos:
+                    messages.warning(
+                        request, 'No se recibió ningún archivo válido para importar.'
+                    )
+                    return redirect('finanzas:importar_exportar')
+
+                try:
+                    resultados = importacion.importar(flujos)
+                except Exception as exc:  # noqa: BLE001
+                    messages.error(request, f'Error al importar: {exc}')
+                    return redirect('finanzas:importar_exportar')
+            finally:
+                for zipf in zips:
+                    zipf.close()
+
+            for nombre, resultado in resultados.items():
+                resumen = (
+                    f"{nombre}: {resultado['creados']} creados, "
+                    f"{resultado['actualizados']} actualizados"
+                )
+                if resultado['duplicados']:
+                    resumen += f", {resultado['duplicados']} posibles duplicados"
+                if resultado['errores']:
+                    messages.warning(
+                        request,
+                        f"{resumen}, {resultado['errores']} con errores "
+                        f"({'; '.join(resultado['mensajes'][:3])}).",
+                    )
+                else:
+                    messages.success(request, f'{resumen}.')
             return redirect('finanzas:importar_exportar')
 
     return render(request, 'finanzas/importar_exportar.html')
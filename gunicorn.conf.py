@@ -0,0 +1,65 @@
+"""
+Configuración de gunicorn para Render (y cualquier despliegue WSGI).
+
+`gunicorn config.wsgi:application -c gunicorn.conf.py`. Todo se puede
+pisar por variables de entorno; WEB_CONCURRENCY es la que usa Render.
+"""
+import multiprocessing
+import os
+import time
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Un worker por CPU más uno, con tope para no pasarse de memoria en planes
+# chicos; cada worker atiende GUNICORN_THREADS requests a la vez. Sin
+# REDIS_URL el cache es memoria local de cada proceso y la invalidación de
+# versiones no llega a los demás workers: por defecto un solo worker con
+# más hilos.
+if os.environ.get('REDIS_URL'):
+    workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() + 1, 4)))
+    threads = int(os.environ.get('GUNICORN_THREADS', '2'))
+else:
+    workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+    threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = 20
+keepalive = 5
+
+# Django, las vistas y los templates se cargan una vez en el master y los
+# workers los heredan por fork: arrancan más rápido y comparten memoria.
+preload_app = True
+
+# Reciclar workers cada tanto acota pérdidas de memoria; el jitter evita
+# que todos se reinicien a la vez.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+accesslog = '-'
+
+
+def when_ready(server):
+    from finanzas import arranque
+
+    tiempos = arranque.calentar(conexiones=False)
+    # Ninguna conexión abierta en el master puede pasar a los workers.
+    arranque.cerrar_conexiones()
+    server.log.info(
+        'Calentamiento del master: %s',
+        ', '.join(f'{paso} {segundos * 1000:.0f} ms' for paso, segundos in tiempos.items()),
+    )
+
+
+def post_worker_init(worker):
+    from finanzas import arranque
+
+    try:
+        inicio = time.perf_counter()
+        arranque.abrir_conexiones()
+        worker.log.info(
+            'Worker %s: conexiones abiertas en %.0f ms',
+            worker.pid,
+            (time.perf_counter() - inicio) * 1000,
+        )
+    except Exception as exc:  # noqa: BLE001
+        # La base puede estar despertando: el primer request reintenta.
+        worker.log.warning('Worker %s: no se pudo abrir la base (%s)', worker.pid, exc)